@@ -68,6 +68,29 @@ class ComputeDb:
                 )
                 """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pog_timings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    hotkey TEXT,
+                    stage TEXT NOT NULL,
+                    duration REAL NOT NULL,  -- seconds
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pog_stats_hotkey ON pog_stats (hotkey, created_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pog_timings_hotkey ON pog_timings (hotkey, created_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pog_timings_created_at ON pog_timings (created_at)")
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pog_schedule (
+                    hotkey TEXT PRIMARY KEY,
+                    round_start REAL NOT NULL,  -- unix time
+                    due_at REAL NOT NULL  -- unix time of the first attempt
+                )
+                """
+            )
 
             self.conn.commit()
         except Exception as e:
@@ -0,0 +1,73 @@
+import bittensor as bt
+
+from compute import validator_permit_stake
+
+
+class ValidatorSetProvider:
+    """
+    Validators of the subnet derived from the synced metagraph, shared by the validator and the miner.
+
+    Results are cached by the block of the metagraph sync, so repeated calls between two syncs
+    do not touch the chain. Hotkeys and stakes come from the metagraph, only the prometheus
+    versions, which the metagraph lacks, are fetched with one batched neurons_lite query.
+    """
+
+    def __init__(self, subtensor, netuid, min_stake=validator_permit_stake):
+        self.subtensor = subtensor
+        self.netuid = netuid
+        self.min_stake = min_stake
+        self._block = None
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.chain_queries = 0
+
+    def _cached(self, metagraph, key, build):
+        block = int(metagraph.block)
+        if block != self._block:
+            self._block = block
+            self._cache = {}
+        if key in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._cache[key] = build(metagraph)
+        return self._cache[key]
+
+    def _build_indices(self, metagraph):
+        return [index for index, stake in enumerate(metagraph.total_stake) if stake > self.min_stake]
+
+    def _build_validators(self, metagraph):
+        indices = self._cached(metagraph, "indices", self._build_indices)
+        self.chain_queries += 1
+        versions = {
+            neuron.uid: neuron.prometheus_info.version if neuron.prometheus_info else 0
+            for neuron in self.subtensor.neurons_lite(netuid=self.netuid)
+        }
+        uids = metagraph.uids.tolist()
+        return [(uids[index], metagraph.hotkeys[index], versions.get(uids[index], 0)) for index in indices]
+
+    def get_uids(self, metagraph):
+        """
+        :return: Uids of the validators, those with more than min_stake.
+        """
+        uids = metagraph.uids.tolist()
+        return [uids[index] for index in self._cached(metagraph, "indices", self._build_indices)]
+
+    def get_hotkeys(self, metagraph):
+        """
+        :return: Hotkeys of the validators.
+        """
+        return [metagraph.hotkeys[index] for index in self._cached(metagraph, "indices", self._build_indices)]
+
+    def get_validators(self, metagraph):
+        """
+        :return: (uid, hotkey, prometheus version) of the validators.
+        """
+        return list(self._cached(metagraph, "validators", self._build_validators))
+
+    def get_stats(self):
+        """
+        :return: Cache hits and misses, chain queries and the block of the cached metagraph.
+        """
+        return {"hits": self.hits, "misses": self.misses, "chain_queries": self.chain_queries, "block": self._block}
@@ -17,6 +17,7 @@
 # DEALINGS IN THE SOFTWARE.
 # Step 1: Import necessary libraries and modules
 import bittensor as bt
+import numpy as np
 import wandb
 
 import compute
@@ -32,6 +33,29 @@ def normalize(val, min_value, max_value):
 def prevent_none(val):
     return 0 if not val else val
 
+class GpuScoreTable:
+    """
+    Normalized score per GPU of every model of gpu_performance.gpu_scores, so that the
+    scores of the whole metagraph are array lookups instead of one calc_score_pog each.
+    """
+
+    def __init__(self, config_data):
+        gpu_scores = config_data["gpu_performance"].get("gpu_scores", {})
+        self.index = {gpu_name: i for i, gpu_name in enumerate(gpu_scores)}
+        scores = np.array(list(gpu_scores.values()), dtype=np.float64)
+        # 8 GPUs of the best model score 1, the extra last entry scores unknown models 0
+        per_gpu = scores / (scores.max() * 8) if len(scores) else scores
+        self.per_gpu = np.append(per_gpu, 0.0)
+
+    def scores(self, gpu_names, num_gpus):
+        """
+        :param gpu_names: GPU model per miner.
+        :param num_gpus: Number of GPUs per miner, capped at 8.
+        :return: Normalized score per miner, as calc_score_pog.
+        """
+        indices = np.fromiter((self.index.get(gpu_name, -1) for gpu_name in gpu_names), dtype=np.int64, count=len(gpu_names))
+        return self.per_gpu[indices] * np.minimum(np.asarray(num_gpus, dtype=np.float64), 8)
+
 def calc_score_pog(gpu_specs, hotkey, allocated_hotkeys, config_data, mock=False):
     try:
         gpu_data = config_data["gpu_performance"]
@@ -87,6 +87,14 @@ def purge_miner_entries(db: ComputeDb, uid: int, hotkey: str):
             "DELETE FROM pog_stats WHERE hotkey = ?",
             (hotkey,),
         )
+        cursor.execute(
+            "DELETE FROM pog_timings WHERE hotkey = ?",
+            (hotkey,),
+        )
+        cursor.execute(
+            "DELETE FROM pog_schedule WHERE hotkey = ?",
+            (hotkey,),
+        )
         cursor.execute(
             "DELETE FROM stats WHERE uid = ? AND hotkey = ?",
             (uid, hotkey),
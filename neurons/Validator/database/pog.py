@@ -18,6 +18,7 @@ import datetime
 import json
 
 import bittensor as bt
+import numpy as np
 
 from compute.utils.db import ComputeDb
 
@@ -64,6 +65,134 @@ def update_pog_stats(db: ComputeDb, hotkey, gpu_name, num_gpus):
         finally:
             cursor.close()
 
+def update_pog_timings(db: ComputeDb, hotkey, durations, retention_seconds=7 * 24 * 3600):
+    """
+    Inserts the per-stage timings of one PoG test and drops the timings older than the retention period.
+
+    :param hotkey: The miner's hotkey identifier.
+    :param durations: Seconds spent in each stage, by stage name.
+    :param retention_seconds: Age in seconds after which timings are deleted.
+    """
+    if not durations:
+        return
+    cursor = db.get_cursor()
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO pog_timings (hotkey, stage, duration)
+            VALUES (?, ?, ?)
+            """,
+            [(hotkey, stage, float(duration)) for stage, duration in durations.items()]
+        )
+        cursor.execute(
+            "DELETE FROM pog_timings WHERE created_at < datetime('now', ?)",
+            (f"-{int(retention_seconds)} seconds",)
+        )
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        bt.logging.error(f"Error updating pog_timings for {hotkey}: {e}")
+    finally:
+        cursor.close()
+
+def get_pog_timing_percentiles(db: ComputeDb, window_seconds=360 * 12, percentiles=(50, 90, 99), hotkey=None):
+    """
+    Per-stage percentiles of the PoG timings recorded over the last window_seconds, one epoch by default.
+
+    :param window_seconds: Length of the window in seconds.
+    :param percentiles: Percentiles to compute.
+    :param hotkey: Restrict to one miner (optional).
+    :return: A dictionary of {stage: {"count": ..., "p50": ..., ...}} in seconds.
+    """
+    cursor = db.get_cursor()
+    try:
+        query = """
+            SELECT stage, duration
+            FROM pog_timings
+            WHERE created_at >= datetime('now', ?)
+        """
+        params = [f"-{int(window_seconds)} seconds"]
+        if hotkey is not None:
+            query += " AND hotkey = ?"
+            params.append(hotkey)
+        cursor.execute(query, params)
+        durations = {}
+        for stage, duration in cursor.fetchall():
+            durations.setdefault(stage, []).append(duration)
+
+        result = {}
+        for stage, samples in durations.items():
+            values = np.percentile(samples, percentiles)
+            result[stage] = {"count": len(samples), **{f"p{p:g}": float(v) for p, v in zip(percentiles, values)}}
+        return result
+    except Exception as e:
+        bt.logging.error(f"Error retrieving pog_timings percentiles: {e}")
+        return {}
+    finally:
+        cursor.close()
+
+def get_pog_last_results(db: ComputeDb):
+    """
+    Retrieves the time of the latest PoG result of every miner, passed or failed.
+
+    :return: A dictionary of {hotkey: unix time}.
+    """
+    cursor = db.get_cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT hotkey, CAST(strftime('%s', MAX(created_at)) AS REAL)
+            FROM pog_stats
+            GROUP BY hotkey
+            """
+        )
+        return {hotkey: last_result for hotkey, last_result in cursor.fetchall() if last_result is not None}
+    except Exception as e:
+        bt.logging.error(f"Error retrieving the latest pog_stats: {e}")
+        return {}
+    finally:
+        cursor.close()
+
+def get_pog_schedule(db: ComputeDb):
+    """
+    Retrieves the persisted plan of the current PoG round.
+
+    :return: The round start (unix time, None without a plan) and a dictionary of {hotkey: due unix time}.
+    """
+    cursor = db.get_cursor()
+    try:
+        cursor.execute("SELECT hotkey, round_start, due_at FROM pog_schedule")
+        rows = cursor.fetchall()
+        if not rows:
+            return None, {}
+        return max(row[1] for row in rows), {hotkey: due_at for hotkey, _, due_at in rows}
+    except Exception as e:
+        bt.logging.error(f"Error retrieving pog_schedule: {e}")
+        return None, {}
+    finally:
+        cursor.close()
+
+def save_pog_schedule(db: ComputeDb, round_start, plan):
+    """
+    Replaces the persisted plan of the PoG round.
+
+    :param round_start: Unix time of the start of the round.
+    :param plan: A dictionary of {hotkey: due unix time}.
+    """
+    cursor = db.get_cursor()
+    try:
+        cursor.execute("DELETE FROM pog_schedule")
+        cursor.executemany(
+            "INSERT INTO pog_schedule (hotkey, round_start, due_at) VALUES (?, ?, ?)",
+            [(hotkey, round_start, due_at) for hotkey, due_at in plan.items()]
+        )
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        bt.logging.error(f"Error saving pog_schedule: {e}")
+    finally:
+        cursor.close()
+
 def get_pog_specs(db: ComputeDb, hotkey):
     """
     Retrieves the most recent GPU spec entry for a given hotkey where gpu_name is not None.
@@ -97,9 +226,35 @@ def get_pog_specs(db: ComputeDb, hotkey):
     finally:
         cursor.close()
 
+def get_all_pog_specs(db: ComputeDb):
+    """
+    Retrieves the most recent GPU spec entry of every hotkey where gpu_name is not None, in one query.
+
+    :return: A dictionary of {hotkey: {'gpu_name': ..., 'num_gpus': ...}}.
+    """
+    cursor = db.get_cursor()
+    try:
+        # With MAX() SQLite returns the other columns from the row holding the maximum. Rows are
+        # inserted with created_at = now, so the highest id is the latest entry, ties included.
+        cursor.execute(
+            """
+            SELECT hotkey, gpu_name, num_gpus, MAX(id)
+            FROM pog_stats
+            WHERE gpu_name IS NOT NULL AND num_gpus IS NOT NULL
+            GROUP BY hotkey
+            """
+        )
+        return {hotkey: {"gpu_name": gpu_name, "num_gpus": num_gpus} for hotkey, gpu_name, num_gpus, _ in cursor.fetchall()}
+    except Exception as e:
+        bt.logging.error(f"Error retrieving pog_stats: {e}")
+        return {}
+    finally:
+        cursor.close()
+
 def write_stats(self, stats):
     cursor = self.get_cursor()
     try:
+        rows = []
         for uid, data in stats.items():
             raw_specs = data.get("gpu_specs")
 
@@ -113,19 +268,7 @@ def write_stats(self, stats):
             # Ensure 'score' is numeric if storing as REAL
             numeric_score = float(data.get("score", 0))
 
-            cursor.execute(
-                """
-                INSERT INTO stats (uid, hotkey, gpu_specs, score, allocated, own_score, reliability_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(uid) DO UPDATE SET
-                    hotkey=excluded.hotkey,
-                    gpu_specs=excluded.gpu_specs,
-                    score=excluded.score,
-                    allocated=excluded.allocated,
-                    own_score=excluded.own_score,
-                    reliability_score=excluded.reliability_score,
-                    created_at=CURRENT_TIMESTAMP
-                """,
+            rows.append(
                 (
                     uid,
                     data.get("hotkey"),
@@ -134,8 +277,25 @@ def write_stats(self, stats):
                     data.get("allocated"),
                     data.get("own_score"),
                     data.get("reliability_score"),
-                ),
+                )
             )
+
+        # One batched upsert, committed as a single transaction
+        cursor.executemany(
+            """
+            INSERT INTO stats (uid, hotkey, gpu_specs, score, allocated, own_score, reliability_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(uid) DO UPDATE SET
+                hotkey=excluded.hotkey,
+                gpu_specs=excluded.gpu_specs,
+                score=excluded.score,
+                allocated=excluded.allocated,
+                own_score=excluded.own_score,
+                reliability_score=excluded.reliability_score,
+                created_at=CURRENT_TIMESTAMP
+            """,
+            rows,
+        )
         self.conn.commit()
     except Exception as e:
         self.conn.rollback()
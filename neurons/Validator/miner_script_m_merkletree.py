@@ -7,48 +7,166 @@ import sys
 import os
 import numpy as np
 import hashlib
-from multiprocessing.pool import ThreadPool
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import argparse
+import glob
+import shutil
 import json
 import gc
+import multiprocessing
+import struct
+import base64
+import resource
+import threading
+import platform
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
 
 os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "max_split_size_mb:512"
 
 import subprocess
 import sys
 
+# Devices of every phase: 'cuda', or 'cpu' to run the whole pipeline on virtual GPUs backed
+# by the CPU and host RAM, e.g. for local benchmarks. 'auto' picks CUDA when available.
+# Environment variables are read at import so that spawned device workers inherit them.
+DEVICE = os.environ.get('POG_DEVICE', 'cuda')
+# Number of virtual GPUs in CPU mode and memory of each in GB, the free RAM share by default
+VIRTUAL_GPUS = int(os.environ.get('POG_VIRTUAL_GPUS', '1'))
+VIRTUAL_VRAM = float(os.environ['POG_VIRTUAL_VRAM']) if os.environ.get('POG_VIRTUAL_VRAM') else None
+# Directory of the artifacts kept between compute and proof mode
+ARTIFACTS_DIR = os.environ.get('POG_ARTIFACTS_DIR', '/dev/shm')
+
+# Binary proof responses: file header (magic, version, number of frames) followed by one
+# frame per GPU: header (gpu_id, k, n, proof depth, hash size), k (i, j) uint32 pairs,
+# k x n float32 rows and k x depth sibling hashes.
+RESPONSES_FILE = 'responses.bin'
+RESPONSES_MAGIC = b'POGR'
+RESPONSES_VERSION = 1
+
+# Artifacts kept in ARTIFACTS_DIR between compute and proof mode, removed once older than
+# SHM_MAX_AGE seconds or when a new compute round needs their space
+SHM_ARTIFACT_PATTERNS = ['C_gpu_*.npy', 'merkle_tree_gpu_*.npy', RESPONSES_FILE]
+SHM_MAX_AGE = 3600
+
+def configure_devices(device=None, virtual_gpus=None, virtual_vram=None, artifacts_dir=None):
+    """
+    Override the device settings of the environment, for this process and the device
+    workers it spawns afterwards.
+    """
+    global DEVICE, VIRTUAL_GPUS, VIRTUAL_VRAM, ARTIFACTS_DIR
+    if device is not None:
+        if device not in ('auto', 'cuda', 'cpu'):
+            raise ValueError(f"Unsupported device {device}.")
+        DEVICE = os.environ['POG_DEVICE'] = device
+    if virtual_gpus is not None:
+        if virtual_gpus < 1:
+            raise ValueError("At least one virtual GPU is required.")
+        VIRTUAL_GPUS = virtual_gpus
+        os.environ['POG_VIRTUAL_GPUS'] = str(virtual_gpus)
+    if virtual_vram is not None:
+        VIRTUAL_VRAM = virtual_vram
+        os.environ['POG_VIRTUAL_VRAM'] = str(virtual_vram)
+    if artifacts_dir is not None:
+        os.makedirs(artifacts_dir, exist_ok=True)
+        ARTIFACTS_DIR = os.environ['POG_ARTIFACTS_DIR'] = artifacts_dir
+
+def artifact_path(name):
+    return os.path.join(ARTIFACTS_DIR, name)
+
+def get_devices():
+    """
+    Devices of the virtual or physical GPUs, by GPU id.
+
+    Raises:
+        RuntimeError: CUDA was requested but is not available.
+    """
+    use_cuda = DEVICE == 'cuda' or (DEVICE == 'auto' and torch.cuda.is_available())
+    if use_cuda:
+        if not torch.cuda.is_available():
+            raise RuntimeError("No GPU detected.")
+        return [torch.device(f'cuda:{i}') for i in range(torch.cuda.device_count())]
+    return [torch.device('cpu')] * VIRTUAL_GPUS
+
+def get_device_name(device):
+    if device.type == 'cuda':
+        return torch.cuda.get_device_name(device)
+    return f"CPU {platform.processor() or platform.machine()}"
+
+def blake2b_256(data=b''):
+    return hashlib.blake2b(data, digest_size=32)
+
+# Merkle tree hash backends, every backend produces 32-byte digests
+HASH_FUNCTIONS = {
+    'sha256': hashlib.sha256,
+    'blake2b': blake2b_256,
+}
+if blake3 is not None:
+    HASH_FUNCTIONS['blake3'] = blake3.blake3
+
 def get_gpu_info():
     """
-    Detect the number and types of GPUs available on the system.
+    Detect the number and types of GPUs available on the system, the virtual GPUs in CPU mode.
 
     Returns:
         dict: Dictionary containing the number of GPUs and their names.
     """
-    if not torch.cuda.is_available():
-        return {"num_gpus": 0, "gpu_names": []}
+    try:
+        devices = get_devices()
+    except RuntimeError:
+        return {"num_gpus": 0, "gpu_names": [], "hash_algorithms": list(HASH_FUNCTIONS)}
 
-    num_gpus = torch.cuda.device_count()
-    gpu_names = [torch.cuda.get_device_name(i) for i in range(num_gpus)]
+    num_gpus = len(devices)
+    gpu_names = [get_device_name(device) for device in devices]
 
-    gpu_info = {"num_gpus": num_gpus, "gpu_names": gpu_names}
+    gpu_info = {"num_gpus": num_gpus, "gpu_names": gpu_names, "hash_algorithms": list(HASH_FUNCTIONS)}
+    return gpu_info
 
-    print(json.dumps(gpu_info, indent=2))
+# Benchmark defaults: warmup runs, timed runs and time budget per precision and device.
+# The reported time is the first timed run, a single cold run by default, which the
+# GPU_TFLOPS fingerprints and the timing check of the validator are calibrated on.
+# More runs only add statistics.
+BENCHMARK_WARMUP = 0
+BENCHMARK_ITERATIONS = 1
+BENCHMARK_MAX_SECONDS = 20.0
+# Matrix size cap when benchmarking the CPU, whose RAM would allow for huge matrices
+BENCHMARK_CPU_MAX_SIZE = 4096
 
-def estimate_vram_size(buffer_factor=0.9, precision="fp16"):
-    dtype = torch.float16 if precision == "fp16" else torch.float32
-    element_size = 2 if precision == "fp16" else 4  # Size of each element in bytes
-    total_elements = 1024 * 1024  # Start with a 1MB array
+def get_device_memory(device):
+    """
+    Returns:
+        tuple: (free_bytes, total_bytes) of the device as reported by the runtime. In CPU
+        mode, each virtual GPU gets VIRTUAL_VRAM or an equal share of the host RAM.
+    """
+    if device.type == 'cuda':
+        return torch.cuda.mem_get_info(device)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    free_bytes = os.sysconf('SC_AVPHYS_PAGES') * page_size // VIRTUAL_GPUS
+    total_bytes = os.sysconf('SC_PHYS_PAGES') * page_size // VIRTUAL_GPUS
+    if VIRTUAL_VRAM is not None:
+        total_bytes = int(VIRTUAL_VRAM * 1e9)
+        free_bytes = min(free_bytes, total_bytes)
+    return free_bytes, total_bytes
+
+def estimate_vram_size(buffer_factor=0.9, precision="fp16", device=None):
+    """
+    Estimate the unfractured memory of a device in GB from its free memory.
 
-    try:
-        while True:
-            arr = torch.empty((total_elements,), dtype=dtype, device="cuda")
-            total_elements *= 2
-    except RuntimeError:
-        total_elements //= 2  # Step back to last successful allocation
-        vram_bytes = total_elements * element_size
-        usable_vram = vram_bytes / (buffer_factor * 1e9)  # Convert to GB
-        return usable_vram
+    Gives the result of the former probe, which allocated tensors of doubling size
+    starting at 1M elements: the largest of them that fits while the previous one,
+    half its size, is still allocated.
+    """
+    device = device or get_devices()[0]
+    free_bytes, _ = get_device_memory(device)
+    element_size = 2 if precision == "fp16" else 4  # Size of each element in bytes
+    vram_bytes = 1024 * 1024 * element_size
+    while 2 * vram_bytes * 1.5 <= free_bytes:
+        vram_bytes *= 2
+    usable_vram = vram_bytes / (buffer_factor * 1e9)  # Convert to GB
+    return usable_vram
 
 def adjust_matrix_size(vram, element_size=2, buffer_factor=0.8):
     usable_vram = vram * buffer_factor * 1e9  # Usable VRAM in bytes
@@ -57,14 +175,16 @@ def adjust_matrix_size(vram, element_size=2, buffer_factor=0.8):
     return aligned_size
 
 def get_seeds():
-    """Read n and seeds from /tmp/seeds.txt."""
+    """Read n, the hash algorithm and seeds from /tmp/seeds.txt."""
     if not os.path.exists('/tmp/seeds.txt'):
         print("Seeds file not found.")
         sys.exit(1)
     with open('/tmp/seeds.txt', 'r') as f:
         content = f.read().strip()
     lines = content.split('\n')
-    n = int(lines[0])
+    header = lines[0].split()
+    n = int(header[0])
+    hash_algorithm = header[1] if len(header) > 1 else 'sha256'
     seeds = {}
     for line in lines[1:]:
         gpu_id, s_A, s_B = line.strip().split()
@@ -72,7 +192,7 @@ def get_seeds():
         s_A = int(s_A)
         s_B = int(s_B)
         seeds[gpu_id] = (s_A, s_B)
-    return n, seeds
+    return n, seeds, hash_algorithm
 
 def get_challenge_indices():
     """Read challenge indices from /tmp/challenge_indices.txt."""
@@ -91,61 +211,258 @@ def get_challenge_indices():
     return indices
 
 
-def build_merkle_tree_rows(C, hash_func=hashlib.sha256, num_threads=None):
-    if num_threads is None:
-        num_threads = 8
+class HashingEngine:
+    """
+    Worker threads hashing Merkle tree leaves for the whole run, shared by all GPUs.
+
+    Rows of C are hashed in chunks of consecutive rows, one task per chunk. hashlib
+    and blake3 release the GIL for buffers of a few KB and more, so leaf hashing
+    scales with the cores. Interior nodes are 64-byte inputs hashed with the GIL
+    held, they are hashed inline one level at a time instead of through the pool.
+    """
 
-    n = C.shape[0]
-    
+    def __init__(self, num_threads=None):
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.num_threads, thread_name_prefix='merkle')
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def hash_rows(self, C, hash_func=hashlib.sha256, chunk_rows=None):
+        """
+        Returns:
+            list: Hash of each row of C.
+        """
+        n = C.shape[0]
+        if chunk_rows is None:
+            chunk_rows = max(1, -(-n // (self.num_threads * 4)))
+        leaves = [None] * n
+        futures = [
+            self.executor.submit(hash_rows_into, C, leaves, start, min(start + chunk_rows, n), hash_func)
+            for start in range(0, n, chunk_rows)
+        ]
+        for future in futures:
+            future.result()
+        return leaves
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+_hashing_engine = None
+
+def get_hashing_engine():
+    """Hashing engine of this process, created on first use."""
+    global _hashing_engine
+    if _hashing_engine is None:
+        _hashing_engine = HashingEngine()
+    return _hashing_engine
+
+def hash_rows_into(C, leaves, start, stop, hash_func=hashlib.sha256):
+    """Hash rows start to stop of C into leaves, one task of the hashing engine."""
+    for i in range(start, stop):
+        leaves[i] = hash_func(C[i].view(np.uint8)).digest()
+
+def build_merkle_tree_rows(C, hash_func=hashlib.sha256, engine=None):
     # Hash each row of C using the specified hash function
-    def hash_row(i):
-        return hash_func(C[i, :].tobytes()).digest()
-    
-    # Parallelize row hashing
-    with ThreadPool(num_threads) as pool:
-        leaves = pool.map(hash_row, range(n))
-    
-    tree = leaves.copy()
-    num_leaves = len(leaves)
+    leaves = (engine or get_hashing_engine()).hash_rows(C, hash_func=hash_func)
+    return build_merkle_tree_levels(leaves, hash_func=hash_func)
+
+def merkle_level_offsets(total_leaves):
+    """
+    Offset and number of nodes of each level of the flat row Merkle tree, leaves first.
+
+    An odd node is paired with itself, so a level of m nodes has ceil(m / 2) parents
+    and the tree holds about 2n - 1 nodes.
+    """
+    levels = []
     offset = 0
+    num_nodes = total_leaves
+    while True:
+        levels.append((offset, num_nodes))
+        if num_nodes <= 1:
+            return levels
+        offset += num_nodes
+        num_nodes = (num_nodes + 1) // 2
+
+def hash_level(level, hash_func=hashlib.sha256):
+    """
+    Hash the sibling pairs of one tree level.
 
-    # Function to hash pairs of nodes using the specified hash function
-    def hash_pair(i):
-        left = tree[offset + i]
-        if i + 1 < num_leaves:
-            right = tree[offset + i + 1]
-        else:
-            right = left  # Duplicate if odd number of leaves
-        return hash_func(left + right).digest()
-
-    # Build the Merkle tree
-    while num_leaves > 1:
-        with ThreadPool(num_threads) as pool:
-            # Process pairs of leaves
-            new_level = pool.map(hash_pair, range(0, num_leaves, 2))
-        tree.extend(new_level)
-        offset += num_leaves
-        num_leaves = len(new_level)
-
-    root_hash = tree[-1]
+    Args:
+        level (np.ndarray): (num_nodes, hash_size) uint8 nodes of the level.
+
+    Returns:
+        bytes: The concatenated parent hashes.
+    """
+    num_nodes, hash_size = level.shape
+    data = memoryview(np.ascontiguousarray(level).tobytes())
+    pair_size = 2 * hash_size
+    # Siblings are adjacent in the level, each pair is hashed without concatenation
+    parents = [hash_func(data[k:k + pair_size]).digest() for k in range(0, (num_nodes // 2) * pair_size, pair_size)]
+    if num_nodes % 2:
+        parents.append(hash_func(bytes(data[-hash_size:]) * 2).digest())  # Duplicate if odd number of nodes
+    return b''.join(parents)
+
+def build_merkle_tree_levels(leaves, hash_func=hashlib.sha256):
+    """
+    Build the Merkle tree on top of the leaf hashes of the rows of C.
+
+    Returns:
+        tuple: (root_hash, tree) with the nodes of all levels in one contiguous
+        (total_nodes, hash_size) uint8 array, laid out as in merkle_level_offsets.
+    """
+    levels = merkle_level_offsets(len(leaves))
+    hash_size = len(leaves[0])
+    tree = np.empty((levels[-1][0] + 1, hash_size), dtype=np.uint8)
+    tree[:len(leaves)] = np.frombuffer(b''.join(leaves), dtype=np.uint8).reshape(len(leaves), hash_size)
+
+    # Build the Merkle tree, one batch per level
+    for (offset, num_nodes), (parent_offset, num_parents) in zip(levels, levels[1:]):
+        parents = hash_level(tree[offset:offset + num_nodes], hash_func=hash_func)
+        tree[parent_offset:parent_offset + num_parents] = np.frombuffer(parents, dtype=np.uint8).reshape(num_parents, hash_size)
+
+    root_hash = tree[-1].tobytes()
     return root_hash, tree
 
-def get_merkle_proof_row(tree, row_index, total_leaves):
-    proof = []
-    idx = row_index
-    num_leaves = total_leaves
-    offset = 0
-    while num_leaves > 1:
-        sibling_idx = idx ^ 1
-        if sibling_idx < num_leaves:
-            sibling_hash = tree[offset + sibling_idx]
+def peak_rss_mb():
+    """Peak resident set size of the process so far, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def transfer_and_hash_rows(C_torch, hash_func=hashlib.sha256, out=None, block_rows=None, engine=None):
+    """
+    Copy C to host memory in row blocks while worker threads hash the rows already copied.
+
+    Device blocks go through two reusable pinned staging buffers into the destination
+    array, so host RAM never holds more than one copy of C plus two blocks. A CPU tensor
+    is copied block by block into `out` if given, and hashed in place otherwise.
+
+    Args:
+        C_torch (torch.Tensor): Result matrix on any device.
+        hash_func (callable): Hash function of the Merkle tree.
+        out (np.ndarray): Destination float32 array with the shape of C (optional).
+        block_rows (int): Rows per block, at most 64 MB per block by default.
+        engine (HashingEngine): Threads copying and hashing the blocks, the shared engine by default.
+
+    Returns:
+        tuple: (C, leaves) host copy of C and the hash of each of its rows.
+    """
+    n, m = C_torch.shape
+    engine = engine or get_hashing_engine()
+    if block_rows is None:
+        # At most 64 MB per block and at least one block per hashing thread
+        block_rows = min((64 * 1024 * 1024) // max(1, m * C_torch.element_size()), -(-n // engine.num_threads))
+        block_rows = max(1, block_rows)
+    on_cpu = C_torch.device.type == 'cpu'
+    in_place = on_cpu and out is None
+    if in_place:
+        C = C_torch.numpy()
+    elif out is not None:
+        C = out
+    else:
+        C = np.empty((n, m), dtype=np.float32)
+    leaves = [None] * n
+
+    def hash_rows(start, stop):
+        hash_rows_into(C, leaves, start, stop, hash_func)
+
+    futures = []
+    try:
+        if on_cpu:
+            source = C_torch.numpy()
+
+            def copy_and_hash(start, stop):
+                if not in_place:
+                    np.copyto(C[start:stop], source[start:stop])
+                hash_rows(start, stop)
+
+            for start in range(0, n, block_rows):
+                futures.append(engine.submit(copy_and_hash, start, min(start + block_rows, n)))
         else:
-            sibling_hash = tree[offset + idx]  # Duplicate if sibling is missing
-        proof.append(sibling_hash)
+            staging = [torch.empty((block_rows, m), dtype=C_torch.dtype, pin_memory=True) for _ in range(2)]
+            released = [threading.Event() for _ in staging]
+            for event in released:
+                event.set()
+            stream = torch.cuda.current_stream(C_torch.device)
+
+            def drain_and_hash(slot, block, start, stop):
+                try:
+                    np.copyto(C[start:stop], block)
+                finally:
+                    released[slot].set()  # The next transfer may reuse the staging buffer
+                hash_rows(start, stop)
+
+            for block_index, start in enumerate(range(0, n, block_rows)):
+                stop = min(start + block_rows, n)
+                slot = block_index % len(staging)
+                released[slot].wait()
+                released[slot].clear()
+                buffer = staging[slot][:stop - start]
+                buffer.copy_(C_torch[start:stop], non_blocking=True)
+                stream.synchronize()
+                futures.append(engine.submit(drain_and_hash, slot, buffer.numpy(), start, stop))
+    finally:
+        # Also on errors, no task may still use the staging buffers or C when returning
+        for future in futures:
+            future.exception()
+
+    for future in futures:
+        future.result()
+
+    return C, leaves
+
+def cleanup_shm_artifacts(reserve_bytes=0, max_age=SHM_MAX_AGE):
+    """
+    Remove stale artifacts of earlier rounds from ARTIFACTS_DIR.
+
+    Artifacts older than max_age seconds are removed, then the oldest remaining ones
+    until ARTIFACTS_DIR has reserve_bytes free for the next round.
+
+    Returns:
+        int: Number of bytes released.
+    """
+    artifacts = []
+    for pattern in SHM_ARTIFACT_PATTERNS:
+        for path in glob.glob(artifact_path(pattern)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            artifacts.append((stat.st_mtime, stat.st_size, path))
+    artifacts.sort()
+
+    now = time.time()
+    free_bytes = shutil.disk_usage(ARTIFACTS_DIR).free if os.path.isdir(ARTIFACTS_DIR) else 0
+    released = 0
+    for mtime, size, path in artifacts:
+        if now - mtime <= max_age and free_bytes + released >= reserve_bytes:
+            continue
+        try:
+            os.remove(path)
+            released += size
+        except FileNotFoundError:
+            pass
+    return released
+
+def get_merkle_proof_rows(tree, row_indices, total_leaves):
+    """
+    Sibling hashes of several rows, read from the flat tree by array indexing.
+
+    Returns:
+        np.ndarray: (k, depth, hash_size) uint8 array of proofs, leaf level first.
+    """
+    levels = merkle_level_offsets(total_leaves)[:-1]
+    idx = np.asarray(row_indices, dtype=np.int64)
+    node_indices = np.empty((len(idx), len(levels)), dtype=np.int64)
+    for depth, (offset, num_nodes) in enumerate(levels):
+        sibling_idx = idx ^ 1
+        # Duplicate if sibling is missing
+        sibling_idx = np.where(sibling_idx < num_nodes, sibling_idx, idx)
+        node_indices[:, depth] = offset + sibling_idx
         idx = idx // 2
-        offset += num_leaves
-        num_leaves = (num_leaves + 1) // 2
-    return proof
+    return tree[node_indices]
+
+def get_merkle_proof_row(tree, row_index, total_leaves):
+    return [sibling.tobytes() for sibling in get_merkle_proof_rows(tree, [row_index], total_leaves)[0]]
 
 def xorshift32_torch(state):
     state = state.type(torch.int64)
@@ -156,60 +473,136 @@ def xorshift32_torch(state):
     x = x & 0xFFFFFFFF
     return x
 
-def generate_matrix_torch(s, n):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    dtype = torch.int64
-
-    # Prepare indices
-    i_indices = torch.arange(n, dtype=dtype, device=device).repeat_interleave(n)
-    j_indices = torch.arange(n, dtype=dtype, device=device).repeat(n)
+def generate_matrix_torch(s, n, device=None):
+    """
+    Generate the n x n PRNG matrix of seed s.
 
-    # Convert s to signed 64-bit integer
-    s_signed = (s + 2**63) % 2**64 - 2**63
-    s_tensor = torch.tensor(s_signed, dtype=dtype, device=device)
+    The state of element (i, j) only depends on s + i + j, so the 2n - 1 distinct values
+    are generated once and element (i, j) is read from position i + j of that vector.
+    Intermediates are O(n), only the output matrix is O(n^2).
+    """
+    if device is None:
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    dtype = torch.int64
 
-    # Modify the computation to prevent overflow
-    # Since 4294967296 mod 2^32 is 0, we can adjust the computation
-    i_mod = i_indices % (2**32)
-    states = (s_tensor + i_mod + j_indices) & 0xFFFFFFFF
+    # Since 4294967296 mod 2^32 is 0, only the low 32 bits of s matter
+    base = s % (2**32)
+    states = (torch.arange(2 * n - 1, dtype=dtype, device=device) + base) & 0xFFFFFFFF
 
     for _ in range(10):
         states = xorshift32_torch(states)
 
-    matrix = (states.float() / float(0xFFFFFFFF)).reshape(n, n)
+    values = states.float() / float(0xFFFFFFFF)
+    # Row i is the window values[i:i + n], materialized as a contiguous matrix
+    matrix = torch.as_strided(values, (n, n), (1, 1)).contiguous()
     return matrix
 
-def run_benchmark():
+def run_benchmark(warmup=BENCHMARK_WARMUP, iterations=BENCHMARK_ITERATIONS, max_seconds=BENCHMARK_MAX_SECONDS):
+    """
+    Benchmark FP16 and FP32 matrix multiplication on every GPU, one device after another.
+
+    The memory, matrix sizes and times reported are those of the first device, timed alone
+    like the single-device benchmark the GPU fingerprints are calibrated on. The reported
+    time is its first timed run, see BENCHMARK_WARMUP. The other devices run the same
+    sizes afterwards and only add statistics.
+
+    Returns:
+        dict: num_gpus, vram (GB), size and time per precision, and per-device statistics.
+    """
     # Detect number of GPUs
-    num_gpus = torch.cuda.device_count()
+    devices = get_devices()
+    num_gpus = len(devices)
 
     # Estimate available VRAM
-    estimated_vram = estimate_vram_size(buffer_factor=1.0, precision="fp16")
+    estimated_vram = estimate_vram_size(buffer_factor=1.0, precision="fp16", device=devices[0])
 
     # Adjust matrix sizes
     matrix_size_fp16 = adjust_matrix_size(estimated_vram, element_size=2, buffer_factor=1.0)
     matrix_size_fp32 = adjust_matrix_size(estimated_vram, element_size=4, buffer_factor=0.5)
+    if devices[0].type == 'cpu':
+        matrix_size_fp16 = min(matrix_size_fp16, BENCHMARK_CPU_MAX_SIZE)
+        matrix_size_fp32 = min(matrix_size_fp32, BENCHMARK_CPU_MAX_SIZE)
 
     # Run benchmarks
-    elapsed_time_fp16 = benchmark_matrix_multiplication(matrix_size_fp16, precision="fp16")
-    elapsed_time_fp32 = benchmark_matrix_multiplication(matrix_size_fp32, precision="fp32")
+    def benchmark_device(device):
+        free_bytes, total_bytes = get_device_memory(device)
+        return {
+            'device': str(device),
+            'free_gb': free_bytes / 1e9,
+            'total_gb': total_bytes / 1e9,
+            'fp16': benchmark_matrix_multiplication(matrix_size_fp16, "fp16", device, warmup, iterations, max_seconds),
+            'fp32': benchmark_matrix_multiplication(matrix_size_fp32, "fp32", device, warmup, iterations, max_seconds),
+        }
+
+    first_result = benchmark_device(devices[0])
+    device_results = [first_result]
+    for device in devices[1:]:
+        try:
+            device_results.append(benchmark_device(device))
+        except RuntimeError as e:
+            # E.g. out of memory at the sizes of the first device, the details stay incomplete
+            device_results.append({'device': str(device), 'error': str(e)})
+
+    return {
+        'num_gpus': num_gpus,
+        'vram': estimated_vram,
+        'size_fp16': matrix_size_fp16,
+        'time_fp16': first_result['fp16']['first_s'],
+        'size_fp32': matrix_size_fp32,
+        'time_fp32': first_result['fp32']['first_s'],
+        'devices': device_results,
+    }
+
+def benchmark_matrix_multiplication(size, precision="fp16", device=None, warmup=BENCHMARK_WARMUP, iterations=BENCHMARK_ITERATIONS, max_seconds=BENCHMARK_MAX_SECONDS):
+    """
+    Time repeated size x size matrix multiplications on one device after warmup runs.
 
-    # Output results
-    print(f"{num_gpus} {estimated_vram:.2f} {matrix_size_fp16} {elapsed_time_fp16:.6f} {matrix_size_fp32} {elapsed_time_fp32:.6f}")
+    Timed runs stop after `iterations` samples or once `max_seconds` are spent, with
+    at least one sample. Each run is timed between two synchronizations of the device.
 
-def benchmark_matrix_multiplication(size, precision="fp16"):
+    Returns:
+        dict: size, first, median, quartiles, min and max seconds per multiplication and
+        number of samples.
+    """
+    device = device or get_devices()[0]
     dtype = torch.float16 if precision == "fp16" else torch.float32
-    A = torch.randn(size, size, dtype=dtype, device="cuda")
-    B = torch.randn(size, size, dtype=dtype, device="cuda")
-
-    torch.cuda.synchronize()
-    start_time = time.time()
-    torch.matmul(A, B)
-    torch.cuda.synchronize()
-    elapsed_time = time.time() - start_time
-    return elapsed_time
+    A = torch.randn(size, size, dtype=dtype, device=device)
+    B = torch.randn(size, size, dtype=dtype, device=device)
+
+    def timed_matmul():
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        start_time = time.perf_counter()
+        torch.matmul(A, B)
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        return time.perf_counter() - start_time
+
+    for _ in range(warmup):
+        timed_matmul()
+
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < max(1, iterations) and (not samples or time.perf_counter() < deadline):
+        samples.append(timed_matmul())
+
+    del A, B
+    if device.type == 'cuda':
+        torch.cuda.empty_cache()
 
-def process_gpu(gpu_id, s_A, s_B, n):
+    p25, median, p75 = np.percentile(samples, [25, 50, 75])
+    return {
+        'size': size,
+        'first_s': float(samples[0]),
+        'median_s': float(median),
+        'p25_s': float(p25),
+        'p75_s': float(p75),
+        'min_s': float(min(samples)),
+        'max_s': float(max(samples)),
+        'samples': len(samples),
+    }
+
+def process_gpu(gpu_id, s_A, s_B, n, hash_func=hashlib.sha256, artifacts=None, device=None):
     """
     Process computations for a single GPU.
 
@@ -218,14 +611,19 @@ def process_gpu(gpu_id, s_A, s_B, n):
         s_A (int): Seed for matrix A.
         s_B (int): Seed for matrix B.
         n (int): Size of the matrices.
+        hash_func (callable): Hash function of the Merkle tree.
+        artifacts (dict): Keeps C and the Merkle tree in memory instead of ARTIFACTS_DIR (optional).
+        device (torch.device): Device to compute on, cuda:<gpu_id> by default.
 
     Returns:
         tuple: (root_hash_result, gpu_timing_result)
     """
     try:
         # Set the current device
-        torch.cuda.set_device(gpu_id)
-        device = torch.device(f'cuda:{gpu_id}')
+        device = device or torch.device(f'cuda:{gpu_id}')
+        on_cuda = device.type == 'cuda'
+        if on_cuda:
+            torch.cuda.set_device(device)
         
         # Initialize timing dictionary
         gpu_timing = {}
@@ -234,41 +632,52 @@ def process_gpu(gpu_id, s_A, s_B, n):
         start_time_generation = time.time()
 
         # Clear cache before allocation
-        torch.cuda.empty_cache()
+        if on_cuda:
+            torch.cuda.empty_cache()
 
         # Generate A and B matrices
-        A_torch = generate_matrix_torch(s_A, n)
-        B_torch = generate_matrix_torch(s_B, n)
+        A_torch = generate_matrix_torch(s_A, n, device)
+        B_torch = generate_matrix_torch(s_B, n, device)
 
         end_time_generation = time.time()
         generation_time = end_time_generation - start_time_generation
         gpu_timing['generation_time'] = generation_time
+        gpu_timing['generation_peak_rss_mb'] = peak_rss_mb()
         gpu_timing['n'] = n
 
         # Step 3: Compute C on GPU
         start_time_multiplication = time.time()
         C_torch = torch.matmul(A_torch, B_torch)
-        torch.cuda.synchronize(device)  # Ensure computation is finished
+        if on_cuda:
+            torch.cuda.synchronize(device)  # Ensure computation is finished
         end_time_multiplication = time.time()
         multiplication_time = end_time_multiplication - start_time_multiplication
         gpu_timing['multiplication_time'] = multiplication_time
+        gpu_timing['multiplication_peak_rss_mb'] = peak_rss_mb()
         print(f"GPU {gpu_id}: Matrix multiplication time on GPU: {multiplication_time:.2f} seconds")
 
-        # Step 4: Move C back to CPU for Merkle tree construction
+        # Step 4: Move C back to CPU block by block, the leaves of the Merkle tree are hashed on arrival.
+        # Without in-memory artifacts, C is written straight into a memory-mapped file for proof mode.
         start_time_transfer_back = time.time()
-        C = C_torch.cpu().numpy()
+        out = None
+        if artifacts is None:
+            out = np.lib.format.open_memmap(artifact_path(f'C_gpu_{gpu_id}.npy'), mode='w+', dtype=np.float32, shape=(n, n))
+        C, leaves = transfer_and_hash_rows(C_torch, hash_func=hash_func, out=out)
+        del A_torch, B_torch, C_torch
         end_time_transfer_back = time.time()
         transfer_back_time = end_time_transfer_back - start_time_transfer_back
         gpu_timing['transfer_back_time'] = transfer_back_time
+        gpu_timing['transfer_back_peak_rss_mb'] = peak_rss_mb()
         # Optional: Uncomment to log transfer time
         # print(f"GPU {gpu_id}: Data transfer from GPU time: {transfer_back_time:.2f} seconds")
 
-        # Step 5: Construct Merkle tree over rows of C
+        # Step 5: Construct the upper levels of the Merkle tree over rows of C
         start_time_merkle = time.time()
-        root_hash, merkle_tree = build_merkle_tree_rows(C)
+        root_hash, merkle_tree = build_merkle_tree_levels(leaves, hash_func=hash_func)
         end_time_merkle = time.time()
         merkle_tree_time = end_time_merkle - start_time_merkle
         gpu_timing['merkle_tree_time'] = merkle_tree_time
+        gpu_timing['merkle_tree_peak_rss_mb'] = peak_rss_mb()
         # Optional: Uncomment to log Merkle tree construction time and root hash
         # print(f"GPU {gpu_id}: Merkle tree over rows construction time: {merkle_tree_time:.2f} seconds")
         # print(f"GPU {gpu_id}: Root hash: {root_hash.hex()}")
@@ -278,12 +687,16 @@ def process_gpu(gpu_id, s_A, s_B, n):
         gpu_timing_result = (gpu_id, gpu_timing)
 
         # Save Merkle tree and C for later proof generation
-        np.save(f'/dev/shm/merkle_tree_gpu_{gpu_id}.npy', merkle_tree)
-        np.save(f'/dev/shm/C_gpu_{gpu_id}.npy', C)
+        if artifacts is not None:
+            artifacts[gpu_id] = (C, merkle_tree)
+        else:
+            np.save(artifact_path(f'merkle_tree_gpu_{gpu_id}.npy'), merkle_tree)
+            C.flush()
 
         # Free GPU memory
-        del A_torch, B_torch, C_torch, C, merkle_tree
-        torch.cuda.empty_cache()
+        del C, leaves, merkle_tree
+        if on_cuda:
+            torch.cuda.empty_cache()
         gc.collect()
 
         return root_hash_result, gpu_timing_result
@@ -292,97 +705,316 @@ def process_gpu(gpu_id, s_A, s_B, n):
         print(f"Error processing GPU {gpu_id}: {e}")
         return None, None
 
-def run_compute():
+def init_device_worker(num_threads, quiet):
+    """
+    Initialize a device worker process.
+
+    Args:
+        num_threads (int): Torch and hashing threads of the worker, its share of the cores.
+        quiet (bool): Send progress messages to stderr, stdout belongs to the daemon protocol.
+    """
+    global _hashing_engine
+    if quiet:
+        sys.stdout = sys.stderr
+    torch.set_num_threads(num_threads)
+    _hashing_engine = HashingEngine(num_threads)
+
+def process_gpu_worker(gpu_id, device, s_A, s_B, n, hash_algorithm):
+    """
+    Run process_gpu in a device worker process.
+
+    C and the Merkle tree are left in ARTIFACTS_DIR for proof mode, only the root hash and
+    the timings travel back to the parent process.
+    """
+    return process_gpu(gpu_id, s_A, s_B, n, HASH_FUNCTIONS[hash_algorithm], None, torch.device(device))
+
+def worker_pid(delay=0.0):
+    time.sleep(delay)
+    return os.getpid()
+
+_device_workers = None
+
+def get_device_workers(num_devices):
+    """
+    Process pool with one interpreter per device, kept for the lifetime of the script.
+
+    Workers are spawned, CUDA cannot be re-initialized in a forked process.
+    """
+    global _device_workers
+    if _device_workers is not None and _device_workers[0] != num_devices:
+        _device_workers[1].shutdown(wait=True)
+        _device_workers = None
+    if _device_workers is None:
+        num_threads = max(1, (os.cpu_count() or 1) // num_devices)
+        executor = ProcessPoolExecutor(
+            max_workers=num_devices,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_device_worker,
+            initargs=(num_threads, sys.stdout is sys.stderr),
+        )
+        _device_workers = (num_devices, executor)
+    return _device_workers[1]
+
+def start_device_workers(num_devices):
+    """
+    Spawn the device worker processes ahead of compute, importing torch in each
+    worker takes seconds.
+
+    Returns:
+        int: Number of worker processes running.
+    """
+    executor = get_device_workers(num_devices)
+    # Tasks that last a moment occupy every worker, so that all of them get spawned
+    pids = {future.result() for future in [executor.submit(worker_pid, 0.2) for _ in range(num_devices)]}
+    return len(pids)
+
+def run_compute(n, seeds, hash_algorithm, artifacts=None, devices=None, workers='thread'):
     """
     Run compute operations on all available GPUs in parallel.
+
+    Args:
+        n (int): Size of the matrices.
+        seeds (dict): (s_A, s_B) per GPU.
+        hash_algorithm (str): Hash algorithm of the Merkle trees.
+        artifacts (dict): Keeps C and the Merkle trees in memory in thread mode (optional).
+        devices (list): Device of each GPU id, get_devices() by default.
+        workers (str): 'thread' runs the devices on threads of this process, 'process'
+            on one worker process per device, which also parallelizes the hashing.
+
+    Returns:
+        tuple: (root_hashes, gpu_timings) as lists of (gpu_id, value) pairs.
     """
-    if not torch.cuda.is_available():
-        print("Error: No GPU detected.")
-        sys.exit(1)
+    if devices is None:
+        devices = get_devices()
 
     # Detect number of GPUs
-    num_gpus = torch.cuda.device_count()
+    num_gpus = len(devices)
+
+    if hash_algorithm not in HASH_FUNCTIONS:
+        raise RuntimeError(f"Unsupported hash algorithm {hash_algorithm}.")
+    if workers not in ('thread', 'process'):
+        raise RuntimeError(f"Unsupported workers {workers}.")
+    hash_func = HASH_FUNCTIONS[hash_algorithm]
 
-    # Read n and seeds
-    n, seeds = get_seeds()
+    # Make room for the result matrices unless they stay in memory
+    use_files = artifacts is None or workers == 'process'
+    reserve_bytes = num_gpus * n * n * 4 if use_files else 0
+    cleanup_shm_artifacts(reserve_bytes=reserve_bytes)
 
     # Initialize lists to store root hashes and timings per GPU
     root_hashes = []
     gpu_timings = []
 
-    # Use ThreadPoolExecutor to parallelize GPU tasks
-    with ThreadPoolExecutor(max_workers=num_gpus) as executor:
+    if workers == 'process':
+        executor = get_device_workers(num_gpus)
+        futures = [
+            executor.submit(process_gpu_worker, gpu_id, str(device), *seeds[gpu_id], n, hash_algorithm)
+            for gpu_id, device in enumerate(devices)
+        ]
+    else:
+        # Use ThreadPoolExecutor to parallelize GPU tasks
+        executor = ThreadPoolExecutor(max_workers=num_gpus)
         # Submit tasks for each GPU
         futures = []
-        for gpu_id in range(num_gpus):
+        for gpu_id, device in enumerate(devices):
             s_A, s_B = seeds[gpu_id]
-            futures.append(executor.submit(process_gpu, gpu_id, s_A, s_B, n))
-        
+            futures.append(executor.submit(process_gpu, gpu_id, s_A, s_B, n, hash_func, artifacts, device))
+
+    try:
         for future in as_completed(futures):
             root_hash_result, gpu_timing_result = future.result()
             if root_hash_result:
                 root_hashes.append(root_hash_result)
             if gpu_timing_result:
                 gpu_timings.append(gpu_timing_result)
+    finally:
+        if workers == 'thread':
+            executor.shutdown(wait=True)
 
-    # Output root hashes and timings
-    print(f"Root hashes: {json.dumps(root_hashes)}")
-    print(f"Timings: {json.dumps(gpu_timings)}")
+    return root_hashes, gpu_timings
 
-def run_proof_gpu(gpu_id, indices, num_gpus):
+def pack_proof_response(gpu_id, gpu_indices, rows, proofs):
+    """
+    Pack the challenged rows and Merkle proofs of one GPU into a binary frame.
+
+    Args:
+        proofs (np.ndarray): (k, depth, hash_size) uint8 array from get_merkle_proof_rows.
+    """
+    k, depth, hash_size = proofs.shape
+    n = rows.shape[1] if k > 0 else 0
+    parts = [
+        struct.pack('<IIIII', gpu_id, k, n, depth, hash_size),
+        np.asarray(gpu_indices, dtype='<u4').tobytes(),
+        np.ascontiguousarray(rows, dtype='<f4').tobytes(),
+        np.ascontiguousarray(proofs, dtype=np.uint8).tobytes(),
+    ]
+    return b''.join(parts)
+
+def run_proof_gpu(gpu_id, indices, num_gpus, artifacts=None, device=None):
     # Set the GPU device
-    torch.cuda.set_device(gpu_id)
-    
+    if device is not None and device.type == 'cuda':
+        torch.cuda.set_device(device)
+
     # Load data for the specific GPU
     gpu_indices = indices[gpu_id]
-    merkle_tree = np.load(f'/dev/shm/merkle_tree_gpu_{gpu_id}.npy', allow_pickle=True)
-    C = np.load(f'/dev/shm/C_gpu_{gpu_id}.npy')
+    if artifacts is not None and gpu_id in artifacts:
+        C, merkle_tree = artifacts[gpu_id]
+    else:
+        # Only the challenged rows and their proof nodes are read from the files
+        merkle_tree = np.load(artifact_path(f'merkle_tree_gpu_{gpu_id}.npy'), mmap_mode='r')
+        C = np.load(artifact_path(f'C_gpu_{gpu_id}.npy'), mmap_mode='r')
     
     # Start proof generation
     start_time_proof = time.time()
-    responses = {'rows': [], 'proofs': [], 'indices': gpu_indices}
     total_leaves = C.shape[0]
-    
-    for idx, (i, j) in enumerate(gpu_indices):
-        row = C[i, :]
-        proof = get_merkle_proof_row(merkle_tree, i, total_leaves)
-        responses['rows'].append(row)
-        responses['proofs'].append(proof)
+    row_indices = [i for i, _ in gpu_indices]
+    rows = C[row_indices, :]
+    proofs = get_merkle_proof_rows(merkle_tree, row_indices, total_leaves)
+    frame = pack_proof_response(gpu_id, gpu_indices, rows, proofs)
     
     end_time_proof = time.time()
     proof_time = end_time_proof - start_time_proof
     print(f"GPU {gpu_id}: Proof generation time: {proof_time:.2f} seconds")
     
-    # Save responses to shared memory
-    np.save(f'/dev/shm/responses_gpu_{gpu_id}.npy', responses)
+    return frame
 
-def run_proof():
-    # Get the challenge indices
-    indices = get_challenge_indices()
-    num_gpus = torch.cuda.device_count()
+def run_proof(indices, artifacts=None, devices=None):
+    """
+    Generate the proofs of all GPUs.
+
+    Returns:
+        bytes: Binary proof responses, see RESPONSES_FILE.
+    """
+    if devices is None:
+        devices = get_devices()
+    num_gpus = len(devices)
     
     # Use ThreadPoolExecutor for parallel GPU processing
     with ThreadPoolExecutor(max_workers=num_gpus) as executor:
         futures = [
-            executor.submit(run_proof_gpu, gpu_id, indices, num_gpus)
-            for gpu_id in range(num_gpus)
+            executor.submit(run_proof_gpu, gpu_id, indices, num_gpus, artifacts, device)
+            for gpu_id, device in enumerate(devices)
         ]
         # Wait for all threads to complete
-        for future in futures:
-            future.result()  # To raise any exceptions that occurred in the threads
+        frames = [future.result() for future in futures]  # To raise any exceptions that occurred in the threads
+
+    header = struct.pack('<4sHH', RESPONSES_MAGIC, RESPONSES_VERSION, len(frames))
+    return header + b''.join(frames)
+
+def get_script_hash():
+    """SHA-256 digest of this script, checked by the validator against its own copy."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def handle_command(command, artifacts, script_hash=None):
+    """
+    Execute one daemon command.
+
+    Returns:
+        JSON serializable result of the command.
+    """
+    cmd = command.get('cmd')
+    if cmd == 'gpu_info':
+        return {**get_gpu_info(), 'script_hash': script_hash}
+    if cmd == 'benchmark':
+        return run_benchmark(
+            warmup=command.get('warmup', BENCHMARK_WARMUP),
+            iterations=command.get('iterations', BENCHMARK_ITERATIONS),
+            max_seconds=command.get('max_seconds', BENCHMARK_MAX_SECONDS),
+        )
+    if cmd == 'compute':
+        seeds = {int(gpu_id): tuple(seed) for gpu_id, seed in command['seeds'].items()}
+        # Results of a previous compute command are replaced
+        artifacts.clear()
+        gc.collect()
+        root_hashes, gpu_timings = run_compute(
+            command['n'], seeds, command.get('hash_algorithm', 'sha256'), artifacts, workers=command.get('workers', 'thread')
+        )
+        return {'root_hashes': root_hashes, 'timings': gpu_timings}
+    if cmd == 'start_workers':
+        return start_device_workers(command.get('num_devices', len(get_devices())))
+    if cmd == 'proof':
+        indices = {int(gpu_id): [tuple(idx) for idx in idx_list] for gpu_id, idx_list in command['indices'].items()}
+        start_time = time.perf_counter()
+        data = run_proof(indices, artifacts)
+        proof_time = time.perf_counter() - start_time
+        return {'responses': base64.b64encode(data).decode('ascii'), 'proof_time': proof_time}
+    raise ValueError(f"Unknown command {cmd}")
+
+def run_daemon():
+    """
+    Serve JSON-line commands on stdin until 'exit' or the end of input.
+
+    Every command is answered with one JSON line {"ok": ..., "result"/"error": ...} on
+    stdout. Matrices and Merkle trees stay in memory between compute and proof. The
+    gpu_info reply carries the digest of the script for the validator's integrity check.
+    """
+    # Keep stdout for the protocol, progress messages go to stderr
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+    artifacts = {}
+    # Digest of the code this process runs, reported with the GPU info
+    script_hash = get_script_hash()
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            command = json.loads(line)
+            if command.get('cmd') == 'exit':
+                break
+            reply = {'ok': True, 'result': handle_command(command, artifacts, script_hash)}
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        protocol.write(json.dumps(reply) + '\n')
+        protocol.flush()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Miner script for GPU proof.')
     parser.add_argument('--mode', type=str, default='benchmark', 
-                        choices=['benchmark', 'compute', 'proof', 'gpu_info'],
-                        help='Mode to run: benchmark, compute, proof, or gpu_info')
+                        choices=['benchmark', 'compute', 'proof', 'gpu_info', 'daemon'],
+                        help='Mode to run: benchmark, compute, proof, gpu_info, or daemon')
+    parser.add_argument('--workers', type=str, default='thread', choices=['thread', 'process'],
+                        help='Compute mode: run the GPUs on threads or on one worker process each')
+    parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP, help='Benchmark warmup runs per precision')
+    parser.add_argument('--iterations', type=int, default=BENCHMARK_ITERATIONS, help='Benchmark timed runs per precision')
+    parser.add_argument('--max-seconds', type=float, default=BENCHMARK_MAX_SECONDS, help='Benchmark time budget per precision')
+    parser.add_argument('--device', type=str, default=None, choices=['auto', 'cuda', 'cpu'],
+                        help='Run every mode on CUDA or on virtual GPUs backed by the CPU (default: POG_DEVICE or cuda)')
+    parser.add_argument('--virtual-gpus', type=int, default=None, help='Number of virtual GPUs in CPU mode (default: POG_VIRTUAL_GPUS or 1)')
+    parser.add_argument('--virtual-vram', type=float, default=None, help='Memory of each virtual GPU in GB (default: POG_VIRTUAL_VRAM or a share of the RAM)')
+    parser.add_argument('--artifacts-dir', type=str, default=None, help='Directory of C, the Merkle trees and the responses (default: POG_ARTIFACTS_DIR or /dev/shm)')
     args = parser.parse_args()
+    configure_devices(args.device, args.virtual_gpus, args.virtual_vram, args.artifacts_dir)
 
     if args.mode == 'benchmark':
-        run_benchmark()
+        try:
+            result = run_benchmark(warmup=args.warmup, iterations=args.iterations, max_seconds=args.max_seconds)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"{result['num_gpus']} {result['vram']:.2f} {result['size_fp16']} {result['time_fp16']:.6f} {result['size_fp32']} {result['time_fp32']:.6f}")
     elif args.mode == 'compute':
-        run_compute()
+        # Read n and seeds
+        n, seeds, hash_algorithm = get_seeds()
+        try:
+            root_hashes, gpu_timings = run_compute(n, seeds, hash_algorithm, workers=args.workers)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        # Output root hashes and timings
+        print(f"Root hashes: {json.dumps(root_hashes)}")
+        print(f"Timings: {json.dumps(gpu_timings)}")
     elif args.mode == 'proof':
-        run_proof()
+        # Save all responses in a single file, streamed to the validator over one channel
+        data = run_proof(get_challenge_indices())
+        with open(artifact_path(RESPONSES_FILE), 'wb') as f:
+            f.write(data)
     elif args.mode == 'gpu_info':
-        get_gpu_info()
+        print(json.dumps(get_gpu_info(), indent=2))
+    elif args.mode == 'daemon':
+        run_daemon()
@@ -1,30 +1,175 @@
 import paramiko
+import base64
 import hashlib
 import numpy as np
 import os
+import socket
 import time
-import blake3
 import secrets  # For secure random seed generation
+import shlex
 import json
-import tempfile
 import yaml
+from contextlib import contextmanager
 import torch
 import bittensor as bt
 
+from neurons.Validator.pog_verify import (
+    HASH_FUNCTIONS,
+    get_required_passes,
+    parse_proof_responses,
+    verify_gpu_response,
+    verify_merkle_proof_row,
+)
+
+def select_hash_algorithm(configured, supported):
+    """
+    Negotiate the Merkle tree hash algorithm of a PoG session.
+
+    Parameters:
+        configured (str): merkle_proof.hash_algorithm from config.yaml.
+        supported (list): Hash algorithms reported by the miner script.
+
+    Returns:
+        str: The configured algorithm if both ends support it, sha256 otherwise.
+    """
+    if configured in HASH_FUNCTIONS and configured in supported:
+        return configured
+    if configured not in HASH_FUNCTIONS:
+        bt.logging.warning(f"Unknown hash algorithm {configured} in config, falling back to sha256.")
+    return "sha256"
+
+# Parsed config files and their GPU fingerprint index, keyed by path: (mtime_ns, data, index)
+_config_cache = {}
+
 def load_yaml_config(file_path):
     """
     Load GPU performance data from a YAML file.
+
+    The parsed data and its GPU fingerprint index are cached until the file changes on disk.
     """
     try:
+        mtime = os.stat(file_path).st_mtime_ns
+        cached = _config_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         with open(file_path, "r") as f:
             data = yaml.safe_load(f)
+        gpu_data = (data or {}).get("gpu_performance")
+        index = GpuFingerprintIndex(gpu_data) if gpu_data else None
+        _config_cache[file_path] = (mtime, data, index)
         return data
     except FileNotFoundError:
         raise FileNotFoundError(f"The file {file_path} does not exist.")
     except yaml.YAMLError as e:
         raise ValueError(f"Error decoding YAML file {file_path}: {e}")
 
-def identify_gpu(fp16_tflops, fp32_tflops, estimated_avram, gpu_data, reported_name=None, tolerance_pairs=None):
+def get_gpu_fingerprint_index(file_path):
+    """
+    Return the GPU fingerprint index of a config file, rebuilt if the file changed on disk.
+    """
+    load_yaml_config(file_path)
+    return _config_cache[file_path][2]
+
+def apply_tolerance_pairs(identified_gpu, reported_name, tolerance_pairs):
+    """
+    Prefer the reported GPU name when it and the identified GPU form a tolerance pair.
+    """
+    if reported_name:
+        # Check if identified GPU matches the tolerance pair
+        if identified_gpu in tolerance_pairs and reported_name == tolerance_pairs.get(identified_gpu):
+            bt.logging.trace(f"[Tolerance Adjustment] Detected GPU {identified_gpu} matches reported GPU {reported_name}.")
+            identified_gpu = reported_name
+        # Check if reported GPU matches the tolerance pair in reverse
+        elif reported_name in tolerance_pairs and identified_gpu == tolerance_pairs.get(reported_name):
+            bt.logging.trace(f"[Tolerance Adjustment] Reported GPU {reported_name} matches detected GPU {identified_gpu}.")
+            identified_gpu = reported_name
+    return identified_gpu
+
+class GpuFingerprintIndex:
+    """
+    Theoretical FP16 TFLOPS, FP32 TFLOPS and AVRAM of every known GPU model as one NumPy matrix.
+
+    A GPU is identified as the model with the lowest mean relative deviation from its measured
+    performance vector, the gap to the runner-up is returned as the confidence margin.
+    """
+
+    def __init__(self, gpu_data):
+        self.names = list(gpu_data["GPU_TFLOPS_FP16"].keys())
+        self.fingerprints = np.array(
+            [
+                [gpu_data["GPU_TFLOPS_FP16"][gpu], gpu_data["GPU_TFLOPS_FP32"][gpu], gpu_data["GPU_AVRAM"][gpu]]
+                for gpu in self.names
+            ],
+            dtype=np.float64,
+        )
+        self.tolerance_pairs = dict(gpu_data.get("gpu_tolerance_pairs") or {})
+
+    def deviations(self, measurements):
+        """
+        :param measurements: (b, 3) array of measured FP16 TFLOPS, FP32 TFLOPS and AVRAM in GB.
+        :return: (b, num_models) array of mean relative deviations.
+        """
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 1, 3)
+        return (np.abs(measurements - self.fingerprints) / self.fingerprints).mean(axis=2)
+
+    def identify_batch(self, measurements, reported_names=None, tolerance_pairs=None):
+        """
+        Identify a batch of GPUs.
+
+        Parameters:
+            measurements: (b, 3) array of measured FP16 TFLOPS, FP32 TFLOPS and AVRAM in GB.
+            reported_names (list): GPU names reported by the systems (optional).
+            tolerance_pairs (dict): Overrides the tolerance pairs of the config (optional).
+
+        Returns:
+            list: (gpu_name, margin) per measurement.
+        """
+        tolerance_pairs = self.tolerance_pairs if tolerance_pairs is None else tolerance_pairs
+        deviations = self.deviations(measurements)
+        best = np.argmin(deviations, axis=1)
+        if len(self.names) > 1:
+            closest = np.partition(deviations, 1, axis=1)
+            margins = closest[:, 1] - closest[:, 0]
+        else:
+            margins = np.full(len(deviations), np.inf)
+
+        reported_names = reported_names if reported_names is not None else [None] * len(deviations)
+        return [
+            (apply_tolerance_pairs(self.names[i], reported_name, tolerance_pairs), float(margin))
+            for i, margin, reported_name in zip(best, margins, reported_names)
+        ]
+
+    def candidates(self, fp16_tflops, fp32_tflops, estimated_avram, reported_name=None, slack=0.0, tolerance_pairs=None):
+        """
+        Models the GPU could be, given the measurement noise.
+
+        Parameters:
+            slack (float): Models whose mean relative deviation is within slack of the best
+                match are candidates as well.
+
+        Returns:
+            list: Candidate GPU names, best match first.
+        """
+        tolerance_pairs = self.tolerance_pairs if tolerance_pairs is None else tolerance_pairs
+        deviations = self.deviations([[fp16_tflops, fp32_tflops, estimated_avram]])[0]
+        order = np.argsort(deviations)
+        names = []
+        for i in order[deviations[order] <= deviations[order[0]] + slack]:
+            name = apply_tolerance_pairs(self.names[i], reported_name, tolerance_pairs)
+            if name not in names:
+                names.append(name)
+        return names
+
+    def identify(self, fp16_tflops, fp32_tflops, estimated_avram, reported_name=None, tolerance_pairs=None):
+        """
+        Identify a single GPU.
+
+        Returns:
+            tuple: (gpu_name, margin)
+        """
+        return self.identify_batch([[fp16_tflops, fp32_tflops, estimated_avram]], [reported_name], tolerance_pairs)[0]
+
+def identify_gpu(fp16_tflops, fp32_tflops, estimated_avram, gpu_data, reported_name=None, tolerance_pairs=None, index=None):
     """
     Identify GPU based on TFLOPS and AVRAM with a tolerance check for GPUs with similar fingerprints.
 
@@ -34,116 +179,65 @@ def identify_gpu(fp16_tflops, fp32_tflops, estimated_avram, gpu_data, reported_n
         estimated_avram (float): Estimated available VRAM in GB.
         reported_name (str): GPU name reported by the system (optional).
         tolerance_pairs (dict): Dictionary of GPUs with similar performance to apply tolerance adjustments.
+        index (GpuFingerprintIndex): Prebuilt index of gpu_data (optional).
 
     Returns:
         str: Identified GPU name with tolerance handling.
     """
-    tolerance_pairs = tolerance_pairs or {}  # Default to empty dict if not provided
-    GPU_TFLOPS_FP16 = gpu_data["GPU_TFLOPS_FP16"]
-    GPU_TFLOPS_FP32 = gpu_data["GPU_TFLOPS_FP32"]
-    GPU_AVRAM = gpu_data["GPU_AVRAM"]
+    index = index or GpuFingerprintIndex(gpu_data)
+    identified_gpu, _ = index.identify(fp16_tflops, fp32_tflops, estimated_avram, reported_name, tolerance_pairs or {})
+    return identified_gpu
 
-    combined_scores = []
-    for gpu in GPU_TFLOPS_FP16.keys():
-        fp16_theoretical = GPU_TFLOPS_FP16[gpu]
-        fp32_theoretical = GPU_TFLOPS_FP32[gpu]
-        avram_theoretical = GPU_AVRAM[gpu]
+class StageTimer:
+    """
+    Wall time spent in each stage of one PoG test, in seconds.
+    """
 
-        fp16_deviation = abs(fp16_tflops - fp16_theoretical) / fp16_theoretical
-        fp32_deviation = abs(fp32_tflops - fp32_theoretical) / fp32_theoretical
-        avram_deviation = abs(estimated_avram - avram_theoretical) / avram_theoretical
+    def __init__(self):
+        self.durations = {}
 
-        combined_score = (fp16_deviation + fp32_deviation + avram_deviation) / 3
-        combined_scores.append((gpu, combined_score))
-    
-    # Sort by the lowest deviation
-    identified_gpu = sorted(combined_scores, key=lambda x: x[1])[0][0]
+    @contextmanager
+    def stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
 
-    # Tolerance handling for nearly identical GPUs
-    if reported_name:
-        # Check if identified GPU matches the tolerance pair
-        if identified_gpu in tolerance_pairs and reported_name == tolerance_pairs.get(identified_gpu):
-            bt.logging.trace(f"[Tolerance Adjustment] Detected GPU {identified_gpu} matches reported GPU {reported_name}.")
-            identified_gpu = reported_name
-        # Check if reported GPU matches the tolerance pair in reverse
-        elif reported_name in tolerance_pairs and identified_gpu == tolerance_pairs.get(reported_name):
-            bt.logging.trace(f"[Tolerance Adjustment] Reported GPU {reported_name} matches detected GPU {identified_gpu}.")
-            identified_gpu = reported_name
-
-    return identified_gpu
+    def add(self, name, seconds):
+        # Repeated stages, e.g. a second upload, add up
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
 
 def compute_script_hash(script_path):
     with open(script_path, "rb") as f:
         return hashlib.sha256(f.read()).hexdigest()
 
-def send_script_and_request_hash(ssh_client, script_path):
+def upload_script(ssh_client, script_path, remote_path="/tmp/miner_script.py", timeout=None):
     sftp = ssh_client.open_sftp()
-    sftp.put(script_path, "/tmp/miner_script.py")
-    sftp.close()
-
-    # Command to compute the hash on the remote server
-    hash_command = """
-    /opt/conda/bin/python -c "
-import hashlib
-with open('/tmp/miner_script.py', 'rb') as f:
-    computed_hash = hashlib.sha256(f.read()).hexdigest()
-print(computed_hash)
-"
-    """
-    stdin, stdout, stderr = ssh_client.exec_command(hash_command)
-    computed_hash = stdout.read().decode().strip()
-    hash_error = stderr.read().decode().strip()
-
-    if hash_error:
-        raise RuntimeError(f"Hash computation failed: {hash_error}")
-    return computed_hash
-
-def execute_script_on_miner(ssh_client, mode):
-    execution_command = f"/opt/conda/bin/python /tmp/miner_script.py --mode {mode}"
-    stdin, stdout, stderr = ssh_client.exec_command(execution_command)
-    execution_output = stdout.read().decode().strip()
-    execution_error = stderr.read().decode().strip()
-
-    if execution_error:
-        raise RuntimeError(f"Script execution failed: {execution_error}")
-    return execution_output
-
-def parse_benchmark_output(output):
-    try:
-        parts = output.strip().split()
-        num_gpus = int(parts[0])  # First value is the number of GPUs
-        vram = float(parts[1])
-        size_fp16 = int(parts[2])
-        time_fp16 = float(parts[3])
-        size_fp32 = int(parts[4])
-        time_fp32 = float(parts[5])
-        return num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32
-    except (ValueError, IndexError) as e:
-        raise ValueError(f"Failed to parse execution output: {output}") from e
-
-def parse_merkle_output(output):
     try:
-        lines = output.strip().split('\n')
-        root_hashes_line = None
-        timings_line = None
-        for line in lines:
-            if line.startswith('Root hashes:'):
-                root_hashes_line = line
-            elif line.startswith('Timings:'):
-                timings_line = line
-        if root_hashes_line is None or timings_line is None:
-            raise ValueError("Output does not contain root hashes or timings")
-        # Parse root hashes
-        root_hashes_str = root_hashes_line.split(': ', 1)[1]
-        root_hashes = json.loads(root_hashes_str)  # List of tuples (gpu_id, root_hash)
-
-        # Parse timings
-        timings_str = timings_line.split(': ', 1)[1]
-        gpu_timings = json.loads(timings_str)  # List of tuples (gpu_id, timings_dict)
-
-        return root_hashes, gpu_timings
-    except (ValueError, IndexError, json.JSONDecodeError) as e:
-        raise ValueError(f"Failed to parse execution output: {output}") from e
+        # Every read and write of the transfer raises socket.timeout after timeout seconds
+        sftp.get_channel().settimeout(timeout)
+        sftp.put(script_path, remote_path)
+    finally:
+        sftp.close()
+
+def get_remote_script_hash(ssh_client, remote_path="/tmp/miner_script.py", timeout=None):
+    """
+    :return: SHA-256 hex digest of the script on the miner, None if it is missing or unreadable.
+    """
+    _, stdout, _ = ssh_client.exec_command(f"sha256sum {shlex.quote(remote_path)}", timeout=timeout)
+    output = stdout.read().decode(errors="replace").split()
+    if stdout.channel.recv_exit_status() != 0 or not output:
+        return None
+    return output[0]
+
+def remaining_time(deadline):
+    """
+    :return: Seconds left until the time.monotonic() deadline, None without deadline.
+    """
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.001)
 
 def get_random_seeds(num_gpus):
     seeds = {}
@@ -153,134 +247,26 @@ def get_random_seeds(num_gpus):
         seeds[gpu_id] = (s_A, s_B)
     return seeds
 
-def send_seeds(ssh_client, seeds, n):
-    lines = [str(n)]  # First line is n
-    for gpu_id in seeds.keys():
-        s_A, s_B = seeds[gpu_id]
-        line = f"{gpu_id} {s_A} {s_B}"
-        lines.append(line)
-    content = '\n'.join(lines)
-    command = f"echo '{content}' > /tmp/seeds.txt"
-    stdin, stdout, stderr = ssh_client.exec_command(command)
-    stdout.channel.recv_exit_status()
-
-def send_challenge_indices(ssh_client, indices):
-    lines = []
-    for gpu_id in indices.keys():
-        idx_list = indices[gpu_id]
-        indices_str = ';'.join([f"{i},{j}" for i, j in idx_list])
-        line = f"{gpu_id} {indices_str}"
-        lines.append(line)
-    content = '\n'.join(lines)
-    command = f"echo '{content}' > /tmp/challenge_indices.txt"
-    stdin, stdout, stderr = ssh_client.exec_command(command)
-    stdout.channel.recv_exit_status()
-
-def receive_responses(ssh_client, num_gpus):
-    responses = {}
-    try:
-        with ssh_client.open_sftp() as sftp, tempfile.TemporaryDirectory() as temp_dir:
-            for gpu_id in range(num_gpus):
-                remote_path = f'/dev/shm/responses_gpu_{gpu_id}.npy'
-                local_path = f'{temp_dir}/responses_gpu_{gpu_id}.npy'
-                
-                try:
-                    sftp.get(remote_path, local_path)
-                    response = np.load(local_path, allow_pickle=True)
-                    responses[gpu_id] = response.item()
-                except Exception as e:
-                    print(f"Error processing GPU {gpu_id}: {e}")
-                    responses[gpu_id] = None
-    except Exception as e:
-        print(f"SFTP connection error: {e}")
-    
-    return responses
-
-def xorshift32_numpy(state):
-    state = np.uint64(state)
-    x = state & np.uint64(0xFFFFFFFF)
-    x ^= (np.uint64((x << np.uint64(13)) & np.uint64(0xFFFFFFFF)))
-    x ^= (np.uint64((x >> np.uint64(17)) & np.uint64(0xFFFFFFFF)))
-    x ^= (np.uint64((x << np.uint64(5)) & np.uint64(0xFFFFFFFF)))
-    x = x & np.uint64(0xFFFFFFFF)
-    return x
-
-def generate_prng_value(s, i, j):
-    s = np.uint64(s)
-    i = np.uint64(i % np.uint64(2**32))
-    j = np.uint64(j)
-    state = (s + i + j) & np.uint64(0xFFFFFFFF)
-
-    for _ in range(10):
-        state = xorshift32_numpy(state)
-
-    return state / float(0xFFFFFFFF)
-
-def verify_responses(seeds, root_hashes, responses, indices, n):
+def evaluate_verification_results(gpu_results):
     """
-    Verifies the responses from GPUs by checking computed values and Merkle proofs.
+    Applies the required passes threshold to the per-GPU verification results.
 
     Parameters:
-        seeds (dict): Seeds used for generating PRNG values for each GPU.
-        root_hashes (dict): Merkle root hashes for each GPU.
-        responses (dict): Responses from each GPU containing computed rows and proofs.
-        indices (dict): Challenge indices for each GPU.
-        n (int): Total number of leaves in the Merkle tree.
+        gpu_results (dict): (passed, reason) tuple for each GPU, as returned by verify_gpu_response.
 
     Returns:
         bool: True if verification passes within the allowed failure threshold, False otherwise.
     """
-    verification_passed = True
     failed_gpus = []
-    num_gpus = len(root_hashes.keys())
+    num_gpus = len(gpu_results)
 
     # Define the minimum number of GPUs that must pass verification
-    if num_gpus == 4:
-        required_passes = 3
-    elif num_gpus > 4:
-        # For systems with more than 4 GPUs, adjust the required_passes as needed
-        # Example: Require at least 75% to pass
-        required_passes = int(np.ceil(0.75 * num_gpus))
-    else:
-        # For systems with 2 or fewer GPUs, require all to pass
-        required_passes = num_gpus
+    required_passes = get_required_passes(num_gpus)
 
-    for gpu_id in root_hashes.keys():
-        s_A, s_B = seeds[gpu_id]
-        gpu_indices = indices[gpu_id]
-        response = responses[gpu_id]
-        root_hash = root_hashes[gpu_id]
-        total_leaves = n
-
-        gpu_failed = False  # Flag to track if the current GPU has failed
-
-        for idx, (i, j) in enumerate(gpu_indices):
-            # Generate only the necessary row and column entries using PRNG
-            A_row = np.array([generate_prng_value(s_A, i, col) for col in range(n)], dtype=np.float32)
-            B_col = np.array([generate_prng_value(s_B, row, j) for row in range(n)], dtype=np.float32)
-
-            # Compute C_{i,j} as the dot product of A_row and B_col
-            value_validator = np.dot(A_row, B_col)
-
-            # Retrieve miner's computed value and corresponding Merkle proof
-            row_miner = response['rows'][idx]
-            proof = response['proofs'][idx]
-            value_miner = row_miner[j]
-
-            # Check if the miner's value matches the expected value
-            if not np.isclose(value_miner, value_validator, atol=1e-5):
-                bt.logging.trace(f"[Verification] GPU {gpu_id}: Value mismatch at index ({i}, {j}).")
-                gpu_failed = True
-                break  # Exit the loop for this GPU as it has already failed
-
-            # Verify the Merkle proof for the row
-            if not verify_merkle_proof_row(row_miner, proof, bytes.fromhex(root_hash), i, total_leaves):
-                bt.logging.trace(f"[Verification] GPU {gpu_id}: Invalid Merkle proof at index ({i}).")
-                gpu_failed = True
-                break  # Exit the loop for this GPU as it has already failed
-
-        if gpu_failed:
+    for gpu_id, (passed, reason) in gpu_results.items():
+        if not passed:
             failed_gpus.append(gpu_id)
+            bt.logging.trace(f"[Verification] GPU {gpu_id}: {reason}")
             bt.logging.trace(f"[Verification] GPU {gpu_id} failed verification.")
         else:
             bt.logging.trace(f"[Verification] GPU {gpu_id} passed verification.")
@@ -302,41 +288,30 @@ def verify_responses(seeds, root_hashes, responses, indices, n):
 
     return verification_passed
 
-def verify_merkle_proof_row(row, proof, root_hash, index, total_leaves, hash_func=hashlib.sha256):
+def verify_responses(seeds, root_hashes, responses, indices, n, hash_algorithm="sha256", row_check_vectors=0, row_check_rtol=1e-5):
     """
-    Verifies a Merkle proof for a given row.
+    Verifies the responses from GPUs by checking computed values and Merkle proofs.
 
     Parameters:
-    - row (np.ndarray): The data row to verify.
-    - proof (list of bytes): The list of sibling hashes required for verification.
-    - root_hash (bytes): The root hash of the Merkle tree.
-    - index (int): The index of the row in the tree.
-    - total_leaves (int): The total number of leaves in the Merkle tree.
-    - hash_func (callable): The hash function to use (default: hashlib.sha256).
+        seeds (dict): Seeds used for generating PRNG values for each GPU.
+        root_hashes (dict): Merkle root hashes for each GPU.
+        responses (dict): Responses from each GPU containing computed rows and proofs.
+        indices (dict): Challenge indices for each GPU.
+        n (int): Total number of leaves in the Merkle tree.
+        hash_algorithm (str): Hash algorithm of the Merkle tree, a key of HASH_FUNCTIONS.
+        row_check_vectors (int): Random vectors of the whole-row check, 0 disables it.
+        row_check_rtol (float): Relative tolerance of the whole-row check.
 
     Returns:
-    - bool: True if the proof is valid, False otherwise.
-    """
-    # Initialize the computed hash with the hash of the row using the specified hash function
-    computed_hash = hash_func(row.tobytes()).digest()
-    idx = index
-    num_leaves = total_leaves
-    
-    # Iterate through each sibling hash in the proof
-    for sibling_hash in proof:
-        if idx % 2 == 0:
-            # If the current index is even, concatenate computed_hash + sibling_hash
-            combined = computed_hash + sibling_hash
-        else:
-            # If the current index is odd, concatenate sibling_hash + computed_hash
-            combined = sibling_hash + computed_hash
-        # Compute the new hash using the specified hash function
-        computed_hash = hash_func(combined).digest()
-        # Move up to the next level
-        idx = idx // 2
-    
-    # Compare the computed hash with the provided root hash
-    return computed_hash == root_hash
+        bool: True if verification passes within the allowed failure threshold, False otherwise.
+    """
+    gpu_results = {}
+    for gpu_id in root_hashes.keys():
+        gpu_results[gpu_id] = verify_gpu_response(
+            seeds[gpu_id], root_hashes[gpu_id], responses[gpu_id], indices[gpu_id], n, hash_algorithm,
+            row_check_vectors, row_check_rtol,
+        )
+    return evaluate_verification_results(gpu_results)
 
 def adjust_matrix_size(vram, element_size=2, buffer_factor=0.8):
     usable_vram = vram * buffer_factor * 1e9  # Usable VRAM in bytes
@@ -344,23 +319,217 @@ def adjust_matrix_size(vram, element_size=2, buffer_factor=0.8):
     aligned_size = (max_size // 32) * 32  # Ensure alignment to multiple of 32
     return aligned_size
 
-def get_remote_gpu_info(ssh_client):
+class MinerScriptProtocolError(RuntimeError):
+    """
+    Reply of the miner script that is not a JSON object of the daemon protocol, e.g. garbled
+    output or an outdated script.
     """
-    Execute the miner script in gpu_info mode to get GPU information from the remote miner.
 
-    Args:
-        ssh_client (paramiko.SSHClient): SSH client connected to the miner.
+class MinerScriptTimeout(TimeoutError):
+    """
+    Request of a miner script session still unanswered at the session's deadline.
+    """
 
-    Returns:
-        dict: Dictionary containing GPU information (number and names).
+class ScriptIntegrityError(Exception):
+    """
+    Digest of the running miner script differs from the local one.
+    """
+
+class MinerScriptSession:
+    """
+    Miner script running in daemon mode behind a single SSH channel.
+
+    Commands and replies are JSON lines on the channel's stdin and stdout, so torch and
+    the CUDA contexts are initialized once and C and the Merkle trees stay in the miner's
+    memory between the compute and proof phases. With a deadline, a request still waiting
+    for its reply at the deadline raises MinerScriptTimeout.
     """
-    command = "/opt/conda/bin/python /tmp/miner_script.py --mode gpu_info"
-    stdin, stdout, stderr = ssh_client.exec_command(command)
 
-    output = stdout.read().decode().strip()
-    error = stderr.read().decode().strip()
+    # Longest reply line read from the miner, the proof reply carries the challenged rows
+    max_reply_bytes = 256 * 1024 * 1024
+
+    def __init__(self, ssh_client, script_path="/tmp/miner_script.py", deadline=None):
+        self.deadline = deadline
+        self.channel = ssh_client.get_transport().open_session()
+        self.channel.exec_command(f"/opt/conda/bin/python {script_path} --mode daemon")
+        self.stdin = self.channel.makefile_stdin("wb")
+        self.stdout = self.channel.makefile("rb")
+        self.benchmark_details = []
+        self.proof_timings = {}
+
+    def request(self, cmd, **params):
+        """
+        Send one command and wait for its reply.
+
+        Returns:
+            The result of the command, a RuntimeError is raised if the command failed, a
+            MinerScriptProtocolError if the reply is not part of the protocol and a MinerScriptTimeout
+            if the deadline passed.
+        """
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise MinerScriptTimeout(f"Miner script {cmd} not sent, deadline passed")
+            self.channel.settimeout(remaining)
+        try:
+            self.stdin.write((json.dumps({"cmd": cmd, **params}) + "\n").encode())
+            self.stdin.flush()
+            line = self.stdout.readline(self.max_reply_bytes)
+        except socket.timeout as e:
+            raise MinerScriptTimeout(f"Miner script {cmd} timed out") from e
+        if not line:
+            error = self.channel.recv_stderr(65536).decode(errors="replace").strip() if self.channel.recv_stderr_ready() else ""
+            raise RuntimeError(f"Miner script exited during {cmd}: {error}")
+        if not line.endswith(b"\n"):
+            # Cut by the size limit or by the end of the output
+            raise MinerScriptProtocolError(f"Truncated or oversized reply of the miner script to {cmd}: {len(line)} bytes")
+        try:
+            reply = json.loads(line)
+        except ValueError as e:
+            # Invalid JSON or invalid UTF-8
+            raise MinerScriptProtocolError(f"Invalid reply of the miner script to {cmd}: {line[:200]!r}") from e
+        if not isinstance(reply, dict) or (reply.get("ok") and "result" not in reply):
+            raise MinerScriptProtocolError(f"Invalid reply of the miner script to {cmd}: {line[:200]!r}")
+        if not reply.get("ok"):
+            raise RuntimeError(f"Miner script {cmd} failed: {reply.get('error')}")
+        return reply["result"]
+
+    def gpu_info(self):
+        result = self.request("gpu_info")
+        if not isinstance(result, dict):
+            raise MinerScriptProtocolError(f"Invalid GPU info of the miner script: {result!r}")
+        return result
+
+    def benchmark(self, warmup=0, iterations=1, max_seconds=20.0):
+        """
+        Returns:
+            tuple: (num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32) of the first device,
+            the times of its first timed runs. The per-device statistics are kept in benchmark_details.
+        """
+        result = self.request("benchmark", warmup=warmup, iterations=iterations, max_seconds=max_seconds)
+        try:
+            benchmark = (
+                int(result["num_gpus"]),
+                float(result["vram"]),
+                int(result["size_fp16"]),
+                float(result["time_fp16"]),
+                int(result["size_fp32"]),
+                float(result["time_fp32"]),
+            )
+            self.benchmark_details = [device for device in result.get("devices", []) if isinstance(device, dict)]
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise MinerScriptProtocolError(f"Invalid benchmark result of the miner script: {e!r}") from e
+        return benchmark
+
+    def compute(self, seeds, n, hash_algorithm="sha256", workers="thread"):
+        """
+        Parameters:
+            workers (str): 'thread' or 'process', see run_compute of the miner script.
+
+        Returns:
+            tuple: (root_hashes, gpu_timings), lists of (gpu_id, root hash) and (gpu_id, timings).
+        """
+        result = self.request(
+            "compute",
+            n=int(n),
+            seeds={str(gpu_id): [s_A, s_B] for gpu_id, (s_A, s_B) in seeds.items()},
+            hash_algorithm=hash_algorithm,
+            workers=workers,
+        )
+        try:
+            root_hashes = [(int(gpu_id), str(root_hash)) for gpu_id, root_hash in result["root_hashes"]]
+            timings = [(int(gpu_id), dict(timing)) for gpu_id, timing in result["timings"]]
+        except (KeyError, TypeError, ValueError) as e:
+            raise MinerScriptProtocolError(f"Invalid compute result of the miner script: {e!r}") from e
+        return root_hashes, timings
+
+    def start_workers(self, num_devices):
+        """
+        Spawn the miner's device worker processes before the timed compute phase.
+        """
+        return self.request("start_workers", num_devices=int(num_devices))
+
+    def proof(self, indices, num_gpus):
+        """
+        Returns:
+            dict: Response of each GPU, None for the GPUs without a valid response. The time
+            the miner spent on the proofs and the remaining transfer time are kept in proof_timings.
+        """
+        responses = {gpu_id: None for gpu_id in range(num_gpus)}
+        start_time = time.perf_counter()
+        result = self.request(
+            "proof",
+            indices={str(gpu_id): [[int(i), int(j)] for i, j in idx_list] for gpu_id, idx_list in indices.items()},
+        )
+        if not isinstance(result, dict):
+            raise MinerScriptProtocolError(f"Invalid proof result of the miner script: {result!r:.200}")
+        try:
+            responses.update(parse_proof_responses(base64.b64decode(result["responses"], validate=True)))
+        except Exception as e:
+            bt.logging.trace(f"Error receiving responses: {e}")
+        elapsed_time = time.perf_counter() - start_time
+        try:
+            proof_time = min(float(result.get("proof_time", 0.0)), elapsed_time)
+        except (TypeError, ValueError):
+            proof_time = elapsed_time
+        self.proof_timings = {"challenge": proof_time, "proof_download": elapsed_time - proof_time}
+        return responses
+
+    def close(self):
+        # Never blocks, the exit command is dropped if the channel cannot take it at once
+        self.channel.settimeout(0.0)
+        try:
+            self.stdin.write(b'{"cmd": "exit"}\n')
+            self.stdin.flush()
+            self.channel.shutdown_write()
+        except Exception:
+            pass
+        self.channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def open_miner_script_session(ssh_client, script_path, local_hash, timer=None, deadline=None):
+    """
+    Start the miner script daemon, uploading the script only when the miner lacks the current version.
 
-    if error:
-        raise RuntimeError(f"Failed to get GPU info: {error}")
+    The digest of the script on the miner is checked over the same SSH connection before
+    the upload, and the digest reported by the running daemon together with the GPU info
+    is always compared with the local one.
 
-    return json.loads(output)
\ No newline at end of file
+    Parameters:
+        ssh_client (paramiko.SSHClient): SSH client connected to the miner.
+        script_path (str): Path of the local miner script.
+        local_hash (str): compute_script_hash of the local miner script.
+        timer (StageTimer): Records the script_upload and gpu_info stages, the hash check is
+            part of the gpu_info reply (optional).
+        deadline (float): time.monotonic() deadline of the upload and of every request of the
+            session (optional).
+
+    Returns:
+        tuple: (session, gpu_info, uploaded), a ScriptIntegrityError is raised if the digests
+        differ. The session is closed whenever no session is returned.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("script_upload"):
+        uploaded = get_remote_script_hash(ssh_client, timeout=remaining_time(deadline)) != local_hash
+        if uploaded:
+            upload_script(ssh_client, script_path, timeout=remaining_time(deadline))
+
+    session = None
+    try:
+        with timer.stage("gpu_info"):
+            session = MinerScriptSession(ssh_client, deadline=deadline)
+            gpu_info = session.gpu_info()
+    except Exception:
+        if session is not None:
+            session.close()
+        raise
+
+    if gpu_info.get("script_hash") != local_hash:
+        session.close()
+        raise ScriptIntegrityError("Script integrity verification failed.")
+    return session, gpu_info, uploaded
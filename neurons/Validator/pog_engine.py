@@ -0,0 +1,171 @@
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+
+import bittensor as bt
+import numpy as np
+
+from neurons.Validator.pog import evaluate_verification_results
+from neurons.Validator.pog_verify import init_verification_worker, verify_gpu_response
+
+
+class VerificationEngine:
+    """
+    Bounded process pool shared by all Proof-of-GPU workers.
+
+    The NumPy and hashing work of verify_responses runs in worker processes so it
+    neither holds the GIL nor blocks the event loop. At most `max_workers` jobs run
+    at a time, the others wait in the engine's queue.
+    """
+
+    def __init__(self, max_workers=None, latency_window=1000):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # CUDA and the validator threads do not survive a fork, the workers are forked from a
+        # single-threaded server process with the verification code preloaded instead
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(["neurons.Validator.pog_verify"])
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=init_verification_worker,
+        )
+        self._slots = None
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_times = deque(maxlen=latency_window)
+        self._run_times = deque(maxlen=latency_window)
+
+    async def submit(self, func, *args):
+        """
+        Run func(*args) in the process pool once a slot is free.
+
+        :return: The result of the call, exceptions raised by func are re-raised.
+        """
+        # Created lazily so that the semaphore belongs to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._submitted += 1
+        self._queued += 1
+        enqueued_at = time.perf_counter()
+        async with self._slots:
+            self._queued -= 1
+            self._running += 1
+            started_at = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            except Exception:
+                self._failed += 1
+                raise
+            finally:
+                self._running -= 1
+                self._completed += 1
+                self._wait_times.append(started_at - enqueued_at)
+                self._run_times.append(time.perf_counter() - started_at)
+
+    async def verify_responses(self, seeds, root_hashes, responses, indices, n, hash_algorithm="sha256", row_check_vectors=0, row_check_rtol=1e-5):
+        """
+        Same contract as pog.verify_responses, the GPUs of the miner are verified in parallel.
+        """
+        gpu_ids = list(root_hashes.keys())
+        jobs = [
+            self.submit(
+                verify_gpu_response, seeds[gpu_id], root_hashes[gpu_id], responses.get(gpu_id), indices[gpu_id], n, hash_algorithm,
+                row_check_vectors, row_check_rtol,
+            )
+            for gpu_id in gpu_ids
+        ]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+
+        gpu_results = {}
+        for gpu_id, result in zip(gpu_ids, results):
+            if isinstance(result, Exception):
+                gpu_results[gpu_id] = (False, f"Verification error: {result}")
+            else:
+                gpu_results[gpu_id] = result
+        return evaluate_verification_results(gpu_results)
+
+    def get_stats(self):
+        """
+        :return: Queue depth, in-flight jobs, counters and latency percentiles in milliseconds.
+        """
+        stats = {
+            "queue_depth": self._queued,
+            "running": self._running,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+        for name, samples in (("wait", self._wait_times), ("run", self._run_times)):
+            if samples:
+                p50, p95 = np.percentile(np.array(samples) * 1000, [50, 95])
+            else:
+                p50, p95 = 0.0, 0.0
+            stats[f"{name}_p50_ms"] = round(float(p50), 2)
+            stats[f"{name}_p95_ms"] = round(float(p95), 2)
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        bt.logging.trace(f"Verification engine stopped: {self.get_stats()}")
+
+
+class StageExecutor:
+    """
+    Runs the blocking stages of Proof-of-GPU tests, SSH and SFTP calls, in a thread pool.
+
+    The event loop only orchestrates the tests. Each stage can have its own limit of
+    concurrent calls, e.g. to bound the SSH handshakes the validator performs at once,
+    the other stages are only bounded by the threads of the pool.
+    """
+
+    def __init__(self, executor, limits=None):
+        self.executor = executor
+        self.limits = dict(limits or {})
+        self._slots = {}
+        self._running = defaultdict(int)
+        self._wait_times = defaultdict(lambda: deque(maxlen=1000))
+
+    async def run(self, stage, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in the thread pool once the stage has a free slot.
+
+        :return: The result of the call, exceptions raised by func are re-raised.
+        """
+        # Created lazily so that the semaphores belong to the running event loop
+        if stage in self.limits and stage not in self._slots:
+            self._slots[stage] = asyncio.Semaphore(self.limits[stage])
+        slots = self._slots.get(stage)
+
+        enqueued_at = time.perf_counter()
+        if slots is not None:
+            await slots.acquire()
+        try:
+            self._wait_times[stage].append(time.perf_counter() - enqueued_at)
+            self._running[stage] += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            finally:
+                self._running[stage] -= 1
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def get_stats(self):
+        """
+        :return: In-flight calls and p95 slot wait in milliseconds per stage.
+        """
+        return {
+            stage: {
+                "running": self._running[stage],
+                "wait_p95_ms": round(float(np.percentile(np.array(samples) * 1000, 95)), 2) if samples else 0.0,
+            }
+            for stage, samples in self._wait_times.items()
+        }
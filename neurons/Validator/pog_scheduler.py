@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import socket
+import time
+
+import paramiko
+
+# Failure kinds of a Proof-of-GPU test, returned by Validator.test_miner_gpu
+FAILURE_BUSY = "busy"  # Not allocatable, e.g. already allocated
+FAILURE_CONNECTION = "connection"  # SSH connection refused, timed out or rejected
+FAILURE_INTEGRITY = "integrity"  # Miner script hash mismatch
+FAILURE_NO_GPU = "no_gpu"  # No GPU reported by the miner script
+FAILURE_VERIFICATION = "verification"  # Merkle proof, value or timing check failed
+FAILURE_TIMEOUT = "timeout"  # The whole test exceeded pog_test_timeout
+FAILURE_SCREENED = "screened"  # The benchmark rules out every GPU model with a score
+FAILURE_ERROR = "error"  # Any other error
+
+# Failure kinds that end the miner's round without retry
+FINAL_FAILURES = {FAILURE_SCREENED}
+
+# Seconds before the first retry per failure kind, doubled for every further failure
+DEFAULT_RETRY_BACKOFF = {
+    FAILURE_BUSY: 60,
+    FAILURE_CONNECTION: 120,
+    FAILURE_INTEGRITY: 300,
+    FAILURE_NO_GPU: 300,
+    FAILURE_VERIFICATION: 300,
+    FAILURE_TIMEOUT: 120,
+    FAILURE_ERROR: 60,
+}
+
+
+# Exceptions of an SSH connection to the miner, other OSErrors such as local file
+# errors are not the miner's fault
+CONNECTION_ERRORS = (
+    paramiko.SSHException,
+    paramiko.ssh_exception.NoValidConnectionsError,
+    ConnectionError,
+    TimeoutError,
+    socket.timeout,
+    socket.gaierror,
+)
+
+
+def plan_round(hotkeys, last_results, start, spread):
+    """
+    Spread the first attempts of a Proof-of-GPU round evenly over the spread window.
+
+    Miners without any result come first, the others by the age of their latest result,
+    so the stalest results are refreshed first.
+
+    :param hotkeys: Miners to test, in their default order.
+    :param last_results: Unix time of the latest result by hotkey.
+    :param start: Unix time of the start of the round.
+    :param spread: Seconds over which the first attempts are spread.
+    :return: A dictionary of {hotkey: due unix time}, in test order.
+    """
+    order = sorted(hotkeys, key=lambda hotkey: (hotkey in last_results, last_results.get(hotkey, 0.0)))
+    step = spread / len(order) if order else 0.0
+    return {hotkey: start + index * step for index, hotkey in enumerate(order)}
+
+
+class PogTestFailure(Exception):
+    """
+    Failure of a Proof-of-GPU test with a known kind.
+    """
+
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind
+
+
+def classify_failure(exc):
+    """
+    :return: Failure kind of an exception raised during a Proof-of-GPU test.
+    """
+    if isinstance(exc, PogTestFailure):
+        return exc.kind
+    if isinstance(exc, CONNECTION_ERRORS):
+        # Authentication failures, refused or unreachable hosts and socket timeouts
+        return FAILURE_CONNECTION
+    return FAILURE_ERROR
+
+
+class RetryScheduler:
+    """
+    Delay queue of the miners to test in one Proof-of-GPU round.
+
+    Miners wait in a heap keyed by the time of their next attempt, so workers only
+    pick up attempts that are due and never sleep on a miner's retry interval. The
+    retry delay grows per miner with its failures, starting from a base delay that
+    depends on the kind of the last failure. No retry is scheduled past the deadline,
+    so the round ends in time for the next one.
+    """
+
+    def __init__(self, retry_limit, backoff=None, default_backoff=60, max_backoff=900, duration=None, clock=time.monotonic):
+        self.retry_limit = retry_limit
+        self.backoff = {**DEFAULT_RETRY_BACKOFF, **(backoff or {})}
+        self.default_backoff = default_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.deadline = clock() + duration if duration is not None else None
+        self._heap = []
+        self._sequence = itertools.count()
+        self._in_flight = set()
+        self._state = {}
+        self._changed = None
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    def schedule(self, axon, delay=0.0):
+        """
+        Add an attempt for the miner, due in delay seconds.
+        """
+        due = self.clock() + delay
+        state = self._state.setdefault(axon.hotkey, {"attempts": 0, "failures": {}, "last_failure": None})
+        state["next_attempt"] = due
+        state["status"] = "waiting"
+        heapq.heappush(self._heap, (due, next(self._sequence), axon))
+        self._notify()
+
+    async def next(self):
+        """
+        Wait for the next due attempt.
+
+        :return: The axon to test, None once no attempt is waiting or in flight.
+        """
+        # Created lazily so that the event belongs to the running event loop
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while True:
+            if self._heap:
+                delay = self._heap[0][0] - self.clock()
+                if delay <= 0:
+                    _, _, axon = heapq.heappop(self._heap)
+                    self._in_flight.add(axon.hotkey)
+                    state = self._state[axon.hotkey]
+                    state["attempts"] += 1
+                    state["status"] = "testing"
+                    state["next_attempt"] = None
+                    return axon
+            elif not self._in_flight:
+                return None
+            else:
+                delay = None
+
+            # Sleep until the head of the heap is due or the heap changes
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def succeeded(self, hotkey):
+        self._in_flight.discard(hotkey)
+        self._state[hotkey]["status"] = "passed"
+        self._notify()
+
+    def failed(self, axon, kind):
+        """
+        Record a failed attempt and schedule the next one with the miner's backoff.
+
+        :return: The retry delay in seconds, None once the retry limit or the deadline is reached
+            or after a final failure.
+        """
+        hotkey = axon.hotkey
+        self._in_flight.discard(hotkey)
+        state = self._state[hotkey]
+        state["failures"][kind] = state["failures"].get(kind, 0) + 1
+        state["last_failure"] = kind
+
+        failures = sum(state["failures"].values())
+        base = self.backoff.get(kind, self.default_backoff)
+        delay = min(base * 2 ** (failures - 1), self.max_backoff)
+        past_deadline = self.deadline is not None and self.clock() + delay > self.deadline
+        if state["attempts"] >= self.retry_limit or past_deadline or kind in FINAL_FAILURES:
+            state["status"] = "failed"
+            self._notify()
+            return None
+        self.schedule(axon, delay)
+        return delay
+
+    def get_state(self):
+        """
+        :return: Retry state per hotkey: status, attempts, failures per kind, last failure
+            and seconds until the next attempt.
+        """
+        now = self.clock()
+        return {
+            hotkey: {
+                **{key: value for key, value in state.items() if key != "next_attempt"},
+                "failures": dict(state["failures"]),
+                "next_attempt_in": max(0.0, state["next_attempt"] - now) if state.get("next_attempt") is not None else None,
+            }
+            for hotkey, state in self._state.items()
+        }
+
+    def get_stats(self):
+        """
+        :return: Number of miners per status, waiting attempts and failures per kind.
+        """
+        statuses = {}
+        failures = {}
+        for state in self._state.values():
+            statuses[state["status"]] = statuses.get(state["status"], 0) + 1
+            for kind, count in state["failures"].items():
+                failures[kind] = failures.get(kind, 0) + count
+        return {"miners": statuses, "waiting": len(self._heap), "in_flight": len(self._in_flight), "failures": failures}
@@ -0,0 +1,379 @@
+import hashlib
+import struct
+
+import blake3
+import numpy as np
+
+# Verification of the Proof-of-GPU responses. Only depends on NumPy and the hash
+# libraries, so the fork server of the verification engine preloads it cheaply.
+
+# Binary proof responses sent by the miner script in reply to the proof command
+RESPONSES_MAGIC = b"POGR"
+RESPONSES_VERSION = 1
+RESPONSES_HEADER = "<4sHH"
+RESPONSES_FRAME_HEADER = "<IIIII"
+
+def blake2b_256(data=b""):
+    return hashlib.blake2b(data, digest_size=32)
+
+# Merkle tree hash backends, must match HASH_FUNCTIONS of the miner script
+HASH_FUNCTIONS = {
+    "sha256": hashlib.sha256,
+    "blake2b": blake2b_256,
+    "blake3": blake3.blake3,
+}
+
+def parse_proof_responses(data):
+    """
+    Parse the binary proof responses of the miner script.
+
+    The buffer starts with a header (magic, version, number of frames) followed by
+    one frame per GPU: a header (gpu_id, k, n, proof depth, hash size), k (i, j)
+    uint32 pairs, k x n float32 rows and k x depth sibling hashes.
+
+    Parameters:
+        data (bytes): Decoded responses of the proof command.
+
+    Returns:
+        dict: Response of each GPU with its 'rows', 'proofs' and 'indices'. A ValueError is
+        raised if the buffer is truncated, has a frame twice or data after the last frame.
+    """
+    try:
+        magic, version, num_frames = struct.unpack_from(RESPONSES_HEADER, data, 0)
+    except struct.error as e:
+        raise ValueError("Truncated responses header") from e
+    if magic != RESPONSES_MAGIC or version != RESPONSES_VERSION:
+        raise ValueError(f"Unsupported responses format: {magic!r} version {version}")
+
+    responses = {}
+    offset = struct.calcsize(RESPONSES_HEADER)
+    for _ in range(num_frames):
+        try:
+            gpu_id, k, n, depth, hash_size = struct.unpack_from(RESPONSES_FRAME_HEADER, data, offset)
+        except struct.error as e:
+            raise ValueError("Truncated response frame header") from e
+        if gpu_id in responses:
+            raise ValueError(f"Duplicate response frame for GPU {gpu_id}")
+        offset += struct.calcsize(RESPONSES_FRAME_HEADER)
+        frame_size = k * 2 * 4 + k * n * 4 + k * depth * hash_size
+        if offset + frame_size > len(data):
+            raise ValueError(f"Truncated response frame for GPU {gpu_id}")
+
+        indices = np.frombuffer(data, dtype='<u4', count=k * 2, offset=offset).reshape(k, 2)
+        offset += indices.nbytes
+        rows = np.frombuffer(data, dtype='<f4', count=k * n, offset=offset).reshape(k, n)
+        offset += rows.nbytes
+        proofs = np.frombuffer(data, dtype=np.uint8, count=k * depth * hash_size, offset=offset).reshape(k, depth, hash_size)
+        offset += proofs.nbytes
+
+        responses[gpu_id] = {
+            'rows': rows,
+            'proofs': [[sibling.tobytes() for sibling in proof] for proof in proofs],
+            'indices': [(int(i), int(j)) for i, j in indices],
+        }
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} bytes after the last response frame")
+    return responses
+
+def xorshift32_numpy(state):
+    state = np.uint64(state)
+    x = state & np.uint64(0xFFFFFFFF)
+    x ^= (np.uint64((x << np.uint64(13)) & np.uint64(0xFFFFFFFF)))
+    x ^= (np.uint64((x >> np.uint64(17)) & np.uint64(0xFFFFFFFF)))
+    x ^= (np.uint64((x << np.uint64(5)) & np.uint64(0xFFFFFFFF)))
+    x = x & np.uint64(0xFFFFFFFF)
+    return x
+
+def generate_prng_value(s, i, j):
+    s = np.uint64(s)
+    i = np.uint64(i % np.uint64(2**32))
+    j = np.uint64(j)
+    state = (s + i + j) & np.uint64(0xFFFFFFFF)
+
+    for _ in range(10):
+        state = xorshift32_numpy(state)
+
+    return state / float(0xFFFFFFFF)
+
+def xorshift32_vectorized(states):
+    """
+    Apply ten xorshift32 rounds in place to an array of uint32 states.
+
+    Equivalent to calling xorshift32_numpy ten times on every element, uint32
+    arithmetic discards the high bits that the scalar version masks out.
+    """
+    scratch = np.empty_like(states)
+    for _ in range(10):
+        np.left_shift(states, np.uint32(13), out=scratch)
+        states ^= scratch
+        np.right_shift(states, np.uint32(17), out=scratch)
+        states ^= scratch
+        np.left_shift(states, np.uint32(5), out=scratch)
+        states ^= scratch
+    return states
+
+def generate_prng_vectors(s, indices, n):
+    """
+    Generate whole rows of A (or columns of B) with the PRNG in a few array operations.
+
+    The PRNG state only depends on s + i + j, so row i of a matrix and column i of
+    a matrix generated with the same seed are the same vector, and the vectors of
+    several indices are overlapping windows of one sequence that is generated only
+    once. The result is bit-exact with generate_prng_value applied element by element.
+
+    Parameters:
+        s (int): Seed of the matrix.
+        indices (iterable of int): Row indices of A or column indices of B.
+        n (int): Size of the matrix.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(indices), n).
+    """
+    indices = np.asarray(indices, dtype=np.uint64).reshape(-1) & np.uint64(0xFFFFFFFF)
+
+    if len(indices) > 1:
+        low, high = int(indices.min()), int(indices.max())
+        span = high - low + n
+        if span < len(indices) * n:
+            window = generate_prng_vectors(s, [low], span)[0]
+            offsets = (indices - np.uint64(low)).astype(np.intp)
+            return window[offsets[:, None] + np.arange(n)]
+
+    base = (np.uint64(int(s) & 0xFFFFFFFF) + indices).astype(np.uint32)
+    states = base[:, None] + np.arange(n, dtype=np.uint32)[None, :]
+    xorshift32_vectorized(states)
+    return (states / float(0xFFFFFFFF)).astype(np.float32)
+
+def prng_matrix_product(s, n, R):
+    """
+    Compute M @ R for the n x n PRNG matrix M generated with seed s, without generating M.
+
+    M[k, l] only depends on s + k + l, M is a Hankel matrix: (M @ R)[k] is the correlation
+    of the 2n - 1 values of one PRNG sequence with R, computed with FFTs in float64.
+
+    Parameters:
+        s (int): Seed of the matrix.
+        n (int): Size of the matrix.
+        R (np.ndarray): (n, m) array.
+
+    Returns:
+        np.ndarray: (n, m) float64 array.
+    """
+    sequence = generate_prng_vectors(s, [0], 2 * n - 1)[0].astype(np.float64)
+    size = 1 << int(np.ceil(np.log2(3 * n - 2)))
+    spectrum = np.fft.rfft(sequence, size)[:, None] * np.fft.rfft(R[::-1], size, axis=0)
+    return np.fft.irfft(spectrum, size, axis=0)[n - 1:2 * n - 1]
+
+def verify_rows_randomized(s_A, s_B, A_rows, rows, n, num_vectors=4, rtol=1e-5):
+    """
+    Freivalds-style check of whole rows of C = A @ B.
+
+    Every row c of C must satisfy c @ r = A_row @ (B @ r) for random sign vectors r. Errors
+    anywhere in the row are caught, not only in the challenged element. The tolerance is
+    rtol times the norm of c * r, the bound of element-wise errors of relative size rtol.
+
+    Parameters:
+        s_A (int), s_B (int): Seeds of A and B.
+        A_rows (np.ndarray): (k, n) rows of A matching the rows of C.
+        rows (np.ndarray): (k, n) rows of C returned by the miner.
+        n (int): Size of the matrices.
+        num_vectors (int): Random vectors per row, each at least halves the chance of a
+            wrong row passing.
+        rtol (float): Relative tolerance.
+
+    Returns:
+        int: Position of the first inconsistent row in rows, None if all rows are consistent.
+    """
+    R = np.random.default_rng().choice(np.array([-1.0, 1.0]), size=(n, num_vectors))
+    expected = np.asarray(A_rows, dtype=np.float64) @ prng_matrix_product(s_B, n, R)
+    rows = np.asarray(rows, dtype=np.float64)
+    # The norm of c * r is the norm of c for sign vectors
+    tolerance = rtol * np.linalg.norm(rows, axis=1, keepdims=True)
+    failed = np.flatnonzero(~np.all(np.abs(rows @ R - expected) <= tolerance, axis=1))
+    return int(failed[0]) if len(failed) > 0 else None
+
+def get_required_passes(num_gpus):
+    """
+    Minimum number of GPUs that must pass verification for the miner to pass.
+    """
+    if num_gpus == 4:
+        return 3
+    elif num_gpus > 4:
+        # For systems with more than 4 GPUs, adjust the required_passes as needed
+        # Example: Require at least 75% to pass
+        return int(np.ceil(0.75 * num_gpus))
+    else:
+        # For systems with 2 or fewer GPUs, require all to pass
+        return num_gpus
+
+def get_response_rows(response, root_hash, gpu_indices, n):
+    """
+    Check the structure of a GPU response before any value is read from it.
+
+    Parameters:
+        response (dict): Computed rows and proofs returned by the GPU.
+        root_hash (str): Hex Merkle root hash reported by the GPU.
+        gpu_indices (list): Challenge indices (i, j) of the GPU.
+        n (int): Total number of leaves in the Merkle tree.
+
+    Returns:
+        np.ndarray: The (k x n) float32 rows of the response, None if the response does not
+        have one row of n values and one proof per challenge index, or does not echo the
+        challenge indices when it reports them.
+    """
+    k = len(gpu_indices)
+    try:
+        bytes.fromhex(root_hash)
+        rows = np.asarray(response['rows'])
+        if rows.dtype != np.float32 or rows.shape != (k, n):
+            return None
+        proofs = response['proofs']
+        if len(proofs) != k or not all(isinstance(sibling, bytes) for proof in proofs for sibling in proof):
+            return None
+        indices = response.get('indices')
+        if indices is not None and [tuple(index) for index in indices] != [tuple(index) for index in gpu_indices]:
+            return None
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return rows
+
+def verify_gpu_response(seeds, root_hash, response, gpu_indices, n, hash_algorithm="sha256", row_check_vectors=0, row_check_rtol=1e-5):
+    """
+    Verifies the response of a single GPU by checking computed values and Merkle proofs.
+
+    Parameters:
+        seeds (tuple): Seeds (s_A, s_B) used for generating the matrices of this GPU.
+        root_hash (str): Hex Merkle root hash reported by this GPU.
+        response (dict): Computed rows and proofs returned by this GPU.
+        gpu_indices (list): Challenge indices (i, j) of this GPU.
+        n (int): Total number of leaves in the Merkle tree.
+        hash_algorithm (str): Hash algorithm of the Merkle tree, a key of HASH_FUNCTIONS.
+        row_check_vectors (int): Random vectors of the whole-row check, 0 disables it.
+        row_check_rtol (float): Relative tolerance of the whole-row check.
+
+    Returns:
+        tuple: (passed, reason) where reason describes the first failure, None if passed.
+    """
+    if response is None:
+        return False, "No response received."
+    rows_miner = get_response_rows(response, root_hash, gpu_indices, n)
+    if rows_miner is None:
+        return False, "Malformed response"
+
+    s_A, s_B = seeds
+    total_leaves = n
+
+    # Generate the challenged rows of A and columns of B as (k x n) blocks
+    row_indices = [i for i, _ in gpu_indices]
+    col_indices = [j for _, j in gpu_indices]
+    A_rows = generate_prng_vectors(s_A, row_indices, n)
+    B_cols = generate_prng_vectors(s_B, col_indices, n)
+
+    # Compute every C_{i,j} at once as the row-wise dot products of A_rows and B_cols
+    values_validator = np.einsum("kn,kn->k", A_rows, B_cols)
+
+    # Retrieve miner's computed values and corresponding Merkle proofs
+    proofs = response['proofs']
+    values_miner = rows_miner[np.arange(len(gpu_indices)), col_indices]
+
+    # Indices are checked in order, stop at the first value mismatch or invalid proof
+    value_mismatches = np.flatnonzero(~np.isclose(values_miner, values_validator, atol=1e-5))
+    first_mismatch = int(value_mismatches[0]) if len(value_mismatches) > 0 else len(gpu_indices)
+    first_invalid_proof = verify_merkle_proof_rows(
+        rows_miner[:first_mismatch],
+        proofs[:first_mismatch],
+        bytes.fromhex(root_hash),
+        row_indices[:first_mismatch],
+        total_leaves,
+        hash_func=HASH_FUNCTIONS[hash_algorithm],
+    )
+
+    if first_invalid_proof is not None:
+        return False, f"Invalid Merkle proof at index ({row_indices[first_invalid_proof]})."
+    if first_mismatch < len(gpu_indices):
+        i, j = gpu_indices[first_mismatch]
+        return False, f"Value mismatch at index ({i}, {j})."
+    if row_check_vectors > 0:
+        first_inconsistent = verify_rows_randomized(s_A, s_B, A_rows, rows_miner, n, row_check_vectors, row_check_rtol)
+        if first_inconsistent is not None:
+            return False, f"Row check failed at index ({row_indices[first_inconsistent]})."
+    return True, None
+
+def verify_merkle_proof_row(row, proof, root_hash, index, total_leaves, hash_func=hashlib.sha256):
+    """
+    Verifies a Merkle proof for a given row.
+
+    Parameters:
+    - row (np.ndarray): The data row to verify.
+    - proof (list of bytes): The list of sibling hashes required for verification.
+    - root_hash (bytes): The root hash of the Merkle tree.
+    - index (int): The index of the row in the tree.
+    - total_leaves (int): The total number of leaves in the Merkle tree.
+    - hash_func (callable): The hash function to use (default: hashlib.sha256).
+
+    Returns:
+    - bool: True if the proof is valid, False otherwise.
+    """
+    # Initialize the computed hash with the hash of the row using the specified hash function
+    computed_hash = hash_func(row.tobytes()).digest()
+    idx = index
+    num_leaves = total_leaves
+    
+    # Iterate through each sibling hash in the proof
+    for sibling_hash in proof:
+        if idx % 2 == 0:
+            # If the current index is even, concatenate computed_hash + sibling_hash
+            combined = computed_hash + sibling_hash
+        else:
+            # If the current index is odd, concatenate sibling_hash + computed_hash
+            combined = sibling_hash + computed_hash
+        # Compute the new hash using the specified hash function
+        computed_hash = hash_func(combined).digest()
+        # Move up to the next level
+        idx = idx // 2
+    
+    # Compare the computed hash with the provided root hash
+    return computed_hash == root_hash
+
+def verify_merkle_proof_rows(rows, proofs, root_hash, indices, total_leaves, hash_func=hashlib.sha256):
+    """
+    Verifies the Merkle proofs of several rows against the same root hash.
+
+    All leaves are hashed in a single pass over the rows, then each proof is walked
+    up to the root in order.
+
+    Parameters:
+    - rows (np.ndarray): The data rows to verify, one per index.
+    - proofs (list of list of bytes): The sibling hashes of each row.
+    - root_hash (bytes): The root hash of the Merkle tree.
+    - indices (list of int): The index of each row in the tree.
+    - total_leaves (int): The total number of leaves in the Merkle tree.
+    - hash_func (callable): The hash function to use (default: hashlib.sha256).
+
+    Returns:
+    - int or None: Position of the first invalid proof, None if all proofs are valid.
+    """
+    leaf_hashes = [hash_func(row.tobytes()).digest() for row in rows]
+
+    for position, (computed_hash, proof, idx) in enumerate(zip(leaf_hashes, proofs, indices)):
+        for sibling_hash in proof:
+            if idx % 2 == 0:
+                computed_hash = hash_func(computed_hash + sibling_hash).digest()
+            else:
+                computed_hash = hash_func(sibling_hash + computed_hash).digest()
+            idx = idx // 2
+        if computed_hash != root_hash:
+            return position
+
+    return None
+
+def init_verification_worker():
+    """
+    Initializer of the verification engine processes.
+
+    Runs the PRNG, the FFT and every hash backend once, so that the first job of a
+    process does not pay for their first call.
+    """
+    prng_matrix_product(0, 32, np.ones((32, 1)))
+    for hash_func in HASH_FUNCTIONS.values():
+        hash_func(b"").digest()
@@ -44,6 +44,7 @@ from compute.utils.subtensor import (
     get_current_block,
     calculate_next_block_time,
 )
+from compute.utils.validator_set import ValidatorSetProvider
 from compute.utils.version import (
     check_hashcat_version,
     try_update,
@@ -151,6 +152,9 @@ class Miner:
         self._metagraph = self.subtensor.metagraph(self.config.netuid)
         bt.logging.info(f"Metagraph: {self.metagraph}")
 
+        # Validators of the subnet, cached per metagraph sync
+        self.validator_set = ValidatorSetProvider(self.subtensor, self.config.netuid)
+
         build_check_container("my-compute-subnet", "sn27-check-container")
         has_docker, msg = check_docker_availability()
 
@@ -571,31 +575,13 @@ class Miner:
             bt.logging.error(traceback.format_exc())
 
     def get_valid_validator_uids(self):
-        valid_uids = []
-        uids = self.metagraph.uids.tolist()
-        for index, uid in enumerate(uids):
-            if self.metagraph.total_stake[index] > validator_permit_stake:
-                valid_uids.append(uid)
-        return valid_uids
+        return self.validator_set.get_uids(self.metagraph)
 
     def get_valid_validator(self) -> typing.List[typing.Tuple[int, str, int]]:
-        valid_validator_uids = self.get_valid_validator_uids()
-        valid_validator = []
-        for uid in valid_validator_uids:
-            neuron = self.subtensor.neuron_for_uid(uid, self.config.netuid)
-            hotkey = neuron.hotkey
-            version = neuron.prometheus_info.version
-            valid_validator.append((uid, hotkey, version))
-        return valid_validator
+        return self.validator_set.get_validators(self.metagraph)
 
     def get_valid_validator_hotkeys(self):
-        valid_hotkeys = []
-        valid_validator_uids = self.get_valid_validator_uids()
-        for uid in valid_validator_uids:
-            neuron = self.subtensor.neuron_for_uid(uid, self.config.netuid)
-            hotkey = neuron.hotkey
-            valid_hotkeys.append(hotkey)
-        return valid_hotkeys
+        return self.validator_set.get_hotkeys(self.metagraph)
 
     def next_info(self, cond, next_block):
         if cond:
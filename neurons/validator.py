@@ -21,7 +21,6 @@ import asyncio
 import base64
 import json
 import os
-import random
 import threading
 import traceback
 import hashlib
@@ -42,14 +41,12 @@ from cryptography.fernet import Fernet
 from torch._C._te import Tensor # type: ignore
 import RSAEncryption as rsa
 import concurrent.futures
-from collections import defaultdict
 
 import Validator.app_generator as ag
 from compute import (
     SUSPECTED_EXPLOITERS_HOTKEYS,
     SUSPECTED_EXPLOITERS_COLDKEYS,
     __version_as_int__,
-    validator_permit_stake,
     weights_rate_limit
     )
 from compute.axon import ComputeSubnetSubtensor
@@ -58,14 +55,30 @@ from compute.utils.db import ComputeDb
 from compute.utils.math import percent, force_to_float_or_default
 from compute.utils.parser import ComputeArgPaser
 from compute.utils.subtensor import is_registered, get_current_block, calculate_next_block_time
+from compute.utils.validator_set import ValidatorSetProvider
 from compute.utils.version import try_update, get_local_version, version2number, get_remote_version
 from compute.wandb.wandb import ComputeWandb
-from neurons.Validator.calculate_pow_score import calc_score_pog
+from neurons.Validator.calculate_pow_score import GpuScoreTable
 from neurons.Validator.database.allocate import update_miner_details, select_has_docker_miners_hotkey, get_miner_details
 from neurons.Validator.database.challenge import select_challenge_stats, update_challenge_details
 from neurons.Validator.database.miner import select_miners, purge_miner_entries, update_miners
-from neurons.Validator.pog import adjust_matrix_size, compute_script_hash, execute_script_on_miner, get_random_seeds, load_yaml_config, parse_merkle_output, receive_responses, send_challenge_indices, send_script_and_request_hash, parse_benchmark_output, identify_gpu, send_seeds, verify_merkle_proof_row, get_remote_gpu_info, verify_responses
-from neurons.Validator.database.pog import get_pog_specs, retrieve_stats, update_pog_stats, write_stats
+from neurons.Validator.pog import adjust_matrix_size, compute_script_hash, get_random_seeds, load_yaml_config, get_gpu_fingerprint_index, verify_merkle_proof_row, select_hash_algorithm, open_miner_script_session, MinerScriptTimeout, ScriptIntegrityError, StageTimer
+from neurons.Validator.database.pog import get_all_pog_specs, retrieve_stats, update_pog_stats, update_pog_timings, get_pog_timing_percentiles, write_stats, get_pog_last_results, get_pog_schedule, save_pog_schedule
+from neurons.Validator.pog_engine import StageExecutor, VerificationEngine
+from neurons.Validator.pog_scheduler import (
+    FAILURE_BUSY,
+    FAILURE_CONNECTION,
+    FAILURE_ERROR,
+    FAILURE_INTEGRITY,
+    FAILURE_NO_GPU,
+    FAILURE_SCREENED,
+    FAILURE_TIMEOUT,
+    FAILURE_VERIFICATION,
+    PogTestFailure,
+    RetryScheduler,
+    classify_failure,
+    plan_round,
+)
 
 class Validator:
     blocks_done: set = set()
@@ -167,6 +180,9 @@ class Validator:
         self._metagraph = self.subtensor.metagraph(self.config.netuid)
         bt.logging.info(f"Metagraph: {self.metagraph}")
 
+        # Validators of the subnet, cached per metagraph sync
+        self.validator_set = ValidatorSetProvider(self.subtensor, self.config.netuid)
+
         # Initialize the local db
         self.db = ComputeDb()
         self.miners: dict = select_miners(self.db)
@@ -176,14 +192,21 @@ class Validator:
 
         # STEP 2B: Init Proof of GPU
         # Load configuration from YAML
-        config_file = "config.yaml"
-        self.config_data = load_yaml_config(config_file)
+        self.config_file = "config.yaml"
+        self.config_data = load_yaml_config(self.config_file)
         cpu_cores = os.cpu_count() or 1
         configured_max_workers = self.config_data["merkle_proof"].get("max_workers", 32)
         safe_max_workers = min((cpu_cores + 4)*4, configured_max_workers)
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=safe_max_workers)
+        # Blocking SSH and SFTP calls of the PoG tests run in the executor's threads, not on the event loop
+        self.stage_executor = StageExecutor(self.executor, self.config_data["merkle_proof"].get("stage_concurrency"))
+        # Process pool shared by all PoG workers for the CPU heavy proof verification
+        verification_workers = self.config_data["merkle_proof"].get("verification_workers", cpu_cores)
+        self.verification_engine = VerificationEngine(max_workers=min(verification_workers, cpu_cores))
         self.results = {}
         self.gpu_task = None  # Track the GPU task
+        # Retry state of the current or last PoG round
+        self.pog_scheduler = None
 
         # Step 3: Set up initial scoring weights for validation
         bt.logging.info("Building validation weights.")
@@ -325,6 +348,11 @@ class Validator:
         self.penalized_hotkeys = self.wandb.get_penalized_hotkeys_checklist_bak(valid_validator_hotkeys, True)
         self._queryable_uids = self.get_queryable()
 
+        # Latest GPU specs of all miners in our PoG DB, in one query
+        pog_specs = get_all_pog_specs(self.db)
+        # Miners scored from our PoG DB, scored together after the loop
+        own_uids = []
+
         # Calculate score
         for uid in self.uids:
             try:
@@ -340,11 +368,12 @@ class Validator:
                 self.stats[uid]["allocated"] = hotkey in self.allocated_hotkeys
 
                 # Check GPU specs in our PoG DB
-                gpu_specs = get_pog_specs(self.db, hotkey)
+                gpu_specs = pog_specs.get(hotkey)
 
                 # If found in our local database
                 if gpu_specs is not None:
-                    score = calc_score_pog(gpu_specs, hotkey, self.allocated_hotkeys, self.config_data)
+                    own_uids.append(uid)
+                    score = 0  # Set below from the score table
                     self.stats[uid]["own_score"] = True  # or "yes" if you prefer a string
                 else:
                     # If not found locally, try fallback from stats_allocated
@@ -374,6 +403,20 @@ class Validator:
             # Keep a simple reference of scores
             self.scores[uid] = score
 
+        # Scores of the miners found in our PoG DB, from the per-model score table
+        if own_uids:
+            specs = [self.stats[uid]["gpu_specs"] for uid in own_uids]
+            own_scores = GpuScoreTable(self.config_data).scores(
+                [gpu_specs["gpu_name"] for gpu_specs in specs], [gpu_specs["num_gpus"] for gpu_specs in specs]
+            )
+            penalized = np.fromiter(
+                (self.stats[uid]["hotkey"] in self.penalized_hotkeys for uid in own_uids), dtype=bool, count=len(own_uids)
+            )
+            own_scores[penalized] = 0
+            for uid, score in zip(own_uids, own_scores.tolist()):
+                self.stats[uid]["score"] = score * 100
+            self.scores[torch.tensor(own_uids, dtype=torch.long)] = torch.from_numpy(own_scores).float()
+
         write_stats(self.db, self.stats)
 
         self.update_allocation_wandb()
@@ -424,6 +467,7 @@ class Validator:
         """
         self.metagraph.sync(subtensor=self.subtensor)
         self.uids = self.metagraph.uids.tolist()
+        bt.logging.trace(f"Validator set cache: {self.validator_set.get_stats()}")
 
     def sync_status(self):
         # Check if the validator is still registered
@@ -554,17 +598,7 @@ class Validator:
         return dict_filtered_axons
 
     def get_valid_validator_hotkeys(self):
-        valid_uids = []
-        uids = self.metagraph.uids.tolist()
-        for index, uid in enumerate(uids):
-            if self.metagraph.total_stake[index] > validator_permit_stake:
-                valid_uids.append(uid)
-        valid_hotkeys = []
-        for uid in valid_uids:
-            neuron = self.subtensor.neuron_for_uid(uid, self.config.netuid)
-            hotkey = neuron.hotkey
-            valid_hotkeys.append(hotkey)
-        return valid_hotkeys
+        return self.validator_set.get_hotkeys(self.metagraph)
 
     async def get_specs_wandb(self):
         """
@@ -638,7 +672,8 @@ class Validator:
     async def proof_of_gpu(self):
         """
         Perform Proof-of-GPU benchmarking on allocated miners without overlapping tests.
-        Uses asyncio with ThreadPoolExecutor to test miners in parallel.
+        First attempts are spread over the round, miners with the stalest results first.
+        Tests run as concurrent tasks on the event loop, their blocking SSH calls in the stage executor's threads.
         """
         try:
             # Init miners to be tested
@@ -646,97 +681,93 @@ class Validator:
             valid_validator_hotkeys = self.get_valid_validator_hotkeys()
             self.allocated_hotkeys = self.wandb.get_allocated_hotkeys(valid_validator_hotkeys, True)
 
+            # Pick up changes of config.yaml, the GPU fingerprint index is rebuilt along with it
+            self.config_data = load_yaml_config(self.config_file)
+
             # Settings
             merkle_proof = self.config_data["merkle_proof"]
             retry_limit = merkle_proof.get("pog_retry_limit",30)
             retry_interval = merkle_proof.get("pog_retry_interval",75)
             num_workers = merkle_proof.get("max_workers",32)
-            max_delay = merkle_proof.get("max_random_delay",1200)
-
-            # Random delay for PoG
-            delay = random.uniform(0, max_delay)  # Random delay
-            bt.logging.info(f"💻⏳ Scheduled Proof-of-GPU task to start in {delay:.2f} seconds.")
-            await asyncio.sleep(delay)
+            test_timeout = merkle_proof.get("pog_test_timeout", 300)
+            round_duration = merkle_proof.get("pog_round_duration", 3600)
+            spread_duration = merkle_proof.get("pog_spread_duration", 2400)
+
+            axons = {}
+            for _uid in self.uids:
+                axon = self._queryable_uids.get(_uid)
+                if axon is None:
+                    continue
+                if axon.hotkey in self.allocated_hotkeys:
+                    bt.logging.info(f"Skipping allocated miner: {axon.hotkey}")
+                    continue  # skip this miner since it's allocated
+                axons[axon.hotkey] = axon
+
+            # Plan the first attempts by freshness of the latest results, a round interrupted by a restart is resumed
+            now = time.time()
+            last_results = get_pog_last_results(self.db)
+            round_start, plan = get_pog_schedule(self.db)
+            if round_start is not None and now - round_start < round_duration:
+                # Miners with a result since the start of the round are done, new miners are due now
+                pending = [hotkey for hotkey in axons if last_results.get(hotkey, 0.0) < round_start]
+                plan.update(plan_round([hotkey for hotkey in pending if hotkey not in plan], last_results, now, 0))
+                bt.logging.info(f"💻⏳ Resuming the Proof-of-GPU round started {now - round_start:.0f} seconds ago.")
+            else:
+                round_start = now
+                pending = list(axons)
+                plan = plan_round(pending, last_results, now, spread_duration)
+                bt.logging.info(f"💻⏳ Spreading Proof-of-GPU tests of {len(pending)} miners over {spread_duration} seconds.")
+            save_pog_schedule(self.db, round_start, plan)
 
             bt.logging.info(f"💻 Starting Proof-of-GPU benchmarking for uids: {list(self._queryable_uids.keys())}")
             # Shared dictionary to store results
             self.results = {}
-            # Dictionary to track retry counts
-            retry_counts = defaultdict(int)
-            # Queue of miners to process
-            queue = asyncio.Queue()
-
-            # Initialize the queue with initial miners
-            for i in range(0, len(self.uids), self.validator_challenge_batch_size):
-                for _uid in self.uids[i : i + self.validator_challenge_batch_size]:
-                    try:
-                        axon = self._queryable_uids[_uid]
-                        if axon.hotkey in self.allocated_hotkeys:
-                            bt.logging.info(f"Skipping allocated miner: {axon.hotkey}")
-                            continue  # skip this miner since it's allocated
-                        await queue.put(axon)
-                    except KeyError:
-                        continue
-
-            # Initialize a single Lock for thread-safe updates to results
-            results_lock = asyncio.Lock()
+            # Miners waiting for their next attempt, ordered by due time
+            self.pog_scheduler = RetryScheduler(
+                retry_limit,
+                backoff=merkle_proof.get("pog_retry_backoff"),
+                default_backoff=retry_interval,
+                max_backoff=merkle_proof.get("pog_retry_max_interval", 900),
+                duration=round_duration - (now - round_start),
+            )
+            for hotkey in sorted(pending, key=plan.get):
+                self.pog_scheduler.schedule(axons[hotkey], max(0.0, plan[hotkey] - now))
 
             async def worker():
+                # Workers only pick up due attempts and stop once no miner is left to test
                 while True:
-                    try:
-                        axon = await queue.get()
-                    except asyncio.CancelledError:
+                    axon = await self.pog_scheduler.next()
+                    if axon is None:
                         break
                     hotkey = axon.hotkey
                     try:
-                        # Set a timeout for the GPU test
-                        timeout = 300  # e.g., 5 minutes
-                        # Define a synchronous helper function to run the asynchronous test_miner_gpu
-                        # This is required because run_in_executor expects a synchronous callable.
-                        def run_test_miner_gpu():
-                            # Run the async test_miner_gpu function and wait for its result.
-                            future = asyncio.run_coroutine_threadsafe(self.test_miner_gpu(axon, self.config_data), self.loop)
-                            return future.result()
-
-                        # Submit the run_test_miner_gpu function to a thread pool executor.
-                        # The asyncio.wait_for is used to enforce a timeout for the overall operation.
-                        result = await asyncio.wait_for(
-                            asyncio.get_running_loop().run_in_executor(
-                                self.executor, run_test_miner_gpu
-                            ),
-                            timeout=timeout
+                        # The timeout cancels the test, which still releases the miner
+                        _, gpu_name, num_gpus, failure = await asyncio.wait_for(
+                            self.test_miner_gpu(axon, self.config_data), timeout=test_timeout
                         )
-                        if result[1] is not None and result[2] > 0:
-                            async with results_lock:
-                                self.results[hotkey] = {
-                                    "gpu_name": result[1],
-                                    "num_gpus": result[2]
-                                }
-                            update_pog_stats(self.db, hotkey, result[1], result[2])
-                        else:
-                            raise RuntimeError("GPU test failed")
                     except asyncio.TimeoutError:
-                        bt.logging.warning(f"⏳ Timeout while testing {hotkey}. Retrying...")
-                        retry_counts[hotkey] += 1
-                        if retry_counts[hotkey] < retry_limit:
-                            bt.logging.info(f"🔄 {hotkey}: Retrying miner -> (Attempt {retry_counts[hotkey]})")
-                            await asyncio.sleep(retry_interval)
-                            await queue.put(axon)
-                        else:
-                            bt.logging.info(f"❌ {hotkey}: Miner failed after {retry_limit} attempts (Timeout).")
-                            update_pog_stats(self.db, hotkey, None, None)
+                        bt.logging.warning(f"⏳ Timeout while testing {hotkey}.")
+                        gpu_name, num_gpus, failure = None, 0, FAILURE_TIMEOUT
                     except Exception as e:
                         bt.logging.trace(f"Exception in worker for {hotkey}: {e}")
-                        retry_counts[hotkey] += 1
-                        if retry_counts[hotkey] < retry_limit:
-                            bt.logging.info(f"🔄 {hotkey}: Retrying miner -> (Attempt {retry_counts[hotkey]})")
-                            await asyncio.sleep(retry_interval)
-                            await queue.put(axon)
-                        else:
-                            bt.logging.info(f"❌ {hotkey}: Miner failed after {retry_limit} attempts.")
-                            update_pog_stats(self.db, hotkey, None, None)
-                    finally:
-                        queue.task_done()
+                        gpu_name, num_gpus, failure = None, 0, FAILURE_ERROR
+
+                    if failure is None and gpu_name is not None and num_gpus > 0:
+                        self.pog_scheduler.succeeded(hotkey)
+                        self.results[hotkey] = {
+                            "gpu_name": gpu_name,
+                            "num_gpus": num_gpus
+                        }
+                        update_pog_stats(self.db, hotkey, gpu_name, num_gpus)
+                        continue
+
+                    retry_delay = self.pog_scheduler.failed(axon, failure or FAILURE_ERROR)
+                    if retry_delay is not None:
+                        bt.logging.info(f"🔄 {hotkey}: Retrying miner in {retry_delay:.0f} seconds after {failure} failure.")
+                    else:
+                        attempts = self.pog_scheduler.get_state()[hotkey]["attempts"]
+                        bt.logging.info(f"❌ {hotkey}: Miner failed after {attempts} attempts ({failure}).")
+                        update_pog_stats(self.db, hotkey, None, None)
 
             # Number of concurrent workers
             # Determine a safe default number of workers
@@ -746,16 +777,14 @@ class Validator:
             workers = [asyncio.create_task(worker()) for _ in range(safe_max_workers)]
             bt.logging.trace(f"Started {safe_max_workers} worker tasks for Proof-of-GPU benchmarking.")
 
-            # Wait until the queue is fully processed
-            await queue.join()
-
-            # Cancel worker tasks
-            for w in workers:
-                w.cancel()
-            # Wait until all worker tasks are cancelled
-            await asyncio.gather(*workers, return_exceptions=True)
+            # Workers return once every miner passed or ran out of attempts
+            await asyncio.gather(*workers)
 
             bt.logging.success(f"✅ Proof-of-GPU benchmarking completed.")
+            bt.logging.info(f"💻 Verification engine stats: {self.verification_engine.get_stats()}")
+            bt.logging.info(f"💻 Proof-of-GPU stage timings: {get_pog_timing_percentiles(self.db)}")
+            bt.logging.info(f"💻 Stage executor stats: {self.stage_executor.get_stats()}")
+            bt.logging.info(f"💻 Retry scheduler stats: {self.pog_scheduler.get_stats()}")
             return self.results
         except Exception as e:
             bt.logging.info(f"❌ Exception in proof_of_gpu: {e}\n{traceback.format_exc()}")
@@ -775,31 +804,40 @@ class Validator:
         """
         Allocate, test, and deallocate a single miner.
 
-        :return: Tuple of (miner_hotkey, gpu_name, num_gpus)
+        :return: Tuple of (miner_hotkey, gpu_name, num_gpus, failure), failure is None or one of
+            the failure kinds of pog_scheduler, it sets the backoff of the next attempt.
         """
         allocation_status = False
         miner_info = None
         host = None  # Initialize host variable
+        ssh_client = None
+        session = None
         hotkey = axon.hotkey
+        # Wall time of each stage, stored in pog_timings once the miner is released
+        timer = StageTimer()
         bt.logging.trace(f"{hotkey}: Starting miner test.")
 
         try:
             # Step 0: Init
-            gpu_data = config_data["gpu_performance"]
-            gpu_tolerance_pairs = gpu_data.get("gpu_tolerance_pairs", {})
+            gpu_index = get_gpu_fingerprint_index(self.config_file)
             # Extract Merkle Proof Settings
             merkle_proof = config_data["merkle_proof"]
-            time_tol = merkle_proof.get("time_tolerance",5)
+            # The compute request goes to the running daemon, its startup is not part of the timing
+            time_tol = merkle_proof.get("time_tolerance",2)
+            configured_hash_algorithm = merkle_proof.get("hash_algorithm", "sha256")
+            # Blocking SSH calls give up with the test, so no pool thread outlives it
+            deadline = time.monotonic() + merkle_proof.get("pog_test_timeout", 300)
             # Extract miner_script path
             miner_script_path = merkle_proof["miner_script_path"]
 
             # Step 1: Allocate Miner
             # Generate RSA key pair
-            private_key, public_key = rsa.generate_key_pair()
-            allocation_response = await self.allocate_miner(axon, private_key, public_key)
+            private_key, public_key = await self.stage_executor.run("keygen", rsa.generate_key_pair)
+            with timer.stage("allocation"):
+                allocation_response = await self.allocate_miner(axon, private_key, public_key)
             if not allocation_response:
                 bt.logging.info(f"🌀 {hotkey}: Busy or not allocatable.")
-                return (hotkey, None, 0)
+                return (hotkey, None, 0, FAILURE_BUSY)
             allocation_status = True
             miner_info = allocation_response
             host = miner_info['host']
@@ -809,25 +847,34 @@ class Validator:
             ssh_client = paramiko.SSHClient()
             ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             bt.logging.trace(f"{hotkey}: Connect to Miner via SSH.")
-            ssh_client.connect(host, port=miner_info.get('port', 22), username=miner_info['username'], password=miner_info['password'], timeout=10)
+            with timer.stage("ssh_connect"):
+                await self.stage_executor.run(
+                    "ssh_connect", ssh_client.connect,
+                    host, port=miner_info.get('port', 22), username=miner_info['username'], password=miner_info['password'], timeout=10,
+                )
             if not (ssh_client):
                 ssh_client.close()
                 bt.logging.info(f"{hotkey}: SSH connection failed.")
-                return (hotkey, None, -1)
+                return (hotkey, None, -1, FAILURE_CONNECTION)
             bt.logging.trace(f"{hotkey}: Connected to Miner via SSH.")
 
             # Step 3: Hash Check
-            local_hash = compute_script_hash(miner_script_path)
+            local_hash = await self.stage_executor.run("script_upload", compute_script_hash, miner_script_path)
             bt.logging.trace(f"{hotkey}: [Step 1] Local script hash computed successfully.")
             bt.logging.trace(f"{hotkey}: Local Hash: {local_hash}")
-            remote_hash = send_script_and_request_hash(ssh_client, miner_script_path)
-            if local_hash != remote_hash:
-                bt.logging.info(f"{hotkey}: [Integrity Check] FAILURE: Hash mismatch detected.")
-                raise ValueError(f"{hotkey}: Script integrity verification failed.")
 
             # Step 4: Get GPU info NVIDIA from the remote miner
+            # The miner script runs as a daemon for the remaining steps, all of them share one SSH channel.
+            # The script is uploaded unless the miner already has the current version.
             bt.logging.trace(f"{hotkey}: [Step 4] Retrieving GPU information (NVIDIA driver) from miner...")
-            gpu_info = get_remote_gpu_info(ssh_client)
+            try:
+                session, gpu_info, uploaded = await self.stage_executor.run(
+                    "script_upload", open_miner_script_session, ssh_client, miner_script_path, local_hash, timer, deadline
+                )
+            except ScriptIntegrityError:
+                bt.logging.info(f"{hotkey}: [Integrity Check] FAILURE: Hash mismatch detected.")
+                raise PogTestFailure(FAILURE_INTEGRITY, f"{hotkey}: Script integrity verification failed.")
+            bt.logging.trace(f"{hotkey}: [Integrity Check] Script verified ({'uploaded' if uploaded else 'already on miner'}).")
             num_gpus_reported = gpu_info["num_gpus"]
             gpu_name_reported = gpu_info["gpu_names"][0] if num_gpus_reported > 0 else None
             bt.logging.trace(f"{hotkey}: [Step 4] Reported GPU Information:")
@@ -836,41 +883,63 @@ class Validator:
                 bt.logging.trace(f"{hotkey}: GPU Type: {gpu_name_reported}")
             if num_gpus_reported <= 0:
                 bt.logging.info(f"{hotkey}: No GPUs detected.")
-                raise ValueError("No GPUs detected.")
+                raise PogTestFailure(FAILURE_NO_GPU, "No GPUs detected.")
+            hash_algorithm = select_hash_algorithm(configured_hash_algorithm, gpu_info.get("hash_algorithms", ["sha256"]))
+            bt.logging.trace(f"{hotkey}: Merkle tree hash algorithm: {hash_algorithm}")
 
             # Step 5: Run the benchmarking mode
             bt.logging.info(f"💻 {hotkey}: Executing benchmarking mode.")
             bt.logging.trace(f"{hotkey}: [Step 5] Executing benchmarking mode on the miner...")
-            execution_output = execute_script_on_miner(ssh_client, mode='benchmark')
-            bt.logging.trace(f"{hotkey}: [Step 5] Benchmarking completed.")
-            # Parse the execution output
-            num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32 = parse_benchmark_output(execution_output)
-            bt.logging.trace(f"{hotkey}: [Benchmark Results] Detected {num_gpus} GPU(s) with {vram} GB unfractured VRAM.")
-            bt.logging.trace(f"{hotkey}: FP16 - Matrix Size: {size_fp16}, Execution Time: {time_fp16} s")
-            bt.logging.trace(f"{hotkey}: FP32 - Matrix Size: {size_fp32}, Execution Time: {time_fp32} s")
+            with timer.stage("benchmark"):
+                num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32 = await self.stage_executor.run(
+                    "benchmark",
+                    self.run_miner_benchmark,
+                    hotkey,
+                    session,
+                    warmup=merkle_proof.get("benchmark_warmup", 0),
+                    iterations=merkle_proof.get("benchmark_iterations", 1),
+                    max_seconds=merkle_proof.get("benchmark_max_seconds", 20),
+                )
             # Calculate performance metrics
             fp16_tflops = (2 * size_fp16 ** 3) / time_fp16 / 1e12
             fp32_tflops = (2 * size_fp32 ** 3) / time_fp32 / 1e12
             bt.logging.trace(f"{hotkey}: [Performance Metrics] Calculated TFLOPS:")
             bt.logging.trace(f"{hotkey}: FP16: {fp16_tflops:.2f} TFLOPS")
             bt.logging.trace(f"{hotkey}: FP32: {fp32_tflops:.2f} TFLOPS")
-            gpu_name = identify_gpu(fp16_tflops, fp32_tflops, vram, gpu_data, gpu_name_reported, gpu_tolerance_pairs)
-            bt.logging.trace(f"{hotkey}: [GPU Identification] Based on performance: {gpu_name}")
+
+            # Step 5b: Screening, miners whose benchmark cannot earn a score skip the Merkle challenge
+            if merkle_proof.get("screening", True):
+                gpu_scores = config_data["gpu_performance"].get("gpu_scores", {})
+                candidates = gpu_index.candidates(
+                    fp16_tflops, fp32_tflops, vram, gpu_name_reported, slack=merkle_proof.get("screening_margin", 0.1)
+                )
+                bt.logging.trace(f"{hotkey}: [Screening] Candidate GPUs: {candidates}")
+                if not any(gpu_scores.get(candidate, 0) > 0 for candidate in candidates):
+                    bt.logging.info(f"🔎 {hotkey}: Screened out, no score to earn as {', '.join(candidates)}.")
+                    return (hotkey, None, 0, FAILURE_SCREENED)
+
+            gpu_name, margin = gpu_index.identify(fp16_tflops, fp32_tflops, vram, gpu_name_reported)
+            bt.logging.trace(f"{hotkey}: [GPU Identification] Based on performance: {gpu_name} (margin {margin:.3f})")
 
             # Step 6: Run the Merkle proof mode
             bt.logging.trace(f"{hotkey}: [Step 6] Initiating Merkle Proof Mode.")
             # Step 1: Send seeds and execute compute mode
             n = adjust_matrix_size(vram, element_size=4, buffer_factor=0.10)
             seeds = get_random_seeds(num_gpus)
-            send_seeds(ssh_client, seeds, n)
+            compute_workers = merkle_proof.get("compute_workers", "thread")
+            if compute_workers == "process":
+                # Worker startup is not part of the timed compute phase
+                with timer.stage("worker_startup"):
+                    await self.stage_executor.run("compute", session.start_workers, num_gpus)
             bt.logging.trace(f"{hotkey}: [Step 6] Compute mode executed on miner - Matrix Size: {n}")
             start_time = time.time()
-            execution_output = execute_script_on_miner(ssh_client, mode='compute')
+            root_hashes_list, gpu_timings_list = await self.stage_executor.run(
+                "compute", session.compute, seeds, n, hash_algorithm, compute_workers
+            )
             end_time = time.time()
             elapsed_time = end_time - start_time
+            timer.add("compute", elapsed_time)
             bt.logging.trace(f"{hotkey}: Compute mode execution time: {elapsed_time:.2f} seconds.")
-            # Parse the execution output
-            root_hashes_list, gpu_timings_list = parse_merkle_output(execution_output)
             bt.logging.trace(f"{hotkey}: [Merkle Proof] Root hashes received from GPUs:")
             for gpu_id, root_hash in root_hashes_list:
                 bt.logging.trace(f"{hotkey}: GPU {{gpu_id}}: {{root_hash}}")
@@ -896,30 +965,70 @@ class Validator:
             gpu_timings = {gpu_id: timing for gpu_id, timing in gpu_timings_list}
             n = gpu_timings[0]['n']  # Assuming same n for all GPUs
             indices = {}
-            num_indices = 1
+            num_indices = min(merkle_proof.get("num_challenge_indices", 1), n)
             for gpu_id in range(num_gpus):
-                indices[gpu_id] = [(np.random.randint(0, n), np.random.randint(0, n)) for _ in range(num_indices)]
-            send_challenge_indices(ssh_client, indices)
-            execution_output = execute_script_on_miner(ssh_client, mode='proof')
-            bt.logging.trace(f"{hotkey}: [Merkle Proof] Proof mode executed on miner.")
-            responses = receive_responses(ssh_client, num_gpus)
-            bt.logging.trace(f"{hotkey}: [Merkle Proof] Responses received from miner.")
-
-            verification_passed = verify_responses(seeds, root_hashes, responses, indices, n)
+                rows = np.random.choice(n, size=num_indices, replace=False)
+                indices[gpu_id] = [(i, np.random.randint(0, n)) for i in rows]
+            responses = await self.stage_executor.run("proof", session.proof, indices, num_gpus)
+            for stage, duration in session.proof_timings.items():
+                timer.add(stage, duration)
+            bt.logging.trace(f"{hotkey}: [Merkle Proof] Proof mode executed on miner, responses received.")
+
+            with timer.stage("verification"):
+                verification_passed = await self.verification_engine.verify_responses(
+                    seeds, root_hashes, responses, indices, n, hash_algorithm,
+                    merkle_proof.get("row_check_vectors", 0), merkle_proof.get("row_check_rtol", 1e-5),
+                )
             if verification_passed and timing_passed:
                 bt.logging.info(f"✅ {hotkey}: GPU Identification: Detected {num_gpus} x {gpu_name} GPU(s)")
-                return (hotkey, gpu_name, num_gpus)
+                return (hotkey, gpu_name, num_gpus, None)
             else:
                 bt.logging.info(f"⚠️  {hotkey}: GPU Identification: Aborted due to verification failure")
-                return (hotkey, None, 0)
+                return (hotkey, None, 0, FAILURE_VERIFICATION)
+
+        except MinerScriptTimeout as e:
+            bt.logging.info(f"⏳ {hotkey}: {e}")
+            return (hotkey, None, 0, FAILURE_TIMEOUT)
 
         except Exception as e:
             bt.logging.info(f"❌ {hotkey}: Error testing Miner: {e}")
-            return (hotkey, None, 0)
+            return (hotkey, None, 0, classify_failure(e))
 
         finally:
+            # Closed directly, not behind the stages they unblock: closing the transport wakes
+            # up a pool thread still waiting for the miner
+            if session:
+                session.close()
+            if ssh_client:
+                ssh_client.close()
             if allocation_status and miner_info:
-                await self.deallocate_miner(axon, public_key)
+                with timer.stage("deallocation"):
+                    await self.deallocate_miner(axon, public_key)
+            update_pog_timings(self.db, hotkey, timer.durations)
+
+    def run_miner_benchmark(self, hotkey, session, warmup, iterations, max_seconds):
+        """
+        Run the benchmark mode of the miner script and log its results.
+
+        :return: Tuple of (num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32)
+        """
+        result = session.benchmark(warmup=warmup, iterations=iterations, max_seconds=max_seconds)
+        num_gpus, vram, size_fp16, time_fp16, size_fp32, time_fp32 = result
+        bt.logging.trace(f"{hotkey}: [Step 5] Benchmarking completed.")
+        for device in session.benchmark_details:
+            if "error" in device:
+                bt.logging.trace(f"{hotkey}: {device['device']} benchmark failed: {device['error']}")
+                continue
+            for precision in ("fp16", "fp32"):
+                stats = device[precision]
+                bt.logging.trace(
+                    f"{hotkey}: {device['device']} {precision.upper()} - first {stats['first_s']:.6f} s, median {stats['median_s']:.6f} s, "
+                    f"IQR {stats['p25_s']:.6f}-{stats['p75_s']:.6f} s over {stats['samples']} runs"
+                )
+        bt.logging.trace(f"{hotkey}: [Benchmark Results] Detected {num_gpus} GPU(s) with {vram} GB unfractured VRAM.")
+        bt.logging.trace(f"{hotkey}: FP16 - Matrix Size: {size_fp16}, Execution Time: {time_fp16} s")
+        bt.logging.trace(f"{hotkey}: FP32 - Matrix Size: {size_fp32}, Execution Time: {time_fp32} s")
+        return result
 
     async def allocate_miner(self, axon, private_key, public_key):
         """
@@ -1040,7 +1149,7 @@ class Validator:
                         )
                         if retry_count >= max_retries:
                             bt.logging.trace(f"{axon.hotkey}: Max retries reached for deallocating miner.")
-                        time.sleep(5)
+                        await asyncio.sleep(5)
                 except Exception as e:
                     retry_count += 1
                     bt.logging.trace(
@@ -1049,7 +1158,7 @@ class Validator:
                     )
                     if retry_count >= max_retries:
                         bt.logging.trace(f"{axon.hotkey}: Max retries reached for deallocating miner.")
-                    time.sleep(5)
+                    await asyncio.sleep(5)
         except Exception as e:
             bt.logging.trace(f"{axon.hotkey}: Unexpected error during deallocation: {e}")
 
@@ -1192,6 +1301,7 @@ class Validator:
             # If the user interrupts the program, gracefully exit.
             except KeyboardInterrupt:
                 self.db.close()
+                self.verification_engine.shutdown(wait=False)
                 bt.logging.success("Keyboard interrupt detected. Exiting validator.")
                 exit()
 
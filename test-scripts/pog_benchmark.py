@@ -0,0 +1,57 @@
+"""
+Benchmarks for Proof-of-GPU, the parity checks are in tests/.
+
+The benchmarks live in pog_benchmarks/, one module per area:
+    verification  validator-side checks of the responses
+    miner         phases of the miner script, on the CPU or on a GPU
+    scheduling    simulated scheduling of the tests of one round
+    sync          score and validator set synchronization of the validator
+
+Run from the repository root, with the repository on PYTHONPATH:
+
+Verification:
+    python test-scripts/pog_benchmark.py prng --sizes 8192 16384 32768 65536
+    python test-scripts/pog_benchmark.py indices --size 16384 --indices 1 2 4 8 16 32
+    python test-scripts/pog_benchmark.py hashes --sizes 2048 4096 8192
+    python test-scripts/pog_benchmark.py rowcheck --sizes 2048 8192 32768 65536 --vectors 4
+    python test-scripts/pog_benchmark.py suite --output pog_baseline.json
+    python test-scripts/pog_benchmark.py suite --compare pog_baseline.json --threshold 0.2
+
+Miner script:
+    python test-scripts/pog_benchmark.py transfer --sizes 2048 4096 8192 --device cpu
+    python test-scripts/pog_benchmark.py rows --sizes 4096 8192 16384 --num-indices 8
+    python test-scripts/pog_benchmark.py matrix --sizes 2048 4096 8192
+    python test-scripts/pog_benchmark.py tree --sizes 1024 2048 4096 8192 --leaves 65536 262144 1048576
+    python test-scripts/pog_benchmark.py compute --size 2048 --devices 1 2 4 --device cpu
+    python test-scripts/pog_benchmark.py cycle --virtual-gpus 1 2 --virtual-vram 0.5 --workers process
+
+Scheduling:
+    python test-scripts/pog_benchmark.py screening --miners 256 --noise 0.05 --slack 0.1
+    python test-scripts/pog_benchmark.py looplag --miners 64 --config config.yaml
+    python test-scripts/pog_benchmark.py retries --miners 256 --workers 32 --dead 0.2 --flaky 0.2
+    python test-scripts/pog_benchmark.py spread --miners 256 --workers 32 --spread 2400
+
+Synchronization:
+    python test-scripts/pog_benchmark.py scores --uids 256 4096 --config config.yaml
+    python test-scripts/pog_benchmark.py validators --uids 256 --validators 64 --calls-per-block 3
+
+Use `python test-scripts/pog_benchmark.py <command> --help` for all options of a command.
+"""
+
+import argparse
+
+from pog_benchmarks import miner, scheduling, sync, verification
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for Proof-of-GPU.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for module in (verification, miner, scheduling, sync):
+        module.add_commands(subparsers)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
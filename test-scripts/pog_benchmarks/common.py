@@ -0,0 +1,140 @@
+"""
+Timing helpers and synthetic PoG data shared by the benchmarks.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import time
+
+import numpy as np
+
+from neurons.Validator.pog_verify import generate_prng_vectors
+
+
+# One PoG epoch is 360 blocks of 12 seconds
+EPOCH_SECONDS = 360 * 12
+
+MINER_SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "neurons", "Validator", "miner_script_m_merkletree.py"
+)
+
+
+def time_call(func, repeat=3):
+    """Return the best wall time of `repeat` calls of func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def read_rss_mb(field):
+    """Read VmRSS (current) or VmHWM (peak) resident set size of the process, in MB."""
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not found in /proc/self/status")
+
+
+def start_rss_tracking():
+    """Reset the peak RSS of the process to its current RSS and return the latter in MB."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    return read_rss_mb("VmRSS")
+
+
+def peak_rss_growth_mb(rss_before):
+    """Peak RSS since start_rss_tracking minus the RSS at that time, in MB."""
+    return read_rss_mb("VmHWM") - rss_before
+
+
+def measure(func, repeat=5, number=1):
+    """
+    Time `repeat` samples of `number` calls of func.
+
+    :return: Dictionary with the median, minimum and maximum time per call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start_time) / number)
+    return {
+        "median_s": float(np.median(samples)),
+        "min_s": float(np.min(samples)),
+        "max_s": float(np.max(samples)),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def make_synthetic_gpu(n, num_indices, rng):
+    """
+    Build seeds, root hash, challenge indices and a valid miner response for one GPU.
+
+    Only the challenged rows of C are materialized, the value at each challenged
+    (i, j) is the true dot product and the other leaves are random hashes.
+    """
+    from neurons.Validator.miner_script_m_merkletree import build_merkle_tree_levels, get_merkle_proof_row
+
+    seeds = (secrets.randbits(64), secrets.randbits(64))
+    rows = rng.choice(n, size=num_indices, replace=False)
+    cols = rng.integers(0, n, size=num_indices)
+    indices = [(int(i), int(j)) for i, j in zip(rows, cols)]
+
+    A_rows = generate_prng_vectors(seeds[0], rows, n)
+    B_cols = generate_prng_vectors(seeds[1], cols, n)
+    C_rows = rng.random((num_indices, n), dtype=np.float32)
+    C_rows[np.arange(num_indices), cols] = np.einsum("kn,kn->k", A_rows, B_cols)
+
+    leaves = [rng.bytes(32) for _ in range(n)]
+    for row, i in zip(C_rows, rows):
+        leaves[i] = hashlib.sha256(row.tobytes()).digest()
+    root_hash, tree = build_merkle_tree_levels(leaves)
+
+    response = {
+        "rows": list(C_rows),
+        "proofs": [get_merkle_proof_row(tree, int(i), n) for i in rows],
+        "indices": indices,
+    }
+    return seeds, root_hash.hex(), response, indices
+
+
+def make_miner_gpu(n, num_indices, rng):
+    """
+    Same contract as make_synthetic_gpu, but runs the full miner script pipeline on
+    CPU: PRNG matrices, matmul and the Merkle tree over every row of C.
+    """
+    from neurons.Validator.miner_script_m_merkletree import build_merkle_tree_rows, generate_matrix_torch, get_merkle_proof_row
+
+    seeds = (secrets.randbits(64), secrets.randbits(64))
+    rows = rng.choice(n, size=num_indices, replace=False)
+    indices = [(int(i), int(j)) for i, j in zip(rows, rng.integers(0, n, size=num_indices))]
+
+    C = (generate_matrix_torch(seeds[0], n) @ generate_matrix_torch(seeds[1], n)).cpu().numpy()
+    root_hash, tree = build_merkle_tree_rows(C)
+
+    response = {
+        "rows": [C[i, :] for i, _ in indices],
+        "proofs": [get_merkle_proof_row(tree, i, n) for i, _ in indices],
+        "indices": indices,
+    }
+    return seeds, root_hash.hex(), response, indices
+
+
+def make_compute_reply(num_gpus, n):
+    """Build the daemon reply of the miner script to the compute command for num_gpus GPUs."""
+    root_hashes = [(gpu_id, secrets.token_hex(32)) for gpu_id in range(num_gpus)]
+    gpu_timings = [
+        (gpu_id, {"generation_time": 0.5, "n": n, "multiplication_time": 1.0, "transfer_back_time": 0.5, "merkle_tree_time": 2.0})
+        for gpu_id in range(num_gpus)
+    ]
+    return (json.dumps({"ok": True, "result": {"root_hashes": root_hashes, "timings": gpu_timings}}) + "\n").encode()
@@ -0,0 +1,416 @@
+"""
+Benchmarks of the miner script phases, on the CPU or on a GPU.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import secrets
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from neurons.Validator.pog import MinerScriptSession, adjust_matrix_size, get_random_seeds, verify_responses
+from neurons.Validator.pog_verify import HASH_FUNCTIONS
+from pog_benchmarks.common import MINER_SCRIPT_PATH, peak_rss_growth_mb, start_rss_tracking, time_call
+
+
+def run_transfer_variant(variant, n, device):
+    """
+    Move a random n x n result matrix to host memory and hash its rows, in a fresh process.
+
+    :return: (root hash, wall time in seconds, peak RSS growth in MB)
+    """
+    import torch
+
+    from neurons.Validator.miner_script_m_merkletree import build_merkle_tree_levels, build_merkle_tree_rows, transfer_and_hash_rows
+
+    C_torch = torch.rand((n, n), dtype=torch.float32, generator=torch.Generator().manual_seed(n)).to(device)
+    rss_before = start_rss_tracking()
+    start_time = time.perf_counter()
+    if variant == "copy then hash":
+        # Whole copy into fresh host memory, as C_torch.cpu().numpy() does for a device tensor
+        C = C_torch.cpu().numpy().copy() if device == "cpu" else C_torch.cpu().numpy()
+        root_hash, _ = build_merkle_tree_rows(C)
+    else:
+        out = np.empty((n, n), dtype=np.float32)
+        C, leaves = transfer_and_hash_rows(C_torch, out=out)
+        root_hash, _ = build_merkle_tree_levels(leaves)
+    return root_hash, time.perf_counter() - start_time, peak_rss_growth_mb(rss_before)
+
+
+def bench_transfer(sizes, device="cpu"):
+    """
+    Compare the whole-matrix device-to-host copy followed by row hashing with the
+    pipelined block transfer of the miner script. Every run uses its own process so
+    that the peak RSS growth of each variant is measured separately.
+    """
+    context = multiprocessing.get_context("spawn")
+    print(f"device = {device}")
+    print(f"{'n':>6} | {'variant':>15} | {'wall (s)':>9} | {'peak RSS +MB':>12} | {'C (MB)':>7}")
+    for n in sizes:
+        roots = set()
+        for variant in ("copy then hash", "pipelined"):
+            with context.Pool(1) as pool:
+                root_hash, wall_time, rss_growth = pool.apply(run_transfer_variant, (variant, n, device))
+            roots.add(root_hash)
+            print(f"{n:>6} | {variant:>15} | {wall_time:>9.4f} | {rss_growth:>12.1f} | {n * n * 4 / 2**20:>7.1f}")
+        if len(roots) != 1:
+            print(f"[transfer] Root hash mismatch for n={n}.")
+            sys.exit(1)
+
+
+def run_rows_variant(path, mmap_mode, rows):
+    """
+    Read the challenged rows of a saved result matrix, in a fresh process.
+
+    :return: (rows, wall time in seconds, peak RSS growth in MB)
+    """
+    rss_before = start_rss_tracking()
+    start_time = time.perf_counter()
+    C = np.load(path, mmap_mode=mmap_mode)
+    selected = np.array(C[rows, :])
+    return selected, time.perf_counter() - start_time, peak_rss_growth_mb(rss_before)
+
+
+def bench_rows(sizes, num_indices=8, directory="/dev/shm"):
+    """
+    Compare loading the whole result matrix with memory-mapping it to read the
+    challenged rows, as the miner script does in proof mode.
+    """
+    import tempfile
+
+    context = multiprocessing.get_context("spawn")
+    rng = np.random.default_rng()
+    directory = directory if os.path.isdir(directory) else None
+    print(f"{'n':>6} | {'load':>5} | {'wall (s)':>9} | {'peak RSS +MB':>12} | {'C (MB)':>7}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            path = os.path.join(tmp, "C.npy")
+            C = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, n))
+            C[:] = rng.random((n, n), dtype=np.float32)
+            C.flush()
+            del C
+            rows = sorted(rng.choice(n, size=num_indices, replace=False).tolist())
+            results = []
+            for mmap_mode in (None, "r"):
+                with context.Pool(1) as pool:
+                    selected, wall_time, rss_growth = pool.apply(run_rows_variant, (path, mmap_mode, rows))
+                results.append(selected)
+                print(f"{n:>6} | {'mmap' if mmap_mode else 'full':>5} | {wall_time:>9.4f} | {rss_growth:>12.1f} | {n * n * 4 / 2**20:>7.1f}")
+            if not np.array_equal(results[0], results[1]):
+                print(f"[rows] Row mismatch for n={n}.")
+                sys.exit(1)
+
+
+def generate_matrix_torch_n2(s, n):
+    """
+    Previous PRNG matrix generation of the miner script with two n^2 int64 index
+    tensors, kept as the reference for the matrix benchmark.
+    """
+    import torch
+
+    from neurons.Validator.miner_script_m_merkletree import xorshift32_torch
+
+    dtype = torch.int64
+    i_indices = torch.arange(n, dtype=dtype).repeat_interleave(n)
+    j_indices = torch.arange(n, dtype=dtype).repeat(n)
+    s_signed = (s + 2**63) % 2**64 - 2**63
+    s_tensor = torch.tensor(s_signed, dtype=dtype)
+    i_mod = i_indices % (2**32)
+    states = (s_tensor + i_mod + j_indices) & 0xFFFFFFFF
+    for _ in range(10):
+        states = xorshift32_torch(states)
+    return (states.float() / float(0xFFFFFFFF)).reshape(n, n)
+
+
+def run_matrix_variant(variant, s, n):
+    """
+    Generate one PRNG matrix on CPU, in a fresh process.
+
+    :return: (SHA-256 of the matrix, wall time in seconds, peak RSS growth in MB)
+    """
+    from neurons.Validator.miner_script_m_merkletree import generate_matrix_torch
+
+    generate = generate_matrix_torch_n2 if variant == "n^2 indices" else generate_matrix_torch
+    rss_before = start_rss_tracking()
+    start_time = time.perf_counter()
+    matrix = generate(s, n)
+    wall_time = time.perf_counter() - start_time
+    rss_growth = peak_rss_growth_mb(rss_before)
+    return hashlib.sha256(matrix.numpy().tobytes()).hexdigest(), wall_time, rss_growth
+
+
+def bench_matrix(sizes):
+    """
+    Compare the miner's PRNG matrix generation with the previous n^2 index tensor
+    implementation: wall time, peak RSS growth and bit-identical output.
+    """
+    context = multiprocessing.get_context("spawn")
+    print(f"{'n':>6} | {'variant':>12} | {'wall (s)':>9} | {'peak RSS +MB':>12} | {'output (MB)':>11}")
+    for n in sizes:
+        s = secrets.randbits(64)
+        digests = set()
+        for variant in ("n^2 indices", "broadcast"):
+            with context.Pool(1) as pool:
+                digest, wall_time, rss_growth = pool.apply(run_matrix_variant, (variant, s, n))
+            digests.add(digest)
+            print(f"{n:>6} | {variant:>12} | {wall_time:>9.4f} | {rss_growth:>12.1f} | {n * n * 4 / 2**20:>11.1f}")
+        if len(digests) != 1:
+            print(f"[matrix] Output mismatch for n={n}, seed={s}.")
+            sys.exit(1)
+
+
+def build_merkle_tree_per_level_pool(C=None, hash_func=hashlib.sha256, num_threads=8, leaves=None):
+    """
+    Previous Merkle tree construction of the miner script with a new ThreadPool per
+    level and one task per row or sibling pair, kept as the reference for the tree benchmark.
+    """
+    from multiprocessing.pool import ThreadPool
+
+    from neurons.Validator.miner_script_m_merkletree import merkle_level_offsets
+
+    if leaves is None:
+        with ThreadPool(num_threads) as pool:
+            leaves = pool.map(lambda i: hash_func(C[i, :].tobytes()).digest(), range(C.shape[0]))
+
+    levels = merkle_level_offsets(len(leaves))
+    tree = np.empty((levels[-1][0] + 1, 32), dtype=np.uint8)
+    tree[:len(leaves)] = np.frombuffer(b"".join(leaves), dtype=np.uint8).reshape(len(leaves), 32)
+    for (offset, num_nodes), (parent_offset, num_parents) in zip(levels, levels[1:]):
+        level = tree[offset:offset + num_nodes]
+
+        def hash_pair(i):
+            if i + 1 < num_nodes:
+                return hash_func(level[i:i + 2]).digest()
+            return hash_func(level[i].tobytes() * 2).digest()
+
+        with ThreadPool(num_threads) as pool:
+            new_level = pool.map(hash_pair, range(0, num_nodes, 2))
+        tree[parent_offset:parent_offset + num_parents] = np.frombuffer(b"".join(new_level), dtype=np.uint8).reshape(num_parents, 32)
+    return tree[-1].tobytes(), tree
+
+
+def bench_tree(sizes, leaf_counts, repeat=3):
+    """
+    Compare the per-level thread pools of the previous Merkle tree construction with
+    the persistent hashing engine, for full n x n matrices and for the interior levels
+    of large trees alone.
+    """
+    from neurons.Validator.miner_script_m_merkletree import build_merkle_tree_levels, build_merkle_tree_rows, get_hashing_engine
+
+    rng = np.random.default_rng()
+    engine = get_hashing_engine()
+    print(f"hashing threads = {engine.num_threads}")
+    print(f"{'n':>8} | {'per-level pools (s)':>19} | {'engine (s)':>10} | {'engine leaves (s)':>17} | {'speedup':>7}")
+    for n in sizes:
+        C = rng.random((n, n), dtype=np.float32)
+        if build_merkle_tree_per_level_pool(C)[0] != build_merkle_tree_rows(C)[0]:
+            print(f"[tree] Root hash mismatch for n={n}.")
+            sys.exit(1)
+        reference_time = time_call(lambda: build_merkle_tree_per_level_pool(C), repeat=repeat)
+        engine_time = time_call(lambda: build_merkle_tree_rows(C), repeat=repeat)
+        leaves_time = time_call(lambda: engine.hash_rows(C), repeat=repeat)
+        print(f"{n:>8} | {reference_time:>19.4f} | {engine_time:>10.4f} | {leaves_time:>17.4f} | {reference_time / engine_time:>6.1f}x")
+
+    print(f"{'leaves':>8} | {'per-level pools (s)':>19} | {'inline levels (s)':>17} | {'speedup':>7}")
+    for num_leaves in leaf_counts:
+        leaves = [rng.bytes(32) for _ in range(num_leaves)]
+        if build_merkle_tree_per_level_pool(leaves=leaves)[0] != build_merkle_tree_levels(leaves)[0]:
+            print(f"[tree] Root hash mismatch for {num_leaves} leaves.")
+            sys.exit(1)
+        reference_time = time_call(lambda: build_merkle_tree_per_level_pool(leaves=leaves), repeat=repeat)
+        levels_time = time_call(lambda: build_merkle_tree_levels(leaves), repeat=repeat)
+        print(f"{num_leaves:>8} | {reference_time:>19.4f} | {levels_time:>17.4f} | {reference_time / levels_time:>6.1f}x")
+
+
+def bench_compute(n, device_counts, device="cpu", repeat=3):
+    """
+    Compare the compute phase with one thread per device against one worker process
+    per device, on `k` copies of the given device. Worker startup is timed apart.
+    """
+    import torch
+    from neurons.Validator.miner_script_m_merkletree import run_compute, start_device_workers
+
+    print(f"{'devices':>7} | {'threads (s)':>11} | {'startup (s)':>11} | {'processes (s)':>13} | {'speedup':>7}")
+    for k in device_counts:
+        devices = [torch.device(device)] * k
+        seeds = get_random_seeds(k)
+        thread_roots, _ = run_compute(n, seeds, "sha256", artifacts={}, devices=devices, workers="thread")
+        start = time.perf_counter()
+        start_device_workers(k)
+        startup_time = time.perf_counter() - start
+        process_roots, _ = run_compute(n, seeds, "sha256", devices=devices, workers="process")
+        if dict(process_roots) != dict(thread_roots):
+            print(f"[compute] Root hash mismatch for {k} devices.")
+            sys.exit(1)
+        thread_time = time_call(
+            lambda: run_compute(n, seeds, "sha256", artifacts={}, devices=devices, workers="thread"), repeat=repeat
+        )
+        process_time = time_call(lambda: run_compute(n, seeds, "sha256", devices=devices, workers="process"), repeat=repeat)
+        print(f"{k:>7} | {thread_time:>11.4f} | {startup_time:>11.4f} | {process_time:>13.4f} | {thread_time / process_time:>6.1f}x")
+
+
+class LocalChannel:
+    """
+    Subset of the paramiko channel used by MinerScriptSession, backed by a local
+    subprocess running the miner script with this interpreter.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.process = None
+
+    def exec_command(self, command):
+        args = shlex.split(command)
+        args[0] = sys.executable
+        args[1] = MINER_SCRIPT_PATH
+        # Progress messages go to a file, a full stderr pipe would block the script
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self.stderr, env=self.env)
+
+    def makefile_stdin(self, mode):
+        return self.process.stdin
+
+    def makefile(self, mode):
+        return self.process.stdout
+
+    def recv_stderr_ready(self):
+        return self.process.poll() is not None
+
+    def recv_stderr(self, size):
+        self.stderr.seek(0)
+        return self.stderr.read()[-size:]
+
+    def settimeout(self, timeout):
+        # Local pipes, the benchmark runs without deadline
+        pass
+
+    def shutdown_write(self):
+        self.process.stdin.close()
+
+    def close(self):
+        self.process.wait()
+        self.stderr.close()
+
+
+class LocalClient:
+    """SSH client stand-in whose sessions run the miner script locally."""
+
+    def __init__(self, env):
+        self.env = env
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return LocalChannel(self.env)
+
+
+def run_cycle(virtual_gpus, virtual_vram, hash_algorithm="sha256", workers="thread", num_indices=1, device="cpu"):
+    """
+    Run gpu_info, benchmark, compute and proof through the miner script daemon on local
+    virtual GPUs, then verify the responses as the validator does.
+
+    Returns:
+        dict: Wall time of each phase, matrix size and verification result.
+    """
+    with tempfile.TemporaryDirectory() as artifacts_dir:
+        env = dict(
+            os.environ,
+            POG_DEVICE=device,
+            POG_VIRTUAL_GPUS=str(virtual_gpus),
+            POG_VIRTUAL_VRAM=str(virtual_vram),
+            POG_ARTIFACTS_DIR=artifacts_dir,
+        )
+        result = {"virtual_gpus": virtual_gpus, "virtual_vram": virtual_vram, "workers": workers}
+        with MinerScriptSession(LocalClient(env)) as session:
+            start_time = time.perf_counter()
+            gpu_info = session.gpu_info()
+            result["gpu_info_s"] = time.perf_counter() - start_time
+            num_gpus = gpu_info["num_gpus"]
+
+            start_time = time.perf_counter()
+            _, vram, _, time_fp16, _, time_fp32 = session.benchmark()
+            result["benchmark_s"] = time.perf_counter() - start_time
+            result["time_fp16"], result["time_fp32"] = time_fp16, time_fp32
+
+            n = adjust_matrix_size(vram, element_size=4, buffer_factor=0.10)
+            seeds = get_random_seeds(num_gpus)
+            if workers == "process":
+                session.start_workers(num_gpus)
+            start_time = time.perf_counter()
+            root_hashes_list, gpu_timings_list = session.compute(seeds, n, hash_algorithm, workers)
+            result["compute_s"] = time.perf_counter() - start_time
+            result["n"] = n
+
+            root_hashes = dict(root_hashes_list)
+            indices = {}
+            for gpu_id in range(num_gpus):
+                rows = np.random.choice(n, size=min(num_indices, n), replace=False)
+                indices[gpu_id] = [(int(i), int(np.random.randint(0, n))) for i in rows]
+            start_time = time.perf_counter()
+            responses = session.proof(indices, num_gpus)
+            result["proof_s"] = time.perf_counter() - start_time
+            result.update({f"{stage}_s": duration for stage, duration in session.proof_timings.items()})
+
+            start_time = time.perf_counter()
+            result["verified"] = bool(verify_responses(seeds, root_hashes, responses, indices, n, hash_algorithm, row_check_vectors=4))
+            result["verify_s"] = time.perf_counter() - start_time
+    return result
+
+
+def bench_cycle(virtual_gpus, virtual_vram, hash_algorithm, workers, num_indices):
+    """Full PoG cycle on virtual GPUs backed by the CPU, one line per GPU count."""
+    print(f"{'gpus':>4} | {'n':>6} | {'gpu_info (s)':>12} | {'benchmark (s)':>13} | {'compute (s)':>11} | {'proof (s)':>9} | {'verify (s)':>10} | verified")
+    for k in virtual_gpus:
+        r = run_cycle(k, virtual_vram, hash_algorithm, workers, num_indices)
+        print(
+            f"{k:>4} | {r['n']:>6} | {r['gpu_info_s']:>12.4f} | {r['benchmark_s']:>13.4f} | {r['compute_s']:>11.4f} | "
+            f"{r['proof_s']:>9.4f} | {r['verify_s']:>10.4f} | {r['verified']}"
+        )
+        if not r["verified"]:
+            print(f"[cycle] Verification failed for {k} virtual GPUs.")
+            sys.exit(1)
+
+
+def add_commands(subparsers):
+    """Register the subcommands of this module."""
+    transfer_parser = subparsers.add_parser("transfer", help="Pipelined device-to-host transfer and row hashing (miner side).")
+    transfer_parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096, 8192])
+    transfer_parser.add_argument("--device", type=str, default="cpu")
+    transfer_parser.set_defaults(run=lambda args: bench_transfer(args.sizes, device=args.device))
+
+    rows_parser = subparsers.add_parser("rows", help="Full load vs memory-mapped read of the challenged rows (miner side).")
+    rows_parser.add_argument("--sizes", type=int, nargs="+", default=[4096, 8192, 16384])
+    rows_parser.add_argument("--num-indices", type=int, default=8)
+    rows_parser.set_defaults(run=lambda args: bench_rows(args.sizes, num_indices=args.num_indices))
+
+    matrix_parser = subparsers.add_parser("matrix", help="PRNG matrix generation vs the n^2 index implementation (miner side).")
+    matrix_parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096, 8192])
+    matrix_parser.set_defaults(run=lambda args: bench_matrix(args.sizes))
+
+    tree_parser = subparsers.add_parser("tree", help="Per-level thread pools vs the persistent hashing engine (miner side).")
+    tree_parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 2048, 4096, 8192])
+    tree_parser.add_argument("--leaves", type=int, nargs="+", default=[65536, 262144, 1048576])
+    tree_parser.add_argument("--repeat", type=int, default=3)
+    tree_parser.set_defaults(run=lambda args: bench_tree(args.sizes, args.leaves, repeat=args.repeat))
+
+    compute_parser = subparsers.add_parser("compute", help="Per-device threads vs worker processes for compute (miner side).")
+    compute_parser.add_argument("--size", type=int, default=2048)
+    compute_parser.add_argument("--devices", type=int, nargs="+", default=[1, 2, 4])
+    compute_parser.add_argument("--device", type=str, default="cpu")
+    compute_parser.add_argument("--repeat", type=int, default=3)
+    compute_parser.set_defaults(run=lambda args: bench_compute(args.size, args.devices, device=args.device, repeat=args.repeat))
+
+    cycle_parser = subparsers.add_parser("cycle", help="Full miner script cycle on virtual GPUs backed by the CPU.")
+    cycle_parser.add_argument("--virtual-gpus", type=int, nargs="+", default=[1, 2])
+    cycle_parser.add_argument("--virtual-vram", type=float, default=0.5, help="Memory of each virtual GPU in GB.")
+    cycle_parser.add_argument("--hash", type=str, default="sha256", choices=sorted(HASH_FUNCTIONS))
+    cycle_parser.add_argument("--workers", type=str, default="thread", choices=["thread", "process"])
+    cycle_parser.add_argument("--num-indices", type=int, default=1)
+    cycle_parser.set_defaults(run=lambda args: bench_cycle(args.virtual_gpus, args.virtual_vram, args.hash, args.workers, args.num_indices))
@@ -0,0 +1,306 @@
+"""
+Simulations of the scheduling of the PoG tests of one round.
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from neurons.Validator.pog import get_gpu_fingerprint_index, load_yaml_config
+from neurons.Validator.pog_scheduler import FAILURE_CONNECTION, RetryScheduler, plan_round
+
+
+def bench_screening(num_miners, noise, slack, benchmark_s, challenge_s, config_file="config.yaml", seed=0):
+    """
+    Simulate one epoch of miners drawn uniformly from the configured GPU models, measured
+    with relative noise, and estimate the miner time saved by screening the benchmark
+    results before the Merkle challenge.
+    """
+    config_data = load_yaml_config(config_file)
+    gpu_scores = config_data["gpu_performance"].get("gpu_scores", {})
+    index = get_gpu_fingerprint_index(config_file)
+    rng = np.random.default_rng(seed)
+    models = rng.integers(len(index.names), size=num_miners)
+    measurements = index.fingerprints[models] * rng.normal(1.0, noise, size=(num_miners, 3))
+
+    start_time = time.perf_counter()
+    screened_out = np.array([
+        not any(gpu_scores.get(name, 0) > 0 for name in index.candidates(*m, reported_name=index.names[i], slack=slack))
+        for i, m in zip(models, measurements)
+    ])
+    screening_time = time.perf_counter() - start_time
+    scoring = np.array([gpu_scores.get(index.names[i], 0) > 0 for i in models])
+
+    full_time = num_miners * (benchmark_s + challenge_s)
+    two_phase_time = num_miners * benchmark_s + (~screened_out).sum() * challenge_s
+    print(f"miners = {num_miners}, noise = {noise:.0%}, slack = {slack}")
+    print(f"screened out: {screened_out.sum()} of {(~scoring).sum()} without score, {(screened_out & scoring).sum()} scoring miners lost")
+    print(f"miner time per epoch: {full_time / 3600:.2f} h full, {two_phase_time / 3600:.2f} h two-phase ({two_phase_time / full_time:.0%})")
+    print(f"validator screening cost: {screening_time * 1e6 / num_miners:.1f} us per miner")
+
+
+# Blocking seconds of each SSH stage of a simulated slow miner, before scaling
+SIMULATED_STAGES = [
+    ("keygen", 0.1),
+    ("ssh_connect", 0.5),
+    ("script_upload", 0.4),
+    ("benchmark", 3.0),
+    ("compute", 4.0),
+    ("proof", 0.5),
+]
+
+
+async def run_simulated_tests(num_miners, scale, mode, limits=None, tick=0.01, seed=0):
+    """
+    Run num_miners simulated PoG tests concurrently and sample the event loop lag.
+
+    mode 'loop' makes the blocking calls on the event loop, as when test_miner_gpu was
+    scheduled back onto the loop. mode 'threads' runs them through the StageExecutor.
+    """
+    from neurons.Validator.pog_engine import StageExecutor
+
+    rng = np.random.default_rng(seed)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=num_miners)
+    stage_executor = StageExecutor(executor, limits)
+
+    async def run_blocking(stage, func, *args):
+        if mode == "loop":
+            return func(*args)
+        return await stage_executor.run(stage, func, *args)
+
+    async def simulated_test(durations):
+        # Allocation and deallocation are dendrite queries, awaited on the loop
+        await asyncio.sleep(0.2 * scale)
+        for (stage, _), seconds in zip(SIMULATED_STAGES, durations):
+            await run_blocking(stage, time.sleep, seconds)
+        await asyncio.sleep(0.2 * scale)
+
+    lags = []
+    done = asyncio.Event()
+
+    async def monitor():
+        while not done.is_set():
+            start_time = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - start_time - tick)
+
+    base = np.array([seconds for _, seconds in SIMULATED_STAGES]) * scale
+    monitor_task = asyncio.create_task(monitor())
+    start_time = time.perf_counter()
+    await asyncio.gather(*[simulated_test(base * rng.uniform(0.5, 1.5, size=len(base))) for _ in range(num_miners)])
+    wall_time = time.perf_counter() - start_time
+    done.set()
+    await monitor_task
+    executor.shutdown(wait=True)
+    return wall_time, np.array(lags)
+
+
+def bench_looplag(num_miners, scale, limits):
+    """Event loop lag and wall time of concurrent simulated PoG tests."""
+    print(f"miners = {num_miners}, blocking time per test = {sum(s for _, s in SIMULATED_STAGES) * scale:.2f} s")
+    print(f"{'mode':>8} | {'wall (s)':>8} | {'lag p50 (ms)':>12} | {'lag p99 (ms)':>12} | {'lag max (ms)':>12}")
+    for mode in ("loop", "threads"):
+        wall_time, lags = asyncio.run(run_simulated_tests(num_miners, scale, mode, limits))
+        p50, p99 = np.percentile(lags * 1000, [50, 99]) if len(lags) else (0.0, 0.0)
+        lag_max = lags.max() * 1000 if len(lags) else 0.0
+        print(f"{mode:>8} | {wall_time:>8.2f} | {p50:>12.2f} | {p99:>12.2f} | {lag_max:>12.2f}")
+
+
+def simulated_miners(num_miners, dead_fraction, flaky_fraction, seed=0):
+    """Hotkey to the number of failures before each simulated miner passes (None: never)."""
+    rng = np.random.default_rng(seed)
+    kinds = rng.random(num_miners)
+    return {
+        f"miner-{uid}": None if kind < dead_fraction else int(rng.integers(1, 4)) if kind < dead_fraction + flaky_fraction else 0
+        for uid, kind in enumerate(kinds)
+    }
+
+
+async def run_retry_round(miners, mode, num_workers, retry_limit, retry_interval, test_seconds, round_seconds, scale):
+    """
+    One simulated PoG round: sleeping workers re-queueing after retry_interval, or the
+    retry scheduler. Times are in simulated seconds.
+
+    :return: Round time, completion time per passed miner and worker time spent sleeping.
+    """
+    start = time.monotonic()
+    completed = {}
+    slept = 0.0
+    failures = {hotkey: 0 for hotkey in miners}
+
+    def attempt(hotkey):
+        fails = miners[hotkey]
+        if fails is not None and failures[hotkey] >= fails:
+            completed[hotkey] = (time.monotonic() - start) / scale
+            return True
+        failures[hotkey] += 1
+        return False
+
+    if mode == "sleep":
+        queue = asyncio.Queue()
+        for hotkey in miners:
+            queue.put_nowait((hotkey, 1))
+
+        async def worker():
+            nonlocal slept
+            while True:
+                hotkey, attempts = await queue.get()
+                await asyncio.sleep(test_seconds * scale)
+                if not attempt(hotkey) and attempts < retry_limit:
+                    await asyncio.sleep(retry_interval * scale)
+                    slept += retry_interval
+                    queue.put_nowait((hotkey, attempts + 1))
+                queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(num_workers)]
+        await queue.join()
+        for task in workers:
+            task.cancel()
+    else:
+        backoff = {FAILURE_CONNECTION: retry_interval * scale}
+        scheduler = RetryScheduler(
+            retry_limit, backoff=backoff, max_backoff=15 * retry_interval * scale, duration=round_seconds * scale
+        )
+        for hotkey in miners:
+            scheduler.schedule(type("Axon", (), {"hotkey": hotkey})())
+
+        async def worker():
+            while (axon := await scheduler.next()) is not None:
+                await asyncio.sleep(test_seconds * scale)
+                if attempt(axon.hotkey):
+                    scheduler.succeeded(axon.hotkey)
+                else:
+                    scheduler.failed(axon, FAILURE_CONNECTION)
+
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+    return (time.monotonic() - start) / scale, completed, slept
+
+
+def bench_retries(
+    num_miners, num_workers, dead_fraction, flaky_fraction, retry_limit, retry_interval, test_seconds, round_seconds, scale
+):
+    """Completion time of healthy miners with sleeping workers vs the retry scheduler."""
+    miners = simulated_miners(num_miners, dead_fraction, flaky_fraction)
+    healthy = [hotkey for hotkey, fails in miners.items() if fails == 0]
+    dead = sum(1 for fails in miners.values() if fails is None)
+    print(
+        f"miners = {num_miners} (healthy {len(healthy)}, flaky {num_miners - len(healthy) - dead}, dead {dead}), "
+        f"workers = {num_workers}, retry limit = {retry_limit}, simulated seconds"
+    )
+    print(f"{'mode':>9} | {'round':>8} | {'healthy p50':>11} | {'healthy max':>11} | {'passed':>6} | {'slept':>8}")
+    for mode in ("sleep", "scheduler"):
+        round_time, completed, slept = asyncio.run(
+            run_retry_round(miners, mode, num_workers, retry_limit, retry_interval, test_seconds, round_seconds, scale)
+        )
+        healthy_times = np.array([completed[hotkey] for hotkey in healthy if hotkey in completed])
+        p50, p_max = (np.median(healthy_times), healthy_times.max()) if len(healthy_times) else (0.0, 0.0)
+        print(f"{mode:>9} | {round_time:>8.0f} | {p50:>11.0f} | {p_max:>11.0f} | {len(completed):>6} | {slept:>8.0f}")
+
+
+def simulate_first_attempts(due_times, num_workers, test_seconds):
+    """
+    Start times of the first attempts with a pool of workers, in simulated seconds.
+
+    :param due_times: Due time per miner, in test order.
+    :return: Start and end time per miner.
+    """
+    free_at = [0.0] * num_workers
+    starts = np.empty(len(due_times))
+    for index, due in enumerate(due_times):
+        start = max(due, heapq.heappop(free_at))
+        heapq.heappush(free_at, start + test_seconds)
+        starts[index] = start
+    return starts, starts + test_seconds
+
+
+def bench_spread(num_miners, num_workers, test_seconds, spread, max_delay, window, seed=0):
+    """Load and freshness of the first attempts: one burst after a random delay vs the freshness plan."""
+    rng = np.random.default_rng(seed)
+    hotkeys = [f"miner-{uid}" for uid in range(num_miners)]
+    # Latest results up to two epochs old, a tenth of the miners never tested
+    ages = rng.uniform(0, 2 * 4320, num_miners)
+    last_results = {hotkey: -age for hotkey, age in zip(hotkeys, ages) if rng.random() > 0.1}
+    stalest = set(sorted(hotkeys, key=lambda hotkey: last_results.get(hotkey, -np.inf))[: num_miners // 10])
+
+    print(f"miners = {num_miners}, workers = {num_workers}, test = {test_seconds:.0f} s, simulated seconds")
+    print(
+        f"{'mode':>7} | {'last start':>10} | {'peak concurrent':>15} | "
+        f"{'peak starts/{:g}s'.format(window):>15} | {'stalest 10% start':>17}"
+    )
+    delay = rng.uniform(0, max_delay)
+    plans = {
+        "burst": {hotkey: delay for hotkey in hotkeys},
+        "spread": plan_round(hotkeys, last_results, 0.0, spread),
+    }
+    for mode, plan in plans.items():
+        order = list(plan)
+        starts, ends = simulate_first_attempts([plan[hotkey] for hotkey in order], num_workers, test_seconds)
+        events = sorted([(t, 1) for t in starts] + [(t, -1) for t in ends], key=lambda event: (event[0], event[1]))
+        peak_concurrent = max(itertools.accumulate(change for _, change in events))
+        peak_starts = max(np.searchsorted(starts, starts + window, side="left") - np.arange(len(starts)))
+        stalest_start = np.mean([start for hotkey, start in zip(order, starts) if hotkey in stalest])
+        print(
+            f"{mode:>7} | {starts.max():>10.0f} | {peak_concurrent:>15} | {peak_starts:>15} | {stalest_start:>17.0f}"
+        )
+
+
+def add_commands(subparsers):
+    """Register the subcommands of this module."""
+    screening_parser = subparsers.add_parser("screening", help="Miner time saved by screening before the Merkle challenge.")
+    screening_parser.add_argument("--miners", type=int, default=256)
+    screening_parser.add_argument("--noise", type=float, default=0.05, help="Relative measurement noise.")
+    screening_parser.add_argument("--slack", type=float, default=0.1, help="screening_margin of the config.")
+    screening_parser.add_argument("--benchmark-seconds", type=float, default=15.0, help="gpu_info and benchmark.")
+    screening_parser.add_argument("--challenge-seconds", type=float, default=120.0, help="Compute and proof phases.")
+    screening_parser.set_defaults(
+        run=lambda args: bench_screening(
+            args.miners, args.noise, args.slack, args.benchmark_seconds, args.challenge_seconds
+        )
+    )
+
+    looplag_parser = subparsers.add_parser("looplag", help="Event loop lag of concurrent PoG tests against slow miners.")
+    looplag_parser.add_argument("--miners", type=int, default=64)
+    looplag_parser.add_argument("--scale", type=float, default=0.05, help="Scale of the simulated stage durations.")
+    looplag_parser.add_argument("--config", type=str, default="config.yaml", help="Config with merkle_proof.stage_concurrency.")
+    looplag_parser.set_defaults(
+        run=lambda args: bench_looplag(
+            args.miners, args.scale, load_yaml_config(args.config)["merkle_proof"].get("stage_concurrency")
+        )
+    )
+
+    retries_parser = subparsers.add_parser("retries", help="Sleeping PoG workers vs the retry scheduler with flaky miners.")
+    retries_parser.add_argument("--miners", type=int, default=256)
+    retries_parser.add_argument("--workers", type=int, default=32)
+    retries_parser.add_argument("--dead", type=float, default=0.2, help="Fraction of miners that never pass.")
+    retries_parser.add_argument("--flaky", type=float, default=0.2, help="Fraction of miners that pass after 1-3 failures.")
+    retries_parser.add_argument("--retry-limit", type=int, default=22)
+    retries_parser.add_argument("--retry-interval", type=float, default=60.0)
+    retries_parser.add_argument("--test-seconds", type=float, default=60.0, help="Duration of one test.")
+    retries_parser.add_argument("--round-seconds", type=float, default=3600.0, help="pog_round_duration of the config.")
+    retries_parser.add_argument("--scale", type=float, default=0.001, help="Real seconds per simulated second.")
+    retries_parser.set_defaults(
+        run=lambda args: bench_retries(
+            args.miners,
+            args.workers,
+            args.dead,
+            args.flaky,
+            args.retry_limit,
+            args.retry_interval,
+            args.test_seconds,
+            args.round_seconds,
+            args.scale,
+        )
+    )
+
+    spread_parser = subparsers.add_parser("spread", help="Burst vs freshness-ordered spread of the first PoG attempts.")
+    spread_parser.add_argument("--miners", type=int, default=256)
+    spread_parser.add_argument("--workers", type=int, default=32)
+    spread_parser.add_argument("--test-seconds", type=float, default=60.0, help="Duration of one test.")
+    spread_parser.add_argument("--spread", type=float, default=2400.0, help="pog_spread_duration of the config.")
+    spread_parser.add_argument("--max-delay", type=float, default=900.0, help="Former max_random_delay of the burst.")
+    spread_parser.add_argument("--window", type=float, default=60.0, help="Window of the peak start rate.")
+    spread_parser.set_defaults(run=lambda args: bench_spread(args.miners, args.workers, args.test_seconds, args.spread, args.max_delay, args.window))
@@ -0,0 +1,188 @@
+"""
+Benchmarks of the validator's score and validator set synchronization.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from compute import validator_permit_stake
+from compute.utils.db import ComputeDb
+from compute.utils.validator_set import ValidatorSetProvider
+from neurons.Validator.calculate_pow_score import GpuScoreTable, calc_score_pog
+from neurons.Validator.database.pog import get_all_pog_specs, get_pog_specs, update_pog_stats, write_stats
+from neurons.Validator.pog import load_yaml_config
+from pog_benchmarks.common import time_call
+
+
+def open_scratch_db(path):
+    """ComputeDb on a scratch file instead of the validator's database.db."""
+    db = ComputeDb.__new__(ComputeDb)
+    db.conn = sqlite3.connect(path, check_same_thread=False)
+    db.init()
+    return db
+
+
+def write_stats_per_row(db, stats):
+    """Reference: one INSERT per uid, as write_stats did before the batched upsert."""
+    cursor = db.get_cursor()
+    try:
+        for uid, data in stats.items():
+            cursor.execute(
+                """
+                INSERT INTO stats (uid, hotkey, gpu_specs, score, allocated, own_score, reliability_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(uid) DO UPDATE SET
+                    hotkey=excluded.hotkey,
+                    gpu_specs=excluded.gpu_specs,
+                    score=excluded.score,
+                    allocated=excluded.allocated,
+                    own_score=excluded.own_score,
+                    reliability_score=excluded.reliability_score,
+                    created_at=CURRENT_TIMESTAMP
+                """,
+                (
+                    uid,
+                    data.get("hotkey"),
+                    json.dumps(data["gpu_specs"]) if isinstance(data.get("gpu_specs"), dict) else data.get("gpu_specs"),
+                    float(data.get("score", 0)),
+                    data.get("allocated"),
+                    data.get("own_score"),
+                    data.get("reliability_score"),
+                ),
+            )
+        db.conn.commit()
+    finally:
+        cursor.close()
+
+
+def bench_scores(num_uids_list, config_file="config.yaml", repeat=3, seed=0):
+    """Score synchronization: per-uid queries, scores and inserts vs the bulk path."""
+    config_data = load_yaml_config(config_file)
+    gpu_names = list(config_data["gpu_performance"]["gpu_scores"])
+    rng = np.random.default_rng(seed)
+    print(f"{'uids':>6} | {'per-uid (ms)':>12} | {'bulk (ms)':>10} | {'speedup':>8} | {'max score diff':>14}")
+    for num_uids in num_uids_list:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = open_scratch_db(os.path.join(tmp, "scores.db"))
+            hotkeys = [f"hotkey-{uid}" for uid in range(num_uids)]
+            # Up to four results per miner as kept by update_pog_stats, a fifth of the miners without any
+            for hotkey in hotkeys:
+                if rng.random() < 0.2:
+                    continue
+                for _ in range(int(rng.integers(1, 5))):
+                    update_pog_stats(db, hotkey, str(rng.choice(gpu_names)), int(rng.integers(1, 9)))
+
+            def per_uid():
+                stats = {}
+                for uid, hotkey in enumerate(hotkeys):
+                    gpu_specs = get_pog_specs(db, hotkey)
+                    score = calc_score_pog(gpu_specs, hotkey, [], config_data) if gpu_specs is not None else 0
+                    stats[uid] = {"hotkey": hotkey, "gpu_specs": gpu_specs, "score": score * 100, "own_score": True}
+                write_stats_per_row(db, stats)
+                return stats
+
+            def bulk():
+                pog_specs = get_all_pog_specs(db)
+                stats = {}
+                own_uids = []
+                for uid, hotkey in enumerate(hotkeys):
+                    gpu_specs = pog_specs.get(hotkey)
+                    stats[uid] = {"hotkey": hotkey, "gpu_specs": gpu_specs, "score": 0, "own_score": True}
+                    if gpu_specs is not None:
+                        own_uids.append(uid)
+                specs = [stats[uid]["gpu_specs"] for uid in own_uids]
+                scores = GpuScoreTable(config_data).scores([g["gpu_name"] for g in specs], [g["num_gpus"] for g in specs])
+                for uid, score in zip(own_uids, scores.tolist()):
+                    stats[uid]["score"] = score * 100
+                write_stats(db, stats)
+                return stats
+
+            per_uid_time = time_call(per_uid, repeat)
+            bulk_time = time_call(bulk, repeat)
+            per_uid_stats, bulk_stats = per_uid(), bulk()
+            diff = max(abs(per_uid_stats[uid]["score"] - bulk_stats[uid]["score"]) for uid in per_uid_stats)
+            db.close()
+        print(
+            f"{num_uids:>6} | {per_uid_time * 1000:>12.1f} | {bulk_time * 1000:>10.1f} | "
+            f"{per_uid_time / bulk_time:>7.1f}x | {diff:>14.2e}"
+        )
+
+
+class SimulatedChain:
+    """Metagraph and subtensor stand-in counting RPCs, each taking rpc_seconds."""
+
+    def __init__(self, num_uids, num_validators, rpc_seconds, seed=0):
+        rng = np.random.default_rng(seed)
+        self.rpc_seconds = rpc_seconds
+        self.rpcs = 0
+        self.block = 1000
+        self.uids = np.arange(num_uids)
+        self.hotkeys = [f"hotkey-{uid}" for uid in range(num_uids)]
+        self.total_stake = np.zeros(num_uids)
+        self.total_stake[rng.choice(num_uids, num_validators, replace=False)] = 1e5
+
+    def neuron(self, uid):
+        prometheus_info = type("PrometheusInfo", (), {"version": 183})()
+        return type("Neuron", (), {"uid": uid, "hotkey": self.hotkeys[uid], "prometheus_info": prometheus_info})()
+
+    def neuron_for_uid(self, uid, netuid):
+        self.rpcs += 1
+        time.sleep(self.rpc_seconds)
+        return self.neuron(uid)
+
+    def neurons_lite(self, netuid):
+        self.rpcs += 1
+        time.sleep(self.rpc_seconds)
+        return [self.neuron(uid) for uid in self.uids.tolist()]
+
+
+def bench_validators(num_uids, num_validators, calls_per_block, blocks, rpc_seconds):
+    """Validator set lookups: one neuron_for_uid per validator vs the per-block provider."""
+    chain = SimulatedChain(num_uids, num_validators, rpc_seconds)
+
+    def per_uid():
+        uids = chain.uids.tolist()
+        valid_uids = [uid for index, uid in enumerate(uids) if chain.total_stake[index] > validator_permit_stake]
+        return [
+            (uid, neuron.hotkey, neuron.prometheus_info.version)
+            for uid, neuron in ((uid, chain.neuron_for_uid(uid, 27)) for uid in valid_uids)
+        ]
+
+    provider = ValidatorSetProvider(chain, 27)
+    print(
+        f"uids = {num_uids}, validators = {num_validators}, {calls_per_block} lookups per block, "
+        f"{blocks} blocks, RPC = {rpc_seconds * 1000:.0f} ms"
+    )
+    print(f"{'mode':>9} | {'time (s)':>8} | {'RPCs':>6}")
+    results = {}
+    for mode, lookup in (("per-uid", per_uid), ("provider", lambda: provider.get_validators(chain))):
+        chain.rpcs = 0
+        start_time = time.perf_counter()
+        for block in range(blocks):
+            chain.block = 1000 + block
+            for _ in range(calls_per_block):
+                results[mode] = lookup()
+        print(f"{mode:>9} | {time.perf_counter() - start_time:>8.2f} | {chain.rpcs:>6}")
+    print(f"identical = {results['per-uid'] == results['provider']}, provider cache = {provider.get_stats()}")
+
+
+def add_commands(subparsers):
+    """Register the subcommands of this module."""
+    scores_parser = subparsers.add_parser("scores", help="Per-uid vs bulk score synchronization of the validator.")
+    scores_parser.add_argument("--uids", type=int, nargs="+", default=[256, 4096])
+    scores_parser.add_argument("--config", type=str, default="config.yaml", help="Config with gpu_performance.gpu_scores.")
+    scores_parser.add_argument("--repeat", type=int, default=3)
+    scores_parser.set_defaults(run=lambda args: bench_scores(args.uids, args.config, repeat=args.repeat))
+
+    validators_parser = subparsers.add_parser("validators", help="Per-uid chain queries vs the cached validator set.")
+    validators_parser.add_argument("--uids", type=int, default=256)
+    validators_parser.add_argument("--validators", type=int, default=64)
+    validators_parser.add_argument("--calls-per-block", type=int, default=3, help="Validator set lookups between two syncs.")
+    validators_parser.add_argument("--blocks", type=int, default=3)
+    validators_parser.add_argument("--rpc-seconds", type=float, default=0.02, help="Simulated latency of one RPC.")
+    validators_parser.set_defaults(run=lambda args: bench_validators(args.uids, args.validators, args.calls_per_block, args.blocks, args.rpc_seconds))
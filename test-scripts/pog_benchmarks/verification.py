@@ -0,0 +1,301 @@
+"""
+Benchmarks of the validator-side verification of the PoG responses.
+"""
+
+import itertools
+import json
+import os
+import platform
+import secrets
+import sys
+import time
+
+import numpy as np
+
+from neurons.Validator.pog import get_gpu_fingerprint_index, identify_gpu, load_yaml_config, verify_responses
+from neurons.Validator.pog_verify import (
+    HASH_FUNCTIONS,
+    generate_prng_value,
+    generate_prng_vectors,
+    prng_matrix_product,
+    verify_merkle_proof_row,
+    verify_rows_randomized,
+)
+from pog_benchmarks.common import (
+    EPOCH_SECONDS,
+    make_compute_reply,
+    make_miner_gpu,
+    make_synthetic_gpu,
+    measure,
+    time_call,
+)
+
+
+def bench_prng(sizes, repeat=3):
+    """
+    Compare the scalar and vectorized generation of one A row and one B column.
+    """
+    s_A, s_B = secrets.randbits(64), secrets.randbits(64)
+    print(f"{'n':>8} | {'scalar (s)':>12} | {'vectorized (s)':>14} | {'speedup':>9}")
+    for n in sizes:
+        i, j = n // 3, n // 7
+
+        def scalar():
+            np.array([generate_prng_value(s_A, i, col) for col in range(n)], dtype=np.float32)
+            np.array([generate_prng_value(s_B, row, j) for row in range(n)], dtype=np.float32)
+
+        def vectorized():
+            generate_prng_vectors(s_A, [i], n)
+            generate_prng_vectors(s_B, [j], n)
+
+        scalar_time = time_call(scalar, repeat=1)
+        vectorized_time = time_call(vectorized, repeat=repeat)
+        print(f"{n:>8} | {scalar_time:>12.4f} | {vectorized_time:>14.6f} | {scalar_time / vectorized_time:>8.0f}x")
+
+
+def bench_indices(n, counts, repeat=3):
+    """
+    Compare k separate single-index verifications with one batched k-index verification.
+    """
+    rng = np.random.default_rng()
+    print(f"n = {n}")
+    print(f"{'k':>5} | {'k separate (s)':>14} | {'batched (s)':>12} | {'batched / single':>16}")
+    single_time = None
+    for k in counts:
+        seeds, root_hash, response, indices = make_synthetic_gpu(n, k, rng)
+        if not verify_responses({0: seeds}, {0: root_hash}, {0: response}, {0: indices}, n):
+            print(f"[indices] Synthetic response failed verification for k={k}.")
+            sys.exit(1)
+
+        def separate():
+            for m in range(k):
+                single = {"rows": response["rows"][m:m + 1], "proofs": response["proofs"][m:m + 1]}
+                verify_responses({0: seeds}, {0: root_hash}, {0: single}, {0: indices[m:m + 1]}, n)
+
+        def batched():
+            verify_responses({0: seeds}, {0: root_hash}, {0: response}, {0: indices}, n)
+
+        separate_time = time_call(separate, repeat=repeat)
+        batched_time = time_call(batched, repeat=repeat)
+        if single_time is None:
+            single_time = batched_time / k
+        print(f"{k:>5} | {separate_time:>14.6f} | {batched_time:>12.6f} | {batched_time / single_time:>15.2f}x")
+
+
+def bench_hashes(sizes, repeat=3):
+    """
+    Merkle tree build (miner side) and proof verification (validator side) per hash backend.
+    """
+    from neurons.Validator.miner_script_m_merkletree import build_merkle_tree_rows, get_merkle_proof_row
+
+    rng = np.random.default_rng()
+    print(f"{'backend':>8} | {'n':>6} | {'tree build (s)':>14} | {'leaf GB/s':>9} | {'proof verify (s)':>16}")
+    for n in sizes:
+        C = rng.random((n, n), dtype=np.float32)
+        index = int(rng.integers(0, n))
+        for name, hash_func in HASH_FUNCTIONS.items():
+            root_hash, tree = build_merkle_tree_rows(C, hash_func=hash_func)
+            proof = get_merkle_proof_row(tree, index, n)
+            if not verify_merkle_proof_row(C[index, :], proof, root_hash, index, n, hash_func=hash_func):
+                print(f"[hashes] {name}: proof verification failed for n={n}.")
+                sys.exit(1)
+
+            build_time = time_call(lambda: build_merkle_tree_rows(C, hash_func=hash_func), repeat=repeat)
+            verify_time = measure(
+                lambda: verify_merkle_proof_row(C[index, :], proof, root_hash, index, n, hash_func=hash_func),
+                repeat=repeat,
+                number=100,
+            )["median_s"]
+            print(f"{name:>8} | {n:>6} | {build_time:>14.4f} | {C.nbytes / build_time / 1e9:>9.2f} | {verify_time:>16.6f}")
+
+
+def prng_matrix_product_streamed(s, n, R, chunk_rows=256):
+    """Reference M @ R, generating M in blocks of chunk_rows rows."""
+    out = np.empty((n, R.shape[1]), dtype=np.float64)
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        out[start:stop] = generate_prng_vectors(s, range(start, stop), n).astype(np.float64) @ R
+    return out
+
+
+def bench_rowcheck(sizes, num_vectors=4, streamed_max_n=8192, repeat=3):
+    """
+    Cost of the whole-row check per challenged row: B @ R from the Hankel structure with
+    FFTs, from B generated in streamed row blocks, and one single-element check.
+    """
+    rng = np.random.default_rng()
+    print(f"vectors = {num_vectors}")
+    print(f"{'n':>8} | {'fft B@R (s)':>11} | {'streamed B@R (s)':>16} | {'row check (s)':>13} | {'element (s)':>11}")
+    for n in sizes:
+        s_A, s_B = (int(x) for x in rng.integers(0, 2**32, size=2))
+        R = rng.choice(np.array([-1.0, 1.0]), size=(n, num_vectors))
+        fft_time = time_call(lambda: prng_matrix_product(s_B, n, R), repeat=repeat)
+        # The reference row of C needs all of B, checked up to streamed_max_n
+        streamed, check_time = "-", "-"
+        A_rows = generate_prng_vectors(s_A, [n // 2], n)
+        if n <= streamed_max_n:
+            if not np.allclose(prng_matrix_product(s_B, n, R), prng_matrix_product_streamed(s_B, n, R)):
+                print(f"[rowcheck] B @ R mismatch for n={n}.")
+                sys.exit(1)
+            streamed = f"{time_call(lambda: prng_matrix_product_streamed(s_B, n, R), repeat=1):.4f}"
+            B = generate_prng_vectors(s_B, range(n), n).astype(np.float64)
+            row = (A_rows.astype(np.float64) @ B).astype(np.float32)
+            if verify_rows_randomized(s_A, s_B, A_rows, row, n, num_vectors) is not None:
+                print(f"[rowcheck] Row check failed for n={n}.")
+                sys.exit(1)
+            check_time = f"{time_call(lambda: verify_rows_randomized(s_A, s_B, A_rows, row, n, num_vectors), repeat=repeat):.4f}"
+        element_time = time_call(
+            lambda: np.dot(generate_prng_vectors(s_A, [n // 2], n)[0], generate_prng_vectors(s_B, [n // 3], n)[0]), repeat=repeat
+        )
+        print(f"{n:>8} | {fft_time:>11.4f} | {streamed:>16} | {check_time:>13} | {element_time:>11.6f}")
+
+
+def run_suite(sizes, gpu_counts, num_indices, repeat, full_pipeline_max_n, config_file="config.yaml"):
+    """
+    Measure the validator-side cost of every PoG verification step.
+
+    :return: Dictionary with the environment, the timings and the estimated capacity per epoch.
+    """
+    rng = np.random.default_rng()
+    config_data = load_yaml_config(config_file)
+    gpu_data = config_data["gpu_performance"]
+    gpu_tolerance_pairs = gpu_data.get("gpu_tolerance_pairs", {})
+    results = {}
+
+    for n in sizes:
+        make_gpu = make_miner_gpu if n <= full_pipeline_max_n else make_synthetic_gpu
+        gpus = [make_gpu(n, num_indices, rng) for _ in range(max(gpu_counts))]
+
+        for count in gpu_counts:
+            seeds = {gpu_id: gpus[gpu_id][0] for gpu_id in range(count)}
+            root_hashes = {gpu_id: gpus[gpu_id][1] for gpu_id in range(count)}
+            responses = {gpu_id: gpus[gpu_id][2] for gpu_id in range(count)}
+            indices = {gpu_id: gpus[gpu_id][3] for gpu_id in range(count)}
+            if not verify_responses(seeds, root_hashes, responses, indices, n):
+                raise RuntimeError(f"Synthetic responses failed verification for n={n}, gpus={count}.")
+            results[f"verify_responses/n={n}/gpus={count}"] = measure(
+                lambda: verify_responses(seeds, root_hashes, responses, indices, n), repeat=repeat
+            )
+
+        _, root_hash, response, indices = gpus[0]
+        root_hash = bytes.fromhex(root_hash)
+        row, proof, index = response["rows"][0], response["proofs"][0], indices[0][0]
+        results[f"verify_merkle_proof_row/n={n}"] = measure(
+            lambda: verify_merkle_proof_row(row, proof, root_hash, index, n), repeat=repeat, number=100
+        )
+
+    for count in gpu_counts:
+        reply = make_compute_reply(count, max(sizes))
+        results[f"parse_compute_reply/gpus={count}"] = measure(lambda: json.loads(reply), repeat=repeat, number=1000)
+
+    batch = rng.uniform([10, 5, 8], [600, 50, 70], size=(1000, 3))
+    measurements = itertools.cycle(batch)
+    gpu_index = get_gpu_fingerprint_index(config_file)
+    results["identify_gpu"] = measure(
+        lambda: gpu_index.identify(*next(measurements)), repeat=repeat, number=1000
+    )
+    results["identify_gpu/unindexed"] = measure(
+        lambda: identify_gpu(*next(measurements), gpu_data, None, gpu_tolerance_pairs), repeat=repeat, number=1000
+    )
+    results["identify_gpu/batch=1000"] = measure(lambda: gpu_index.identify_batch(batch), repeat=repeat)
+
+    # Validator CPU time spent per miner and miners one core can verify per PoG epoch
+    capacity = {}
+    for count in gpu_counts:
+        cost = (
+            results[f"verify_responses/n={max(sizes)}/gpus={count}"]["median_s"]
+            + results[f"parse_compute_reply/gpus={count}"]["median_s"]
+            + results["identify_gpu"]["median_s"]
+        )
+        capacity[f"n={max(sizes)}/gpus={count}"] = {"cpu_s_per_miner": cost, "miners_per_epoch_per_core": int(EPOCH_SECONDS / cost)}
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": int(time.time()),
+            "num_indices": num_indices,
+        },
+        "results": results,
+        "capacity": capacity,
+    }
+
+
+def compare_results(current, baseline, threshold):
+    """
+    Compare the median of every benchmark with a stored baseline.
+
+    :return: List of benchmark names slower than the baseline by more than threshold.
+    """
+    regressions = []
+    print(f"{'benchmark':<40} | {'baseline (s)':>12} | {'current (s)':>12} | {'ratio':>6}")
+    for name, result in current["results"].items():
+        if name not in baseline.get("results", {}):
+            print(f"{name:<40} | {'-':>12} | {result['median_s']:>12.6f} | {'new':>6}")
+            continue
+        baseline_median = baseline["results"][name]["median_s"]
+        ratio = result["median_s"] / baseline_median if baseline_median > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  <-- REGRESSION"
+        print(f"{name:<40} | {baseline_median:>12.6f} | {result['median_s']:>12.6f} | {ratio:>6.2f}{flag}")
+    return regressions
+
+
+def run_suite_command(args):
+    """Run the suite, then print or store the report and compare it with a baseline."""
+    report = run_suite(args.sizes, args.gpus, args.num_indices, args.repeat, args.full_pipeline_max_n)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def add_commands(subparsers):
+    """Register the subcommands of this module."""
+    prng_parser = subparsers.add_parser("prng", help="Scalar vs vectorized PRNG row/column generation.")
+    prng_parser.add_argument("--sizes", type=int, nargs="+", default=[8192, 16384, 32768, 65536])
+    prng_parser.add_argument("--repeat", type=int, default=3)
+    prng_parser.set_defaults(run=lambda args: bench_prng(args.sizes, repeat=args.repeat))
+
+    indices_parser = subparsers.add_parser("indices", help="Cost of batched multi-index verification per GPU.")
+    indices_parser.add_argument("--size", type=int, default=16384)
+    indices_parser.add_argument("--indices", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    indices_parser.add_argument("--repeat", type=int, default=3)
+    indices_parser.set_defaults(run=lambda args: bench_indices(args.size, args.indices, repeat=args.repeat))
+
+    hashes_parser = subparsers.add_parser("hashes", help="Merkle tree build and proof verification per hash backend.")
+    hashes_parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096, 8192])
+    hashes_parser.add_argument("--repeat", type=int, default=3)
+    hashes_parser.set_defaults(run=lambda args: bench_hashes(args.sizes, repeat=args.repeat))
+
+    rowcheck_parser = subparsers.add_parser("rowcheck", help="Cost of the randomized whole-row check of C.")
+    rowcheck_parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 8192, 32768, 65536])
+    rowcheck_parser.add_argument("--vectors", type=int, default=4)
+    rowcheck_parser.add_argument("--streamed-max-n", type=int, default=8192, help="Largest n of the streamed reference.")
+    rowcheck_parser.add_argument("--repeat", type=int, default=3)
+    rowcheck_parser.set_defaults(run=lambda args: bench_rowcheck(args.sizes, args.vectors, args.streamed_max_n, repeat=args.repeat))
+
+    suite_parser = subparsers.add_parser("suite", help="Full validator-side PoG benchmark with JSON output.")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[8192, 16384, 32768])
+    suite_parser.add_argument("--gpus", type=int, nargs="+", default=[1, 4, 8])
+    suite_parser.add_argument("--num-indices", type=int, default=1)
+    suite_parser.add_argument("--repeat", type=int, default=5)
+    suite_parser.add_argument(
+        "--full-pipeline-max-n", type=int, default=2048, help="Run the real miner pipeline for sizes up to this n."
+    )
+    suite_parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this file.")
+    suite_parser.add_argument("--compare", type=str, default=None, help="Baseline JSON file to compare against.")
+    suite_parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging a regression.")
+    suite_parser.set_defaults(run=run_suite_command)
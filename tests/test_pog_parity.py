@@ -0,0 +1,133 @@
+"""
+Parity of the optimized Proof-of-GPU code paths with the reference implementations.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import hashlib
+import secrets
+
+import numpy as np
+import pytest
+
+from neurons.Validator.pog_verify import (
+    HASH_FUNCTIONS,
+    generate_prng_value,
+    generate_prng_vectors,
+    verify_merkle_proof_row,
+    verify_merkle_proof_rows,
+)
+
+SEEDS = [0, 1, 2**32 - 1, 2**32, 2**64 - 1, 0x9E3779B97F4A7C15]
+
+
+@pytest.fixture(scope="module")
+def miner_script():
+    pytest.importorskip("torch")
+    from neurons.Validator import miner_script_m_merkletree
+
+    return miner_script_m_merkletree
+
+
+def build_merkle_tree_reference(leaves, hash_func=hashlib.sha256):
+    """Merkle tree of the original miner script, a list of the nodes of all levels."""
+    tree = list(leaves)
+    num_leaves = len(leaves)
+    offset = 0
+    while num_leaves > 1:
+        new_level = []
+        for i in range(0, num_leaves, 2):
+            left = tree[offset + i]
+            right = tree[offset + i + 1] if i + 1 < num_leaves else left
+            new_level.append(hash_func(left + right).digest())
+        tree.extend(new_level)
+        offset += num_leaves
+        num_leaves = len(new_level)
+    return tree[-1], tree
+
+
+def get_merkle_proof_row_reference(tree, row_index, total_leaves):
+    """Merkle proof of the original miner script."""
+    proof = []
+    idx = row_index
+    num_leaves = total_leaves
+    offset = 0
+    while num_leaves > 1:
+        sibling_idx = idx ^ 1
+        proof.append(tree[offset + sibling_idx] if sibling_idx < num_leaves else tree[offset + idx])
+        idx = idx // 2
+        offset += num_leaves
+        num_leaves = (num_leaves + 1) // 2
+    return proof
+
+
+# The scalar reference wraps around uint64 for the largest seeds
+@pytest.mark.filterwarnings("ignore:overflow encountered:RuntimeWarning")
+@pytest.mark.parametrize("s", SEEDS)
+def test_prng_vectors_match_scalar(s):
+    n = 67
+    rows = [0, 1, n // 2, n - 1, 2**32 - 1]
+    block = generate_prng_vectors(s, rows, n)
+    assert block.shape == (len(rows), n)
+    assert block.dtype == np.float32
+    for k, i in enumerate(rows):
+        expected = np.array([generate_prng_value(s, i, j) for j in range(n)], dtype=np.float32)
+        np.testing.assert_array_equal(block[k].view(np.uint32), expected.view(np.uint32))
+
+
+def test_prng_vectors_windows_match_single_rows():
+    # Close indices are read from one shared sequence, distant ones are generated apart
+    s = secrets.randbits(64)
+    n = 512
+    for rows in ([5, 6, 9, 40], [3, 300, 100000], [7, 7, 8]):
+        block = generate_prng_vectors(s, rows, n)
+        for k, i in enumerate(rows):
+            np.testing.assert_array_equal(block[k], generate_prng_vectors(s, [i], n)[0])
+
+
+def test_prng_vectors_match_miner_matrix(miner_script):
+    n = 256
+    for s in SEEDS:
+        miner_matrix = miner_script.generate_matrix_torch(s, n, miner_script.torch.device("cpu")).numpy()
+        validator_matrix = generate_prng_vectors(s, range(n), n)
+        # The miner divides in float32, the validator in float64, both round to the same
+        # float32 except at exact ties
+        ulp_diff = np.abs(miner_matrix.view(np.int32).astype(np.int64) - validator_matrix.view(np.int32))
+        assert ulp_diff.max() <= 1
+        # Column j of the matrix is row j, the validator generates both the same way
+        np.testing.assert_array_equal(generate_prng_vectors(s, [n // 2], n)[0], validator_matrix[:, n // 2])
+
+
+@pytest.mark.parametrize("hash_algorithm", sorted(HASH_FUNCTIONS))
+@pytest.mark.parametrize("num_leaves", [1, 2, 3, 5, 8, 13, 64, 100])
+def test_flat_merkle_tree_matches_reference(miner_script, hash_algorithm, num_leaves):
+    hash_func = HASH_FUNCTIONS[hash_algorithm]
+    C = np.random.default_rng(num_leaves).random((num_leaves, 16), dtype=np.float32)
+    leaves = [hash_func(row.tobytes()).digest() for row in C]
+    reference_root, reference_tree = build_merkle_tree_reference(leaves, hash_func)
+
+    root, tree = miner_script.build_merkle_tree_levels(leaves, hash_func=hash_func)
+    assert root == reference_root
+    assert miner_script.build_merkle_tree_rows(C, hash_func=hash_func)[0] == reference_root
+
+    row_indices = list(range(num_leaves))
+    proofs = miner_script.get_merkle_proof_rows(tree, row_indices, num_leaves)
+    for i in row_indices:
+        reference_proof = get_merkle_proof_row_reference(reference_tree, i, num_leaves)
+        proof = [sibling.tobytes() for sibling in proofs[i]]
+        assert proof == reference_proof
+        assert miner_script.get_merkle_proof_row(tree, i, num_leaves) == reference_proof
+        assert verify_merkle_proof_row(C[i], proof, root, i, num_leaves, hash_func=hash_func)
+
+    proof_lists = [[sibling.tobytes() for sibling in proof] for proof in proofs]
+    assert verify_merkle_proof_rows(C, proof_lists, root, row_indices, num_leaves, hash_func=hash_func) is None
+
+
+def test_merkle_proof_of_wrong_row_fails(miner_script):
+    num_leaves = 10
+    C = np.random.default_rng(0).random((num_leaves, 16), dtype=np.float32)
+    root, tree = miner_script.build_merkle_tree_rows(C)
+    proof = miner_script.get_merkle_proof_row(tree, 3, num_leaves)
+    assert not verify_merkle_proof_row(C[4], proof, root, 3, num_leaves)
+    proofs = [miner_script.get_merkle_proof_row(tree, i, num_leaves) for i in (2, 3)]
+    assert verify_merkle_proof_rows(C[[2, 4]], proofs, root, [2, 3], num_leaves) == 1
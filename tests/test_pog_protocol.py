@@ -0,0 +1,294 @@
+"""
+Handling of miner-controlled input: the binary proof responses and the replies of the
+miner script daemon. Malformed input must fail verification or raise the documented
+errors, never an unhandled exception.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import base64
+import io
+import json
+import random
+import struct
+
+import numpy as np
+import pytest
+
+from neurons.Validator.pog_verify import (
+    RESPONSES_FRAME_HEADER,
+    RESPONSES_HEADER,
+    RESPONSES_MAGIC,
+    RESPONSES_VERSION,
+    parse_proof_responses,
+    verify_gpu_response,
+)
+
+N = 8
+SEEDS = (1, 2)
+ROOT_HASH = "00" * 32
+
+
+def pack_frame(gpu_id, indices, rows, proofs, n=None, depth=None, hash_size=None):
+    """Frame of the miner script's pack_proof_response, the header fields can be forged."""
+    k = len(indices)
+    header = struct.pack(
+        RESPONSES_FRAME_HEADER,
+        gpu_id,
+        k,
+        rows.shape[1] if n is None else n,
+        proofs.shape[1] if depth is None else depth,
+        proofs.shape[2] if hash_size is None else hash_size,
+    )
+    return header + np.asarray(indices, dtype="<u4").tobytes() + rows.astype("<f4").tobytes() + proofs.astype(np.uint8).tobytes()
+
+
+def pack_responses(frames, num_frames=None, magic=RESPONSES_MAGIC, version=RESPONSES_VERSION):
+    header = struct.pack(RESPONSES_HEADER, magic, version, len(frames) if num_frames is None else num_frames)
+    return header + b"".join(frames)
+
+
+def make_frame(gpu_id=0, k=2, n=N, depth=3):
+    rng = np.random.default_rng(gpu_id)
+    indices = [(i, i + 1) for i in range(k)]
+    rows = rng.random((k, n), dtype=np.float32)
+    proofs = rng.integers(0, 256, size=(k, depth, 32), dtype=np.uint8)
+    return indices, pack_frame(gpu_id, indices, rows, proofs)
+
+
+def test_parse_round_trip():
+    indices, frame = make_frame(gpu_id=3)
+    responses = parse_proof_responses(pack_responses([frame]))
+    assert list(responses) == [3]
+    response = responses[3]
+    assert response["indices"] == indices
+    assert response["rows"].shape == (2, N)
+    assert [len(proof) for proof in response["proofs"]] == [3, 3]
+    assert all(len(sibling) == 32 for proof in response["proofs"] for sibling in proof)
+
+
+def test_parse_matches_the_miner_script_frames():
+    miner_script = pytest.importorskip("neurons.Validator.miner_script_m_merkletree")
+    rows = np.arange(2 * N, dtype=np.float32).reshape(2, N)
+    proofs = np.zeros((2, 3, 32), dtype=np.uint8)
+    frame = miner_script.pack_proof_response(1, [(0, 5), (4, 2)], rows, proofs)
+    assert frame == pack_frame(1, [(0, 5), (4, 2)], rows, proofs)
+    response = parse_proof_responses(pack_responses([frame]))[1]
+    np.testing.assert_array_equal(response["rows"], rows)
+
+
+def test_parse_rejects_every_truncation():
+    data = pack_responses([make_frame(0)[1], make_frame(1)[1]])
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            parse_proof_responses(data[:size])
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pack_responses([make_frame()[1]], magic=b"XXXX"),
+        pack_responses([make_frame()[1]], version=RESPONSES_VERSION + 1),
+        # More frames announced than sent
+        pack_responses([make_frame()[1]], num_frames=2),
+        pack_responses([make_frame()[1]], num_frames=2**16 - 1),
+        # Data after the last frame
+        pack_responses([make_frame()[1]]) + b"\0",
+        # The same GPU twice
+        pack_responses([make_frame(0)[1], make_frame(0)[1]]),
+    ],
+)
+def test_parse_rejects_malformed_buffers(data):
+    with pytest.raises(ValueError):
+        parse_proof_responses(data)
+
+
+@pytest.mark.parametrize("field", ["n", "depth", "hash_size"])
+def test_parse_rejects_oversized_frame_headers(field):
+    indices = [(0, 1)]
+    rows = np.zeros((1, N), dtype=np.float32)
+    proofs = np.zeros((1, 3, 32), dtype=np.uint8)
+    # Sizes of up to 2**32 - 1 per field are refused before anything is allocated
+    frame = pack_frame(0, indices, rows, proofs, **{field: 2**32 - 1})
+    with pytest.raises(ValueError, match="Truncated"):
+        parse_proof_responses(pack_responses([frame]))
+
+
+def test_parse_random_input_fails_cleanly():
+    rng = random.Random(0)
+    header = struct.pack(RESPONSES_HEADER, RESPONSES_MAGIC, RESPONSES_VERSION, 1)
+    for _ in range(500):
+        data = header + rng.randbytes(rng.randrange(0, 200))
+        try:
+            responses = parse_proof_responses(data)
+        except ValueError:
+            continue
+        assert isinstance(responses, dict)
+
+
+@pytest.mark.parametrize(
+    "k, n, depth",
+    [
+        (1, N, 3),  # fewer rows than challenge indices
+        (2, N - 1, 3),  # rows of the wrong length
+        (2, N, 0),  # no proof
+    ],
+)
+def test_forged_frames_fail_verification(k, n, depth):
+    indices = [(0, 1), (1, 2)]
+    response = parse_proof_responses(pack_responses([make_frame(k=k, n=n, depth=depth)[1]]))[0]
+    passed, reason = verify_gpu_response(SEEDS, ROOT_HASH, response, indices, N)
+    assert not passed
+    assert reason
+
+
+@pytest.mark.parametrize(
+    "response, root_hash",
+    [
+        ({"rows": np.zeros((2, N), dtype=np.float32), "proofs": [[], []], "indices": [(9, 9), (1, 2)]}, ROOT_HASH),
+        ({"rows": np.zeros((2, N), dtype=np.float32), "proofs": [[b"\0" * 32], [b"\0" * 32]]}, "not hex"),
+        ({"rows": np.zeros((2, N), dtype=np.float64), "proofs": [[], []]}, ROOT_HASH),
+        ({"rows": [["a"] * N] * 2, "proofs": [[], []]}, ROOT_HASH),
+        ({"rows": np.zeros((2, N), dtype=np.float32), "proofs": [["not bytes"], [b""]]}, ROOT_HASH),
+        ({"rows": np.zeros((2, N), dtype=np.float32), "proofs": None}, ROOT_HASH),
+        ({"rows": np.zeros((2, N), dtype=np.float32)}, ROOT_HASH),
+        ([1, 2, 3], ROOT_HASH),
+        ("response", ROOT_HASH),
+        (None, ROOT_HASH),
+    ],
+)
+def test_malformed_responses_fail_verification(response, root_hash):
+    passed, reason = verify_gpu_response(SEEDS, root_hash, response, [(0, 1), (1, 2)], N)
+    assert not passed
+    assert reason
+
+
+@pytest.fixture(scope="module")
+def pog():
+    pytest.importorskip("bittensor")
+    pytest.importorskip("torch")
+    from neurons.Validator import pog
+
+    return pog
+
+
+class FakeChannel:
+    def __init__(self, output):
+        self.output = output
+
+    def exec_command(self, command):
+        pass
+
+    def makefile_stdin(self, mode):
+        return io.BytesIO()
+
+    def makefile(self, mode):
+        return io.BytesIO(self.output)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_stderr_ready(self):
+        return False
+
+    def shutdown_write(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, output):
+        self.output = output
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return FakeChannel(self.output)
+
+
+def reply(result=None, **fields):
+    return (json.dumps({"ok": True, "result": result, **fields}) + "\n").encode()
+
+
+def test_session_returns_valid_replies(pog):
+    session = pog.MinerScriptSession(FakeClient(reply({"num_gpus": 1})))
+    assert session.gpu_info() == {"num_gpus": 1}
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        b"garbage\n",
+        b"[1, 2]\n",
+        b'{"ok": true}\n',
+        # Cut before the end of the line
+        reply({"num_gpus": 1})[:-1],
+        reply({"num_gpus": 1})[:10],
+        b"\xff\xfe\n",
+    ],
+)
+def test_session_rejects_malformed_replies(pog, output):
+    session = pog.MinerScriptSession(FakeClient(output))
+    with pytest.raises(pog.MinerScriptProtocolError):
+        session.request("gpu_info")
+
+
+def test_session_rejects_oversized_replies(pog):
+    session = pog.MinerScriptSession(FakeClient(reply({"padding": "x" * 1000})))
+    session.max_reply_bytes = 100
+    with pytest.raises(pog.MinerScriptProtocolError, match="oversized"):
+        session.request("gpu_info")
+
+
+@pytest.mark.parametrize("output", [b"", b'{"ok": false, "error": "CUDA error"}\n'])
+def test_session_reports_failed_commands(pog, output):
+    session = pog.MinerScriptSession(FakeClient(output))
+    with pytest.raises(RuntimeError):
+        session.request("gpu_info")
+
+
+@pytest.mark.parametrize(
+    "method, args, result",
+    [
+        ("gpu_info", (), [1]),
+        ("benchmark", (), {"num_gpus": 1}),
+        ("benchmark", (), {"num_gpus": "one", "vram": 1, "size_fp16": 1, "time_fp16": 1, "size_fp32": 1, "time_fp32": 1}),
+        ("benchmark", (), "result"),
+        ("compute", ({0: (1, 2)}, N), {"root_hashes": [[0, "00"]]}),
+        ("compute", ({0: (1, 2)}, N), {"root_hashes": [0], "timings": []}),
+        ("compute", ({0: (1, 2)}, N), {"root_hashes": [[0, "00"]], "timings": [[0, "timing"]]}),
+        ("proof", ({0: [(0, 1)]}, 1), [1]),
+    ],
+)
+def test_session_rejects_malformed_results(pog, method, args, result):
+    session = pog.MinerScriptSession(FakeClient(reply(result)))
+    with pytest.raises(pog.MinerScriptProtocolError):
+        getattr(session, method)(*args)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"responses": "not base64!"},
+        {"responses": base64.b64encode(b"POGR").decode()},
+        {"responses": base64.b64encode(pack_responses([make_frame()[1]])[:-1]).decode(), "proof_time": "fast"},
+        {"proof_time": 1.0},
+        {"responses": 5},
+    ],
+)
+def test_session_drops_malformed_proof_responses(pog, result):
+    session = pog.MinerScriptSession(FakeClient(reply(result)))
+    responses = session.proof({0: [(0, 1)]}, 2)
+    assert responses == {0: None, 1: None}
+    assert set(session.proof_timings) == {"challenge", "proof_download"}
+
+
+def test_session_parses_proof_responses(pog):
+    indices, frame = make_frame(gpu_id=1)
+    session = pog.MinerScriptSession(FakeClient(reply({"responses": base64.b64encode(pack_responses([frame])).decode()})))
+    responses = session.proof({1: indices}, 2)
+    assert responses[0] is None
+    assert responses[1]["indices"] == indices
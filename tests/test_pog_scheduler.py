@@ -0,0 +1,195 @@
+"""
+Retry scheduling and round planning of the Proof-of-GPU tests.
+
+Run from the repository root with: python -m pytest tests
+"""
+
+import asyncio
+import socket
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from neurons.Validator.pog_scheduler import (
+    DEFAULT_RETRY_BACKOFF,
+    FAILURE_BUSY,
+    FAILURE_CONNECTION,
+    FAILURE_ERROR,
+    FAILURE_SCREENED,
+    FAILURE_VERIFICATION,
+    PogTestFailure,
+    RetryScheduler,
+    classify_failure,
+    plan_round,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_axon(hotkey):
+    return SimpleNamespace(hotkey=hotkey)
+
+
+def next_axon(scheduler):
+    return asyncio.run(asyncio.wait_for(scheduler.next(), timeout=5))
+
+
+@pytest.mark.parametrize("kind", sorted(DEFAULT_RETRY_BACKOFF))
+def test_backoff_doubles_per_failure_up_to_the_cap(kind):
+    scheduler = RetryScheduler(retry_limit=100, max_backoff=900, clock=FakeClock())
+    axon = make_axon("a")
+    scheduler.schedule(axon)
+    base = DEFAULT_RETRY_BACKOFF[kind]
+    delays = [scheduler.failed(axon, kind) for _ in range(8)]
+    assert delays == [min(base * 2**k, 900) for k in range(8)]
+    assert delays[-1] == 900
+
+
+def test_backoff_of_the_config_overrides_the_defaults():
+    scheduler = RetryScheduler(
+        retry_limit=100, backoff={FAILURE_BUSY: 10}, default_backoff=7, max_backoff=50, clock=FakeClock()
+    )
+    busy, other = make_axon("busy"), make_axon("other")
+    scheduler.schedule(busy)
+    scheduler.schedule(other)
+    assert [scheduler.failed(busy, FAILURE_BUSY) for _ in range(4)] == [10, 20, 40, 50]
+    # Unknown failure kinds fall back to the default backoff
+    assert [scheduler.failed(other, "unknown") for _ in range(3)] == [7, 14, 28]
+
+
+def test_backoff_grows_with_the_failures_of_every_kind():
+    scheduler = RetryScheduler(retry_limit=100, clock=FakeClock())
+    axon = make_axon("a")
+    scheduler.schedule(axon)
+    scheduler.failed(axon, FAILURE_BUSY)
+    scheduler.failed(axon, FAILURE_BUSY)
+    # Third failure of the miner, on the base delay of its kind
+    assert scheduler.failed(axon, FAILURE_CONNECTION) == DEFAULT_RETRY_BACKOFF[FAILURE_CONNECTION] * 4
+
+
+def test_screened_miners_are_never_rescheduled():
+    clock = FakeClock()
+    scheduler = RetryScheduler(retry_limit=100, clock=clock)
+    axon = make_axon("a")
+    scheduler.schedule(axon)
+    assert next_axon(scheduler) is axon
+    assert scheduler.failed(axon, FAILURE_SCREENED) is None
+    assert scheduler.get_state()["a"]["status"] == "failed"
+    clock.now += 10**6
+    assert next_axon(scheduler) is None
+
+
+def test_no_retry_past_the_retry_limit_or_the_deadline():
+    clock = FakeClock()
+    scheduler = RetryScheduler(retry_limit=2, clock=clock)
+    axon = make_axon("a")
+    scheduler.schedule(axon)
+    assert next_axon(scheduler) is axon
+    delay = scheduler.failed(axon, FAILURE_BUSY)
+    assert delay is not None
+    clock.now += delay
+    assert next_axon(scheduler) is axon
+    assert scheduler.failed(axon, FAILURE_BUSY) is None
+
+    scheduler = RetryScheduler(retry_limit=100, duration=100, clock=clock)
+    scheduler.schedule(axon)
+    assert next_axon(scheduler) is axon
+    assert scheduler.failed(axon, FAILURE_VERIFICATION) is None
+    assert scheduler.get_stats()["miners"] == {"failed": 1}
+
+
+def test_next_returns_the_due_attempts_in_time_order():
+    clock = FakeClock()
+    scheduler = RetryScheduler(retry_limit=10, clock=clock)
+    for hotkey, delay in (("a", 30), ("b", 10), ("c", 20), ("d", 10)):
+        scheduler.schedule(make_axon(hotkey), delay)
+    clock.now += 30
+    # Equal due times keep the scheduling order
+    assert [next_axon(scheduler).hotkey for _ in range(4)] == ["b", "d", "c", "a"]
+    assert scheduler.get_stats()["in_flight"] == 4
+
+
+def test_next_waits_for_the_head_of_the_queue():
+    scheduler = RetryScheduler(retry_limit=10)
+    scheduler.schedule(make_axon("later"), 0.2)
+    scheduler.schedule(make_axon("soon"), 0.05)
+
+    async def take_two():
+        return [(await scheduler.next()).hotkey for _ in range(2)]
+
+    start = time.monotonic()
+    assert asyncio.run(asyncio.wait_for(take_two(), timeout=5)) == ["soon", "later"]
+    assert time.monotonic() - start >= 0.2
+
+
+def test_next_wakes_up_on_a_retry_and_ends_with_the_last_miner():
+    async def run():
+        scheduler = RetryScheduler(retry_limit=10, backoff={FAILURE_BUSY: 0.05})
+        axon = make_axon("a")
+        scheduler.schedule(axon)
+        assert await scheduler.next() is axon
+
+        # Nothing is due while the only miner is tested, the waiter sleeps until it fails
+        waiter = asyncio.create_task(scheduler.next())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        scheduler.failed(axon, FAILURE_BUSY)
+        assert await asyncio.wait_for(waiter, timeout=5) is axon
+
+        waiter = asyncio.create_task(scheduler.next())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        scheduler.succeeded("a")
+        assert await asyncio.wait_for(waiter, timeout=5) is None
+
+    asyncio.run(run())
+
+
+def test_plan_round_spreads_within_the_spread_duration():
+    hotkeys = [f"h{i}" for i in range(10)]
+    last_results = {"h0": 500.0, "h1": 100.0, "h2": 300.0}
+    plan = plan_round(hotkeys, last_results, start=1000.0, spread=2400.0)
+
+    assert sorted(plan) == sorted(hotkeys)
+    dues = list(plan.values())
+    assert dues == sorted(dues)
+    assert all(1000.0 <= due < 1000.0 + 2400.0 for due in dues)
+    assert dues[1] - dues[0] == pytest.approx(240.0)
+    # Miners without a result first, then the stalest results
+    assert list(plan)[-3:] == ["h1", "h2", "h0"]
+
+
+def test_plan_round_without_spread_or_miners():
+    assert plan_round([], {}, start=1000.0, spread=2400.0) == {}
+    assert plan_round(["a", "b"], {}, start=1000.0, spread=0) == {"a": 1000.0, "b": 1000.0}
+
+
+def test_round_resumes_from_the_saved_plan(tmp_path, monkeypatch):
+    pytest.importorskip("bittensor")
+    from compute.utils.db import ComputeDb
+    from neurons.Validator.database.pog import get_pog_schedule, save_pog_schedule
+
+    monkeypatch.chdir(tmp_path)
+    db = ComputeDb()
+    try:
+        assert get_pog_schedule(db) == (None, {})
+        plan = plan_round(["a", "b", "c"], {}, start=1000.0, spread=300.0)
+        save_pog_schedule(db, 1000.0, plan)
+        assert get_pog_schedule(db) == (1000.0, plan)
+    finally:
+        db.close()
+
+
+def test_classify_failure():
+    assert classify_failure(PogTestFailure(FAILURE_VERIFICATION, "bad proof")) == FAILURE_VERIFICATION
+    assert classify_failure(socket.timeout("timed out")) == FAILURE_CONNECTION
+    assert classify_failure(ConnectionRefusedError()) == FAILURE_CONNECTION
+    assert classify_failure(FileNotFoundError("config.yaml")) == FAILURE_ERROR
+    assert classify_failure(ValueError()) == FAILURE_ERROR